@@ -0,0 +1,169 @@
+import math
+import time
+import asyncio
+from collections import OrderedDict, deque
+from typing import Deque, Dict, Optional, Tuple
+
+
+class AdmissionRejected(Exception):
+    """A request was turned away; retry_after is a hint in whole seconds"""
+
+    def __init__(self, reason: str, retry_after: int):
+        super().__init__(reason)
+        self.reason = reason
+        self.retry_after = retry_after
+
+
+class ClientRateLimiter:
+    """Per-client token buckets refilled at `rate_per_minute`, holding at most `burst` tokens
+
+    Only the most recently seen `max_clients` buckets are kept; a client whose
+    bucket was evicted simply starts again with a full bucket. A request costing
+    more than `burst` is allowed once the bucket is full and leaves it in debt,
+    so the client then waits until the whole cost has been refilled.
+    """
+
+    def __init__(self, rate_per_minute: float, burst: int, max_clients: int = 10000):
+        self.rate = rate_per_minute / 60.0
+        self.burst = burst
+        self.max_clients = max_clients
+        self._buckets: "OrderedDict[str, Tuple[float, float]]" = OrderedDict()
+        self.rejected = 0
+
+    @property
+    def enabled(self) -> bool:
+        return self.rate > 0
+
+    def check(self, client_id: str, cost: float = 1) -> float:
+        """Take `cost` tokens for client_id; returns 0 if allowed, else seconds until it would be"""
+        wait = self.wait_time(client_id, cost)
+        if wait > 0:
+            self.rejected += 1
+        else:
+            self.take(client_id, cost)
+        return wait
+
+    def wait_time(self, client_id: str, cost: float = 1) -> float:
+        """Seconds until client_id could spend `cost` tokens, without taking any"""
+        if not self.enabled:
+            return 0.0
+        tokens = self._tokens(client_id, time.monotonic())
+        needed = min(cost, float(self.burst))
+        return 0.0 if tokens >= needed else (needed - tokens) / self.rate
+
+    def take(self, client_id: str, cost: float = 1) -> None:
+        """Charge `cost` tokens to client_id, once wait_time() has allowed it"""
+        if not self.enabled:
+            return
+        now = time.monotonic()
+        tokens = self._tokens(client_id, now)
+        self._buckets.pop(client_id, None)
+        self._buckets[client_id] = (tokens - cost, now)
+        if len(self._buckets) > self.max_clients:
+            self._buckets.popitem(last=False)
+
+    def _tokens(self, client_id: str, now: float) -> float:
+        tokens, updated = self._buckets.get(client_id, (float(self.burst), now))
+        return min(float(self.burst), tokens + (now - updated) * self.rate)
+
+    def stats(self) -> Dict[str, float]:
+        return {
+            "clients": len(self._buckets),
+            "rate_per_minute": self.rate * 60,
+            "burst": self.burst,
+            "rejected": self.rejected,
+        }
+
+
+class AdmissionController:
+    """Cap on concurrently admitted requests with a bounded FIFO wait queue
+
+    Up to `max_active` holders run at once. Further callers wait in a queue of
+    at most `max_queue` entries for up to `queue_timeout` seconds; beyond that
+    they are rejected straight away, so admitted requests see bounded latency
+    instead of an ever-growing backlog.
+    """
+
+    def __init__(self, max_active: int, max_queue: int, queue_timeout: float):
+        self.max_active = max_active
+        self.max_queue = max_queue
+        self.queue_timeout = queue_timeout
+        self._active = 0
+        self._waiters: Deque["asyncio.Future[None]"] = deque()
+        # Running estimate of how long a slot is held, used for Retry-After
+        self._hold_seconds = 1.0
+        self.admitted = 0
+        self.rejected: Dict[str, int] = {"queue_full": 0, "queue_timeout": 0}
+
+    @property
+    def active(self) -> int:
+        return self._active
+
+    @property
+    def queued(self) -> int:
+        return len(self._waiters)
+
+    def would_reject(self) -> bool:
+        """True if a caller arriving now would be turned away without waiting"""
+        return self._active >= self.max_active and len(self._waiters) >= self.max_queue
+
+    def retry_after(self) -> int:
+        """Estimated seconds until the current queue has drained"""
+        return max(1, math.ceil(self._hold_seconds * (len(self._waiters) + 1) / self.max_active))
+
+    async def acquire(self) -> float:
+        """Wait for a slot; returns the monotonic time it was granted, to pass back to release"""
+        if self._active < self.max_active and not self._waiters:
+            self._active += 1
+            self.admitted += 1
+            return time.monotonic()
+        if len(self._waiters) >= self.max_queue:
+            self.rejected["queue_full"] += 1
+            raise AdmissionRejected("queue_full", self.retry_after())
+
+        waiter = asyncio.get_running_loop().create_future()
+        self._waiters.append(waiter)
+        try:
+            await asyncio.wait_for(waiter, self.queue_timeout)
+        except asyncio.TimeoutError:
+            if not self._abandon(waiter):
+                self.rejected["queue_timeout"] += 1
+                raise AdmissionRejected("queue_timeout", self.retry_after())
+        except asyncio.CancelledError:
+            if self._abandon(waiter):
+                self.release()
+            raise
+        self.admitted += 1
+        return time.monotonic()
+
+    def release(self, granted_at: Optional[float] = None) -> None:
+        if granted_at is not None:
+            self._hold_seconds = 0.8 * self._hold_seconds + 0.2 * (time.monotonic() - granted_at)
+        # Hand the slot straight to the oldest waiter that is still waiting
+        while self._waiters:
+            waiter = self._waiters.popleft()
+            if not waiter.done():
+                waiter.set_result(None)
+                return
+        self._active -= 1
+
+    def stats(self) -> Dict[str, int]:
+        return {
+            "active": self._active,
+            "queued": len(self._waiters),
+            "max_active": self.max_active,
+            "max_queue": self.max_queue,
+            "admitted": self.admitted,
+            "rejected_queue_full": self.rejected["queue_full"],
+            "rejected_queue_timeout": self.rejected["queue_timeout"],
+        }
+
+    def _abandon(self, waiter: "asyncio.Future[None]") -> bool:
+        """Stop waiting; returns True if the slot had already been handed to this waiter"""
+        if waiter.done() and not waiter.cancelled():
+            return True
+        try:
+            self._waiters.remove(waiter)
+        except ValueError:
+            pass
+        return False
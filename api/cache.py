@@ -0,0 +1,230 @@
+import os
+import asyncio
+import json
+import time
+import uuid
+import hashlib
+import logging
+import threading
+from collections import OrderedDict
+from pathlib import Path
+from typing import Optional, Dict, Any, Tuple
+
+logger = logging.getLogger(__name__)
+
+# Temporary files left by an interrupted disk write are removed once they are this old
+STALE_TEMP_SECONDS = 3600
+
+
+def normalize_content(content: str) -> str:
+    """Collapse whitespace so trivially different copies of a page hash the same"""
+    return " ".join(content.split())
+
+
+def make_cache_key(content: str, length: str, is_selection: bool,
+                   model_name: str, model_config: Dict[str, Any]) -> str:
+    """Build a content-addressed key for a summary request"""
+    params = json.dumps(
+        {
+            "length": length,
+            "isSelection": bool(is_selection),
+            "model": model_name,
+            "config": model_config,
+        },
+        sort_keys=True,
+    )
+    digest = hashlib.sha256()
+    digest.update(params.encode("utf-8"))
+    digest.update(b"\0")
+    digest.update(normalize_content(content).encode("utf-8"))
+    return digest.hexdigest()
+
+
+class SummaryCache:
+    """LRU + TTL cache of generated summaries with an optional on-disk tier
+
+    The disk tier is bounded by sweep_disk(), which removes expired files and
+    then the least recently used ones beyond disk_max_entries (0 for no limit).
+    A file's modification time records when it was last written or read.
+    """
+
+    def __init__(self, max_entries: int = 1000, ttl_seconds: float = 86400,
+                 disk_dir: Optional[Path] = None, disk_max_entries: int = 10000):
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self.disk_dir = disk_dir
+        self.disk_max_entries = disk_max_entries
+        self._entries: "OrderedDict[str, Tuple[float, Dict[str, Any]]]" = OrderedDict()
+        self._lock = threading.Lock()
+
+        self.hits = 0
+        self.disk_hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.disk_entries = 0
+        self.disk_evictions = 0
+
+        if self.disk_dir is not None:
+            self.disk_dir.mkdir(parents=True, exist_ok=True)
+
+    def get(self, key: str) -> Optional[Dict[str, Any]]:
+        """Return a cached summary or None, promoting disk hits into memory"""
+        now = time.time()
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                expires_at, value = entry
+                if expires_at > now:
+                    self._entries.move_to_end(key)
+                    self.hits += 1
+                    return value
+                del self._entries[key]
+
+        value, expires_at = self._read_disk(key, now)
+        with self._lock:
+            if value is None:
+                self.misses += 1
+                return None
+            self.disk_hits += 1
+            self._insert(key, value, expires_at)
+        return value
+
+    def set(self, key: str, value: Dict[str, Any]) -> None:
+        """Store a summary in memory and, if enabled, on disk"""
+        expires_at = time.time() + self.ttl_seconds
+        with self._lock:
+            self._insert(key, value, expires_at)
+        self._write_disk(key, value, expires_at)
+
+    async def aget(self, key: str) -> Optional[Dict[str, Any]]:
+        """Async get that keeps disk reads off the event loop"""
+        if self.disk_dir is None:
+            return self.get(key)
+        return await asyncio.to_thread(self.get, key)
+
+    async def aset(self, key: str, value: Dict[str, Any]) -> None:
+        """Async set that keeps disk writes off the event loop"""
+        if self.disk_dir is None:
+            self.set(key, value)
+        else:
+            await asyncio.to_thread(self.set, key, value)
+
+    def clear(self) -> None:
+        """Drop every in-memory entry (the disk tier is left untouched)"""
+        with self._lock:
+            self._entries.clear()
+
+    def stats(self) -> Dict[str, Any]:
+        """Return hit/miss counters for status reporting"""
+        with self._lock:
+            lookups = self.hits + self.disk_hits + self.misses
+            return {
+                "entries": len(self._entries),
+                "max_entries": self.max_entries,
+                "hits": self.hits,
+                "disk_hits": self.disk_hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+                "hit_rate": round((self.hits + self.disk_hits) / lookups, 4) if lookups else 0.0,
+                "disk_enabled": self.disk_dir is not None,
+                "disk_entries": self.disk_entries,
+                "disk_max_entries": self.disk_max_entries,
+                "disk_evictions": self.disk_evictions,
+            }
+
+    def sweep_disk(self) -> Dict[str, int]:
+        """Remove expired and least recently used disk entries; returns counts of each
+
+        Blocking; run it off the event loop. A file neither written nor read for
+        a whole TTL has certainly expired, so expiry needs no file reads; an entry
+        that expired since it was last read is dropped on its next read or a later sweep.
+        """
+        if self.disk_dir is None:
+            return {"expired": 0, "evicted": 0, "entries": 0}
+        now = time.time()
+        expired = 0
+        files = []
+        for path in self.disk_dir.glob("*/*"):
+            try:
+                mtime = path.stat().st_mtime
+            except OSError:
+                continue
+            if path.suffix == ".tmp":
+                if mtime + STALE_TEMP_SECONDS <= now:
+                    self._remove_disk(path)
+                continue
+            if mtime + self.ttl_seconds <= now:
+                self._remove_disk(path)
+                expired += 1
+            else:
+                files.append((mtime, path))
+
+        evicted = 0
+        if self.disk_max_entries and len(files) > self.disk_max_entries:
+            files.sort()
+            for _, path in files[:len(files) - self.disk_max_entries]:
+                self._remove_disk(path)
+            evicted = len(files) - self.disk_max_entries
+            files = files[evicted:]
+        with self._lock:
+            self.disk_entries = len(files)
+            self.disk_evictions += evicted
+        if expired or evicted:
+            logger.info(f"Cache sweep removed {expired} expired and {evicted} least recently used disk entries")
+        return {"expired": expired, "evicted": evicted, "entries": len(files)}
+
+    def _insert(self, key: str, value: Dict[str, Any], expires_at: float) -> None:
+        # Caller must hold self._lock
+        self._entries[key] = (expires_at, value)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+            self.evictions += 1
+
+    def _disk_path(self, key: str) -> Path:
+        return self.disk_dir / key[:2] / f"{key}.json"
+
+    def _read_disk(self, key: str, now: float) -> Tuple[Optional[Dict[str, Any]], float]:
+        if self.disk_dir is None:
+            return None, 0.0
+        path = self._disk_path(key)
+        try:
+            with open(path, 'r') as f:
+                record = json.load(f)
+        except FileNotFoundError:
+            return None, 0.0
+        except (OSError, json.JSONDecodeError) as e:
+            logger.warning(f"Discarding unreadable cache file {path}: {str(e)}")
+            self._remove_disk(path)
+            return None, 0.0
+
+        expires_at = record.get("expires_at", 0)
+        if expires_at <= now:
+            self._remove_disk(path)
+            return None, 0.0
+        try:
+            # Mark the entry as recently used for sweep_disk
+            os.utime(path)
+        except OSError:
+            pass
+        return record.get("summary"), expires_at
+
+    def _write_disk(self, key: str, value: Dict[str, Any], expires_at: float) -> None:
+        if self.disk_dir is None:
+            return
+        path = self._disk_path(key)
+        try:
+            path.parent.mkdir(parents=True, exist_ok=True)
+            temp_file = path.with_suffix(f".{uuid.uuid4().hex}.tmp")
+            with open(temp_file, 'w') as f:
+                json.dump({"expires_at": expires_at, "summary": value}, f)
+            os.replace(temp_file, path)
+        except OSError as e:
+            logger.warning(f"Failed to write cache file {path}: {str(e)}")
+
+    @staticmethod
+    def _remove_disk(path: Path) -> None:
+        try:
+            path.unlink()
+        except OSError:
+            pass
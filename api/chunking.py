@@ -0,0 +1,65 @@
+import re
+from typing import List
+
+# Blank lines separate paragraphs; markdown-style headings start new sections
+_PARAGRAPH_BREAK = re.compile(r"\n\s*\n")
+_HEADING = re.compile(r"^(#{1,6}\s|[A-Z][A-Z0-9 ,:'-]{3,80}$)")
+_SENTENCE_END = re.compile(r"(?<=[.!?])\s+")
+
+
+def split_paragraphs(content: str) -> List[str]:
+    """Split page text into non-empty paragraphs, starting a new one at each heading line"""
+    paragraphs = []
+    for block in _PARAGRAPH_BREAK.split(content):
+        current = []
+        for line in block.split("\n"):
+            stripped = line.strip()
+            if not stripped:
+                continue
+            if current and _HEADING.match(stripped):
+                paragraphs.append("\n".join(current))
+                current = []
+            current.append(stripped)
+        if current:
+            paragraphs.append("\n".join(current))
+    return paragraphs
+
+
+def _split_oversized(paragraph: str, max_chars: int) -> List[str]:
+    """Break a paragraph longer than max_chars on sentence boundaries, hard-splitting as a last resort"""
+    pieces = []
+    current = ""
+    for sentence in _SENTENCE_END.split(paragraph):
+        while len(sentence) > max_chars:
+            if current:
+                pieces.append(current)
+                current = ""
+            pieces.append(sentence[:max_chars])
+            sentence = sentence[max_chars:]
+        if current and len(current) + 1 + len(sentence) > max_chars:
+            pieces.append(current)
+            current = sentence
+        else:
+            current = f"{current} {sentence}" if current else sentence
+    if current:
+        pieces.append(current)
+    return pieces
+
+
+def split_into_chunks(content: str, max_chars: int) -> List[str]:
+    """Pack paragraphs greedily into chunks of at most max_chars characters"""
+    chunks = []
+    current: List[str] = []
+    current_len = 0
+    for paragraph in split_paragraphs(content):
+        parts = [paragraph] if len(paragraph) <= max_chars else _split_oversized(paragraph, max_chars)
+        for part in parts:
+            if current and current_len + 2 + len(part) > max_chars:
+                chunks.append("\n\n".join(current))
+                current = []
+                current_len = 0
+            current.append(part)
+            current_len += len(part) + (2 if current_len else 0)
+    if current:
+        chunks.append("\n\n".join(current))
+    return chunks
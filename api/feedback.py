@@ -0,0 +1,243 @@
+import os
+import json
+import logging
+import threading
+from collections import OrderedDict
+from pathlib import Path
+from typing import Any, Dict, List, Optional
+
+from file_locks import exclusive_lock
+
+logger = logging.getLogger(__name__)
+
+RATINGS = (1, 2, 3, 4, 5)
+
+
+class FeedbackAggregate:
+    """Running count, sum and 1-5 distribution of ratings"""
+    __slots__ = ("count", "total", "distribution")
+
+    def __init__(self):
+        self.count = 0
+        self.total = 0
+        self.distribution = [0] * len(RATINGS)
+
+    def add(self, rating: int) -> None:
+        self.count += 1
+        self.total += rating
+        self.distribution[rating - 1] += 1
+
+    def copy(self) -> "FeedbackAggregate":
+        aggregate = FeedbackAggregate()
+        aggregate.count = self.count
+        aggregate.total = self.total
+        aggregate.distribution = list(self.distribution)
+        return aggregate
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "count": self.count,
+            "mean": round(self.total / self.count, 3) if self.count else None,
+            "distribution": {str(rating): n for rating, n in zip(RATINGS, self.distribution)},
+        }
+
+
+def _parse_entry(line: bytes) -> Optional[Dict[str, Any]]:
+    try:
+        entry = json.loads(line)
+        if entry.get("rating") not in RATINGS:
+            raise ValueError("rating out of range")
+    except (ValueError, AttributeError):
+        # A torn line from a crash mid-write, or a hand-edited file
+        return None
+    return entry
+
+
+class FeedbackStore:
+    """Append-only feedback log with buffered writes and aggregates derived from the log
+
+    Entries are appended to a JSON-lines file in batches: record() only adds to
+    an in-memory buffer, and flush() writes everything buffered with a single
+    write. Several worker processes append to the same log under a lock file,
+    and the aggregates are built from the log itself: each query first reads
+    whatever was appended since the last one (by any worker), so every worker
+    reports the same statistics. Entries still buffered in this process are
+    added on top.
+
+    Per-URL aggregates are kept for at most max_urls pages, least recently
+    rated first out. A page whose aggregate is not held is counted with one
+    scan of the log when it is queried.
+    """
+
+    def __init__(self, log_file: Path, max_buffer: int = 100, max_urls: int = 10000):
+        self.log_file = Path(log_file)
+        self.max_buffer = max_buffer
+        self.max_urls = max_urls
+        self._buffer: List[Dict[str, Any]] = []
+        self._lock = threading.Lock()
+        # Serializes flushes with log reads, so an entry is never counted from the buffer and the log at once
+        self._write_lock = threading.Lock()
+        self.overall = FeedbackAggregate()
+        self.by_url: "OrderedDict[str, FeedbackAggregate]" = OrderedDict()
+        self.by_length: Dict[str, FeedbackAggregate] = {}
+        self.flushed = 0
+        self.url_scans = 0
+        # Bytes of the log aggregated so far; once a URL has been evicted, a URL not in
+        # by_url may have earlier entries, so it is only added when counted by a scan
+        self._offset = 0
+        self._evicted = False
+        with self._write_lock:
+            self._refresh()
+        logger.info(f"Loaded {self.overall.count} feedback entries from {self.log_file}")
+
+    def record(self, entry: Dict[str, Any]) -> bool:
+        """Buffer one feedback entry; returns True when a flush is due"""
+        with self._lock:
+            self._buffer.append(entry)
+            return len(self._buffer) >= self.max_buffer
+
+    def flush(self) -> int:
+        """Append buffered entries to the log; returns how many were written"""
+        with self._write_lock:
+            with self._lock:
+                entries = list(self._buffer)
+            if not entries:
+                return 0
+            self.log_file.parent.mkdir(parents=True, exist_ok=True)
+            # Other worker processes append to the same log
+            with exclusive_lock(self.log_file.with_suffix(".jsonl.lock")), \
+                    open(self.log_file, "a+b") as f:
+                # Start on a fresh line if a writer crashed mid-line
+                size = f.seek(0, os.SEEK_END)
+                needs_newline = False
+                if size:
+                    f.seek(size - 1)
+                    needs_newline = f.read(1) != b"\n"
+                lines = "\n".join(json.dumps(entry, ensure_ascii=False) for entry in entries)
+                f.write((("\n" if needs_newline else "") + lines + "\n").encode("utf-8"))
+                f.flush()
+                os.fsync(f.fileno())
+            with self._lock:
+                del self._buffer[:len(entries)]
+            self.flushed += len(entries)
+            return len(entries)
+
+    @property
+    def buffered(self) -> int:
+        return len(self._buffer)
+
+    def url_stats(self, url: str) -> Optional[Dict[str, Any]]:
+        """Aggregate for one page; blocking, since it may read the log"""
+        with self._write_lock:
+            self._refresh()
+            aggregate = self.by_url.get(url)
+            if aggregate is None:
+                aggregate = self._scan_url(url)
+            buffered = self._buffered_ratings(lambda entry: entry.get("url") == url)
+        if aggregate is None and not buffered:
+            return None
+        return self._with(aggregate, buffered).to_dict()
+
+    def length_stats(self, length: str) -> Optional[Dict[str, Any]]:
+        with self._write_lock:
+            self._refresh()
+            aggregate = self.by_length.get(length)
+            buffered = self._buffered_ratings(lambda entry: entry.get("length") == length)
+        if aggregate is None and not buffered:
+            return None
+        return self._with(aggregate, buffered).to_dict()
+
+    def stats(self) -> Dict[str, Any]:
+        with self._write_lock:
+            self._refresh()
+            with self._lock:
+                buffer = list(self._buffer)
+            by_length = {length: aggregate.copy() for length, aggregate in self.by_length.items()}
+            for entry in buffer:
+                if entry.get("length"):
+                    by_length.setdefault(entry["length"], FeedbackAggregate()).add(entry["rating"])
+            return {
+                "overall": self._with(self.overall, [entry["rating"] for entry in buffer]).to_dict(),
+                "by_length": {length: aggregate.to_dict() for length, aggregate in by_length.items()},
+                "urls_cached": len(self.by_url),
+                "buffered": len(buffer),
+            }
+
+    @staticmethod
+    def _with(aggregate: Optional[FeedbackAggregate], ratings: List[int]) -> FeedbackAggregate:
+        combined = aggregate.copy() if aggregate is not None else FeedbackAggregate()
+        for rating in ratings:
+            combined.add(rating)
+        return combined
+
+    def _buffered_ratings(self, matches) -> List[int]:
+        with self._lock:
+            return [entry["rating"] for entry in self._buffer if matches(entry)]
+
+    def _refresh(self) -> None:
+        """Aggregate log lines appended since the last call; caller must hold self._write_lock"""
+        try:
+            f = open(self.log_file, "rb")
+        except FileNotFoundError:
+            return
+        skipped = 0
+        with f:
+            f.seek(self._offset)
+            for line in f:
+                if not line.endswith(b"\n"):
+                    # Still being written; read it next time
+                    break
+                self._offset += len(line)
+                entry = _parse_entry(line)
+                if entry is None:
+                    skipped += bool(line.strip())
+                    continue
+                self._aggregate(entry)
+        if skipped:
+            logger.warning(f"Skipped {skipped} unreadable lines in {self.log_file}")
+
+    def _aggregate(self, entry: Dict[str, Any]) -> None:
+        rating = entry["rating"]
+        self.overall.add(rating)
+        url = entry.get("url")
+        if url:
+            aggregate = self.by_url.get(url)
+            if aggregate is not None:
+                aggregate.add(rating)
+                self.by_url.move_to_end(url)
+            elif not self._evicted:
+                self._cache_url(url, FeedbackAggregate()).add(rating)
+        length = entry.get("length")
+        if length:
+            self.by_length.setdefault(length, FeedbackAggregate()).add(rating)
+
+    def _cache_url(self, url: str, aggregate: FeedbackAggregate) -> FeedbackAggregate:
+        self.by_url[url] = aggregate
+        self.by_url.move_to_end(url)
+        while len(self.by_url) > self.max_urls:
+            self.by_url.popitem(last=False)
+            self._evicted = True
+        return aggregate
+
+    def _scan_url(self, url: str) -> Optional[FeedbackAggregate]:
+        """Count one page's ratings from the log up to the aggregated offset"""
+        if not self._evicted:
+            # Every rated page is held, so this one has no ratings in the log
+            return None
+        self.url_scans += 1
+        aggregate = FeedbackAggregate()
+        try:
+            with open(self.log_file, "rb") as f:
+                position = 0
+                for line in f:
+                    position += len(line)
+                    if position > self._offset:
+                        break
+                    entry = _parse_entry(line)
+                    if entry is not None and entry.get("url") == url:
+                        aggregate.add(entry["rating"])
+        except FileNotFoundError:
+            return None
+        if not aggregate.count:
+            return None
+        return self._cache_url(url, aggregate)
@@ -0,0 +1,42 @@
+import os
+from contextlib import contextmanager
+from pathlib import Path
+
+try:
+    import fcntl
+except ImportError:  # Windows
+    fcntl = None
+    import msvcrt
+
+
+@contextmanager
+def exclusive_lock(lock_file: Path):
+    """Hold an exclusive lock on lock_file (created if missing) for the duration of the block
+
+    Serializes processes, including ones on other hosts sharing the volume
+    where the filesystem supports POSIX record locks (lockf, not flock, so
+    NFS works). The lock is per process: threads of one process must also
+    serialize among themselves.
+    """
+    fd = os.open(lock_file, os.O_RDWR | os.O_CREAT, 0o644)
+    try:
+        if fcntl is not None:
+            fcntl.lockf(fd, fcntl.LOCK_EX)
+        else:
+            while True:
+                try:
+                    # Retries for about 10 seconds before raising
+                    msvcrt.locking(fd, msvcrt.LK_LOCK, 1)
+                    break
+                except OSError:
+                    continue
+        try:
+            yield
+        finally:
+            if fcntl is not None:
+                fcntl.lockf(fd, fcntl.LOCK_UN)
+            else:
+                os.lseek(fd, 0, os.SEEK_SET)
+                msvcrt.locking(fd, msvcrt.LK_UNLCK, 1)
+    finally:
+        os.close(fd)
@@ -0,0 +1,103 @@
+import time
+import asyncio
+import logging
+import threading
+from typing import Any, Callable, Dict, List, Optional
+
+logger = logging.getLogger(__name__)
+
+INIT_MODES = ("lazy", "background", "eager")
+
+
+def _default_factory(api_key: str, **model_kwargs) -> Any:
+    # google.generativeai takes most of a second to import, so it is only
+    # imported when the first model is actually needed
+    import google.generativeai as genai
+    genai.configure(api_key=api_key)
+    return genai.GenerativeModel(**model_kwargs)
+
+
+class GeminiClient:
+    """One Gemini model shared by every request, created on first use
+
+    Importing and configuring the SDK happens in load(), which runs at most
+    once no matter how many callers race for it. get_model() runs it in a
+    worker thread so the event loop keeps serving other requests meanwhile;
+    warm() does the same ahead of time. A failed load is retried by the
+    next caller.
+    """
+
+    def __init__(self, api_key: str, model_name: str, generation_config: Dict[str, Any],
+                 safety_settings: List[Dict[str, str]], factory: Optional[Callable[..., Any]] = None):
+        self.api_key = api_key
+        self.model_name = model_name
+        self.generation_config = generation_config
+        self.safety_settings = safety_settings
+        self.factory = factory or _default_factory
+        self._model: Optional[Any] = None
+        self._lock = threading.Lock()
+        self._loading = False
+        self.load_seconds: Optional[float] = None
+        self.error: Optional[str] = None
+
+    @property
+    def ready(self) -> bool:
+        return self._model is not None
+
+    def load(self) -> Any:
+        """Import the SDK and build the model if that has not happened yet"""
+        if self._model is not None:
+            return self._model
+        with self._lock:
+            if self._model is None:
+                self._loading = True
+                start = time.perf_counter()
+                try:
+                    self._model = self.factory(
+                        api_key=self.api_key,
+                        model_name=self.model_name,
+                        generation_config=self.generation_config,
+                        safety_settings=self.safety_settings,
+                    )
+                    self.error = None
+                except Exception as e:
+                    self.error = str(e)
+                    raise
+                finally:
+                    self._loading = False
+                self.load_seconds = time.perf_counter() - start
+                logger.info(f"Gemini model {self.model_name} ready in {self.load_seconds * 1000:.0f}ms")
+        return self._model
+
+    async def get_model(self) -> Any:
+        if self._model is not None:
+            return self._model
+        return await asyncio.to_thread(self.load)
+
+    async def warm(self) -> None:
+        """Load the model in the background; failures are logged and left to the first request"""
+        try:
+            await self.get_model()
+        except Exception as e:
+            logger.error(f"Gemini model warm-up failed: {str(e)}")
+
+    def use_factory(self, factory: Callable[..., Any]) -> None:
+        """Build the model with `factory` instead of the SDK, discarding any model already built"""
+        with self._lock:
+            self.factory = factory
+            self._model = None
+
+    def stats(self) -> Dict[str, Any]:
+        if self._model is not None:
+            state = "ready"
+        elif self._loading:
+            state = "loading"
+        elif self.error:
+            state = "failed"
+        else:
+            state = "cold"
+        return {
+            "state": state,
+            "model": self.model_name,
+            "load_ms": round(self.load_seconds * 1000, 1) if self.load_seconds is not None else None,
+        }
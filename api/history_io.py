@@ -0,0 +1,210 @@
+import json
+import zlib
+import asyncio
+import logging
+from typing import Any, AsyncIterable, Dict, Iterator, List, Optional, Tuple
+
+from storage import HistoryStore, history_record_error
+
+logger = logging.getLogger(__name__)
+
+GZIP_MAGIC = b"\x1f\x8b"
+# Export output is yielded in chunks of roughly this many bytes
+EXPORT_CHUNK_BYTES = 64 * 1024
+# Longest NDJSON line accepted on import; longer lines are skipped without being buffered
+MAX_LINE_BYTES = 1024 * 1024
+# Import error messages returned to the client, at most
+MAX_REPORTED_ERRORS = 20
+# Derived from page content the export does not carry, so they can be neither checked nor recomputed on
+# import; an imported fingerprint could otherwise make unrelated pages reuse the record's summary
+LOOKUP_FIELDS = ("fingerprint", "paragraphs")
+
+
+def export_ndjson(store: HistoryStore, compress: bool = False,
+                  batch_size: int = 1000) -> Iterator[bytes]:
+    """Yield every history record as one NDJSON line, gzip-compressed if requested
+
+    Records are read from the store batch_size at a time and lines are grouped
+    into chunks of about EXPORT_CHUNK_BYTES, so with the SQLite backend memory
+    stays constant however large the history is. The json backend has to load
+    its whole file first. LOOKUP_FIELDS are left out.
+    """
+    compressor = zlib.compressobj(6, zlib.DEFLATED, 31) if compress else None
+    lines: List[str] = []
+    size = 0
+    for record in store.iter_records(batch_size):
+        for field in LOOKUP_FIELDS:
+            record.pop(field, None)
+        line = json.dumps(record, separators=(",", ":"), ensure_ascii=False) + "\n"
+        lines.append(line)
+        size += len(line)
+        if size >= EXPORT_CHUNK_BYTES:
+            chunk = "".join(lines).encode("utf-8")
+            lines = []
+            size = 0
+            if compressor is not None:
+                chunk = compressor.compress(chunk)
+                if not chunk:
+                    continue
+            yield chunk
+    chunk = "".join(lines).encode("utf-8")
+    if compressor is not None:
+        chunk = compressor.compress(chunk) + compressor.flush()
+    if chunk:
+        yield chunk
+
+
+class NDJSONReader:
+    """Split a byte stream into NDJSON records, transparently un-gzipping it
+
+    feed() takes raw bytes as they arrive and returns (line number, record or
+    None, error or None) for every line completed so far; close() returns the
+    last line if the stream did not end with a newline. Gzip input is detected
+    from its magic bytes, and concatenated gzip members are read one after
+    another. Only the current partial line is kept in memory.
+    """
+
+    def __init__(self, max_line_bytes: int = MAX_LINE_BYTES):
+        self.max_line_bytes = max_line_bytes
+        self.line_number = 0
+        self._head = b""
+        self._gzip: Optional[bool] = None
+        self._decompressor: Optional[Any] = None
+        self._buffer = bytearray()
+        self._skipping = False
+
+    def feed(self, data: bytes) -> List[Tuple[int, Optional[Dict[str, Any]], Optional[str]]]:
+        if self._gzip is None:
+            # Need the first two bytes to tell gzip from plain text
+            self._head += data
+            if len(self._head) < len(GZIP_MAGIC):
+                return []
+            data, self._head = self._head, b""
+            self._gzip = data.startswith(GZIP_MAGIC)
+        if self._gzip:
+            data = self._decompress(data)
+        return self._split(data)
+
+    def close(self) -> List[Tuple[int, Optional[Dict[str, Any]], Optional[str]]]:
+        results = []
+        if self._head:
+            results = self._split(self._head)
+            self._head = b""
+        if self._gzip and self._decompressor is not None and not self._decompressor.eof:
+            raise ValueError("Truncated gzip stream")
+        if self._buffer or self._skipping:
+            results.append(self._finish_line())
+        return results
+
+    def _decompress(self, data: bytes) -> bytes:
+        output = []
+        while data:
+            if self._decompressor is None:
+                self._decompressor = zlib.decompressobj(31)
+            try:
+                output.append(self._decompressor.decompress(data))
+            except zlib.error as e:
+                raise ValueError(f"Invalid gzip stream: {str(e)}")
+            if not self._decompressor.eof:
+                break
+            # Another gzip member may follow this one
+            data = self._decompressor.unused_data
+            if data:
+                self._decompressor = None
+        return b"".join(output)
+
+    def _split(self, data: bytes) -> List[Tuple[int, Optional[Dict[str, Any]], Optional[str]]]:
+        results = []
+        start = 0
+        while True:
+            end = data.find(b"\n", start)
+            if end < 0:
+                self._append(data[start:])
+                return results
+            self._append(data[start:end])
+            results.append(self._finish_line())
+            start = end + 1
+
+    def _append(self, piece: bytes) -> None:
+        if self._skipping:
+            return
+        self._buffer += piece
+        if len(self._buffer) > self.max_line_bytes:
+            self._buffer = bytearray()
+            self._skipping = True
+
+    def _finish_line(self) -> Tuple[int, Optional[Dict[str, Any]], Optional[str]]:
+        self.line_number += 1
+        line, skipping = bytes(self._buffer), self._skipping
+        self._buffer = bytearray()
+        self._skipping = False
+        if skipping:
+            return self.line_number, None, f"line is longer than {self.max_line_bytes} bytes"
+        if not line.strip():
+            return self.line_number, None, None
+        try:
+            record = json.loads(line)
+        except ValueError as e:
+            return self.line_number, None, f"invalid JSON: {str(e)}"
+        if isinstance(record, dict):
+            for field in LOOKUP_FIELDS:
+                record.pop(field, None)
+        error = history_record_error(record)
+        if error is not None:
+            return self.line_number, None, f"not a history record: {error}"
+        return self.line_number, record, None
+
+
+async def import_ndjson(chunks: AsyncIterable[bytes], store: HistoryStore,
+                        batch_size: int = 1000) -> Dict[str, Any]:
+    """Insert the records of an NDJSON (optionally gzip) byte stream into store
+
+    Records are inserted batch_size at a time as the stream arrives, without
+    any LOOKUP_FIELDS they carry, so imported summaries are never reused for
+    near-duplicate or revised pages; records whose id is already stored are counted as duplicates and left unchanged.
+    If a batch is rejected, its records are inserted one by one so that only
+    the bad ones are skipped. Returns counts and the first few line errors.
+    """
+    reader = NDJSONReader()
+    stats: Dict[str, Any] = {"lines": 0, "imported": 0, "duplicates": 0, "skipped": 0, "errors": []}
+    batch: List[Dict[str, Any]] = []
+
+    async def insert(records: List[Dict[str, Any]]) -> None:
+        try:
+            inserted = await asyncio.to_thread(store.add_many, records)
+        except Exception as e:
+            if len(records) == 1:
+                stats["skipped"] += 1
+                report(None, f"record {records[0]['id']} could not be stored: {str(e)}")
+                return
+            for record in records:
+                await insert([record])
+            return
+        stats["imported"] += inserted
+        stats["duplicates"] += len(records) - inserted
+
+    def report(line_number: Optional[int], error: str) -> None:
+        if len(stats["errors"]) < MAX_REPORTED_ERRORS:
+            stats["errors"].append({"line": line_number, "error": error})
+
+    async def handle(results) -> None:
+        nonlocal batch
+        for line_number, record, error in results:
+            stats["lines"] = line_number
+            if error is not None:
+                stats["skipped"] += 1
+                report(line_number, error)
+            elif record is not None:
+                batch.append(record)
+        if len(batch) >= batch_size:
+            await insert(batch)
+            batch = []
+
+    async for chunk in chunks:
+        await handle(reader.feed(chunk))
+    await handle(reader.close())
+    if batch:
+        await insert(batch)
+    logger.info(f"Imported {stats['imported']} history records ({stats['duplicates']} duplicates, "
+                f"{stats['skipped']} skipped)")
+    return stats
@@ -0,0 +1,239 @@
+import sys
+import copy
+import json
+import queue
+import atexit
+import random
+import logging
+import threading
+import logging.handlers
+from datetime import datetime, timezone
+from typing import Any, Dict, Iterable, Optional
+
+# Attributes every LogRecord has; anything else was passed with extra= and becomes a JSON field
+_RECORD_ATTRIBUTES = frozenset(vars(logging.LogRecord("", 0, "", 0, "", None, None))) | {"message", "asctime"}
+
+# Loggers configured by uvicorn with their own synchronous handlers
+UVICORN_LOGGERS = ("uvicorn", "uvicorn.error", "uvicorn.access")
+
+
+def truncate(value: str, limit: int) -> str:
+    """Cut value to at most limit characters, noting how much was dropped"""
+    if limit <= 0 or len(value) <= limit:
+        return value
+    return f"{value[:limit]}...(+{len(value) - limit} chars)"
+
+
+class JSONFormatter(logging.Formatter):
+    """Format records as one JSON object per line
+
+    Fields passed with extra= are included as JSON fields, and every string
+    (the message included) is cut to max_field_chars, so a log line stays
+    small whatever ends up in it.
+    """
+
+    def __init__(self, max_field_chars: int = 500):
+        super().__init__()
+        self.max_field_chars = max_field_chars
+
+    def _field(self, value: Any) -> Any:
+        if isinstance(value, str):
+            return truncate(value, self.max_field_chars)
+        if value is None or isinstance(value, (bool, int, float)):
+            return value
+        return truncate(str(value), self.max_field_chars)
+
+    def format(self, record: logging.LogRecord) -> str:
+        entry: Dict[str, Any] = {
+            "ts": datetime.fromtimestamp(record.created, timezone.utc).isoformat(timespec="milliseconds"),
+            "level": record.levelname,
+            "logger": record.name,
+            "msg": truncate(record.getMessage(), self.max_field_chars),
+        }
+        for key, value in record.__dict__.items():
+            if key not in _RECORD_ATTRIBUTES and not key.startswith("_"):
+                entry[key] = self._field(value)
+        if record.exc_info and not record.exc_text:
+            record.exc_text = self.formatException(record.exc_info)
+        if record.exc_text:
+            # Tracebacks are kept whole: they are rare and only useful complete
+            entry["exc"] = record.exc_text
+        return json.dumps(entry, ensure_ascii=False, default=str)
+
+
+class TextFormatter(logging.Formatter):
+    """The classic human-readable format, with messages cut to max_field_chars"""
+
+    def __init__(self, max_field_chars: int = 500):
+        super().__init__("%(asctime)s - %(name)s - %(levelname)s - %(message)s")
+        self.max_field_chars = max_field_chars
+
+    def formatMessage(self, record: logging.LogRecord) -> str:
+        record.message = truncate(record.message, self.max_field_chars)
+        return super().formatMessage(record)
+
+
+class NonBlockingQueueHandler(logging.handlers.QueueHandler):
+    """QueueHandler that never waits: when the queue is full the record is dropped and counted
+
+    The caller only merges the message with its arguments; formatting and
+    writing happen on the listener thread.
+    """
+
+    def __init__(self, log_queue: "queue.Queue[logging.LogRecord]"):
+        super().__init__(log_queue)
+        self.dropped = 0
+
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        record = copy.copy(record)
+        # Arguments may be mutated after the call returns, so render the message now
+        record.msg = record.getMessage()
+        record.args = None
+        if record.exc_info:
+            record.exc_text = logging.Formatter().formatException(record.exc_info)
+            record.exc_info = None
+        return record
+
+    def enqueue(self, record: logging.LogRecord) -> None:
+        try:
+            self.queue.put_nowait(record)
+        except queue.Full:
+            self.dropped += 1
+
+
+class Sampler:
+    """Decide which requests to a set of high-frequency routes are logged
+
+    Requests to other routes are always logged. For sampled routes, one in
+    every 1/rate requests is logged (rate 0 suppresses them entirely), but
+    server errors always are.
+    """
+
+    def __init__(self, routes: Iterable[str], rate: float, seed: Optional[int] = None):
+        self.routes = frozenset(routes)
+        self.rate = rate
+        self._random = random.Random(seed)
+        self.suppressed = 0
+
+    def should_log(self, path: str, status_code: int) -> bool:
+        if path not in self.routes or status_code >= 500:
+            return True
+        if self.rate > 0 and self._random.random() < self.rate:
+            return True
+        self.suppressed += 1
+        return False
+
+
+class BatchWriter:
+    """Background thread that drains the log queue and writes what it finds in one go
+
+    Every record waiting in the queue (up to max_batch) is formatted and
+    written with a single write and flush, so a burst of log lines costs a
+    handful of system calls instead of one per line.
+    """
+
+    _STOP = object()
+
+    def __init__(self, log_queue: "queue.Queue[Any]", stream: Any, formatter: logging.Formatter,
+                 max_batch: int = 512):
+        self.queue = log_queue
+        self.stream = stream
+        self.formatter = formatter
+        self.max_batch = max_batch
+        self.written = 0
+        self._thread = threading.Thread(target=self._run, name="log-writer", daemon=True)
+
+    def start(self) -> None:
+        self._thread.start()
+
+    def stop(self) -> None:
+        """Write everything queued so far and end the thread"""
+        # Not on the request path, so this may wait for a free slot
+        self.queue.put(self._STOP)
+        self._thread.join()
+
+    def _run(self) -> None:
+        while True:
+            batch = [self.queue.get()]
+            while len(batch) < self.max_batch:
+                try:
+                    batch.append(self.queue.get_nowait())
+                except queue.Empty:
+                    break
+            stop = False
+            lines = []
+            for record in batch:
+                if record is self._STOP:
+                    stop = True
+                    continue
+                try:
+                    lines.append(self.formatter.format(record))
+                except Exception:
+                    lines.append(f"Unformattable log record from {record.name}: {record.msg!r}")
+            if lines:
+                try:
+                    self.stream.write("\n".join(lines) + "\n")
+                    self.stream.flush()
+                    self.written += len(lines)
+                except Exception as e:
+                    sys.stderr.write(f"Log write failed: {str(e)}\n")
+            if stop:
+                return
+
+
+class LogPipeline:
+    """Queue-backed logging: records are queued by the caller and written by one background thread"""
+
+    def __init__(self, handler: NonBlockingQueueHandler, writer: BatchWriter):
+        self.handler = handler
+        self.writer = writer
+        self._stopped = False
+
+    @property
+    def dropped(self) -> int:
+        return self.handler.dropped
+
+    @property
+    def pending(self) -> int:
+        return self.handler.queue.qsize()
+
+    def stats(self) -> Dict[str, int]:
+        return {"pending": self.pending, "written": self.writer.written, "dropped": self.dropped}
+
+    def stop(self) -> None:
+        """Write everything still queued and stop the writer thread"""
+        if not self._stopped:
+            self._stopped = True
+            self.writer.stop()
+
+
+def configure_logging(level: str = "INFO", fmt: str = "json", max_field_chars: int = 500,
+                      queue_size: int = 10000, stream: Any = None) -> LogPipeline:
+    """Route all logging through a bounded queue to a single stdout writer thread
+
+    Replaces the root logger's handlers and those uvicorn installs, so every
+    library logs through the same pipeline. uvicorn's access log is turned
+    down to warnings, since the API writes its own access log line.
+    """
+    if fmt not in ("json", "text"):
+        raise ValueError("Log format must be json or text")
+    formatter = JSONFormatter(max_field_chars) if fmt == "json" else TextFormatter(max_field_chars)
+    log_queue: "queue.Queue[logging.LogRecord]" = queue.Queue(maxsize=queue_size)
+    handler = NonBlockingQueueHandler(log_queue)
+    writer = BatchWriter(log_queue, stream or sys.stdout, formatter)
+
+    root = logging.getLogger()
+    for existing in list(root.handlers):
+        root.removeHandler(existing)
+    root.addHandler(handler)
+    root.setLevel(level.upper())
+    for name in UVICORN_LOGGERS:
+        uvicorn_logger = logging.getLogger(name)
+        uvicorn_logger.handlers.clear()
+        uvicorn_logger.propagate = True
+    logging.getLogger("uvicorn.access").setLevel(logging.WARNING)
+
+    writer.start()
+    pipeline = LogPipeline(handler, writer)
+    atexit.register(pipeline.stop)
+    return pipeline
@@ -1,11 +1,11 @@
 import os
 from typing import Optional, List, Dict, Any, Union
-from fastapi import FastAPI, HTTPException, Depends, Request
+from fastapi import FastAPI, HTTPException, Depends, Request, Query
 from fastapi.middleware.cors import CORSMiddleware
-from fastapi.responses import JSONResponse
+from fastapi.responses import JSONResponse, StreamingResponse, PlainTextResponse
+from fastapi import Response
+from starlette.concurrency import run_in_threadpool
 from pydantic import BaseModel, Field, validator
-import httpx
-import google.generativeai as genai
 from dotenv import load_dotenv
 import logging
 import json
@@ -13,35 +13,87 @@ from datetime import datetime
 import uuid
 from pathlib import Path
 import time
+import asyncio
+import base64
+import hashlib
+import math
+from contextlib import asynccontextmanager
+
+from cache import SummaryCache, make_cache_key
+from singleflight import SingleFlight
+from storage import open_history_store, HISTORY_FIELDS
+from writebehind import HistoryWriter
+from retention import RetentionPolicy, compact_history
+from history_io import export_ndjson, import_ndjson
+from logconfig import configure_logging, Sampler
+from chunking import split_into_chunks, split_paragraphs
+from preprocess import preprocess_content, estimate_tokens
+from streaming import SummaryStreamParser, format_sse
+from response_parser import parse_summary_json, ResponseParseError
+from metrics import Registry, StageTimer, format_server_timing
+from admission import AdmissionController, AdmissionRejected, ClientRateLimiter
+from feedback import FeedbackStore
+from gemini_client import GeminiClient, INIT_MODES
+from similarity import content_fingerprint
+from revisions import paragraph_hashes, diff_paragraphs
 
 # Load environment variables
 load_dotenv()
 
-# Configure logging
-logging.basicConfig(
-    level=logging.INFO,
-    format="%(asctime)s - %(name)s - %(levelname)s - %(message)s",
-)
+# Configure logging: records are queued on the request path and written to stdout by a background
+# thread, as JSON lines (LOG_FORMAT=json) or the classic text format (text). Strings in a log line
+# are cut to LOG_MAX_FIELD_CHARS, and records are dropped rather than waited on if LOG_QUEUE_SIZE are queued
+LOG_LEVEL = os.getenv("LOG_LEVEL", "INFO")
+LOG_FORMAT = os.getenv("LOG_FORMAT", "json")
+LOG_MAX_FIELD_CHARS = int(os.getenv("LOG_MAX_FIELD_CHARS", "300"))
+LOG_QUEUE_SIZE = int(os.getenv("LOG_QUEUE_SIZE", "10000"))
+# Only this share of requests to the high-frequency LOG_SAMPLED_ROUTES get an access log line (0 logs none);
+# server errors are always logged
+LOG_SAMPLED_ROUTES = [r.strip() for r in os.getenv("LOG_SAMPLED_ROUTES", "/,/api/status,/metrics").split(",") if r.strip()]
+LOG_SAMPLE_RATE = float(os.getenv("LOG_SAMPLE_RATE", "0.01"))
+log_pipeline = configure_logging(LOG_LEVEL, LOG_FORMAT, LOG_MAX_FIELD_CHARS, LOG_QUEUE_SIZE)
+access_log_sampler = Sampler(LOG_SAMPLED_ROUTES, LOG_SAMPLE_RATE)
 logger = logging.getLogger(__name__)
+access_logger = logging.getLogger("summarizer.access")
 
 # Configure file paths
 BASE_DIR = Path(__file__).resolve().parent.parent
-DATA_DIR = BASE_DIR / "api" / "data"
-SUMMARIES_FILE = DATA_DIR / "summaries.json"
+DATA_DIR = Path(os.getenv("SUMMARIZER_DATA_DIR", BASE_DIR / "api" / "data"))
+HISTORY_BACKEND = os.getenv("HISTORY_BACKEND", "sqlite")
+# always: fsync every commit; interval: fsync at most every HISTORY_FSYNC_INTERVAL_MS; never: leave it to the OS
+HISTORY_DURABILITY = os.getenv("HISTORY_DURABILITY", "interval")
+HISTORY_FSYNC_INTERVAL_MS = int(os.getenv("HISTORY_FSYNC_INTERVAL_MS", "1000"))
+# Store summary bodies zlib-compressed (sqlite backend only)
+HISTORY_COMPRESS = os.getenv("HISTORY_COMPRESS", "true").lower() == "true"
+# Retention: keep at most HISTORY_MAX_ENTRIES summaries, none older than HISTORY_MAX_AGE_DAYS
+# (0 disables either) and, with HISTORY_LATEST_PER_URL, only the newest per page and length.
+# Applied every HISTORY_COMPACTION_INTERVAL_SECONDS (0 disables), which also compacts storage
+HISTORY_MAX_ENTRIES = int(os.getenv("HISTORY_MAX_ENTRIES", "0"))
+HISTORY_MAX_AGE_DAYS = float(os.getenv("HISTORY_MAX_AGE_DAYS", "0"))
+HISTORY_LATEST_PER_URL = os.getenv("HISTORY_LATEST_PER_URL", "false").lower() == "true"
+HISTORY_COMPACTION_INTERVAL_SECONDS = float(os.getenv("HISTORY_COMPACTION_INTERVAL_SECONDS", "3600"))
+# Let compaction rebuild summaries.db with VACUUM, which blocks saves from every worker while it runs
+HISTORY_VACUUM = os.getenv("HISTORY_VACUUM", "false").lower() == "true"
+# Records inserted per transaction by POST /api/history/import
+HISTORY_IMPORT_BATCH_SIZE = int(os.getenv("HISTORY_IMPORT_BATCH_SIZE", "1000"))
 
-print(f"[API] Base directory: {BASE_DIR}")
-print(f"[API] Data directory: {DATA_DIR}")
-print(f"[API] Summaries file: {SUMMARIES_FILE}")
+logger.info(f"Starting with data directory {DATA_DIR}",
+            extra={"base_dir": str(BASE_DIR), "data_dir": str(DATA_DIR), "history_backend": HISTORY_BACKEND})
 
 # Ensure data directory exists
 DATA_DIR.mkdir(parents=True, exist_ok=True)
 
-# Initialize summaries file if it doesn't exist
-if not SUMMARIES_FILE.exists():
-    with open(SUMMARIES_FILE, 'w') as f:
-        json.dump([], f)
-    logger.info(f"Created new summaries.json file at {SUMMARIES_FILE}")
-    print(f"[API] Created new summaries file at {SUMMARIES_FILE}")
+# Open the summary history store (migrates a legacy summaries.json on first run)
+history_store = open_history_store(HISTORY_BACKEND, DATA_DIR, HISTORY_DURABILITY, HISTORY_COMPRESS)
+retention_policy = RetentionPolicy(HISTORY_MAX_ENTRIES, HISTORY_MAX_AGE_DAYS, HISTORY_LATEST_PER_URL)
+# Report of the most recent compaction, shown in /api/status
+last_compaction: Optional[Dict[str, Any]] = None
+
+# New summaries are saved off the request path, many per commit
+history_writer = HistoryWriter(
+    history_store,
+    sync_interval=HISTORY_FSYNC_INTERVAL_MS / 1000 if HISTORY_DURABILITY == "interval" else None,
+)
 
 # Configure Gemini API
 GEMINI_API_KEY = os.getenv("GEMINI_API_KEY")
@@ -49,10 +101,9 @@ if not GEMINI_API_KEY:
     logger.warning("GEMINI_API_KEY not found in environment variables")
     raise ValueError("GEMINI_API_KEY environment variable is required")
 
-# Configure the Gemini API with the correct version
-genai.configure(api_key=GEMINI_API_KEY)
-
 # Set the model configuration
+GEMINI_MODEL_NAME = 'gemini-2.0-flash'
+
 generation_config = {
     "temperature": 0.7,
     "top_p": 0.8,
@@ -60,6 +111,14 @@ generation_config = {
     "max_output_tokens": 2048,
 }
 
+# Ask Gemini for JSON output directly instead of relying on the prompt alone
+GEMINI_JSON_MODE = os.getenv("GEMINI_JSON_MODE", "false").lower() == "true"
+if GEMINI_JSON_MODE:
+    generation_config["response_mime_type"] = "application/json"
+
+# How many times to call the model again when its output cannot be parsed at all
+GEMINI_PARSE_RETRIES = int(os.getenv("GEMINI_PARSE_RETRIES", "1"))
+
 safety_settings = [
     {
         "category": "HARM_CATEGORY_HARASSMENT",
@@ -79,6 +138,231 @@ safety_settings = [
     },
 ]
 
+# When the Gemini SDK is imported and the model built: lazy (first summary), background
+# (right after startup, while the API already answers) or eager (at import)
+GEMINI_INIT = os.getenv("GEMINI_INIT", "background")
+if GEMINI_INIT not in INIT_MODES:
+    raise ValueError(f"GEMINI_INIT must be one of {', '.join(INIT_MODES)}")
+
+# One model shared by all requests instead of a new one per call
+gemini_client = GeminiClient(GEMINI_API_KEY, GEMINI_MODEL_NAME, generation_config, safety_settings)
+if GEMINI_INIT == "eager":
+    gemini_client.load()
+
+# Configure the server-side summary cache
+SUMMARY_CACHE_MAX_ENTRIES = int(os.getenv("SUMMARY_CACHE_MAX_ENTRIES", "1000"))
+SUMMARY_CACHE_TTL_SECONDS = float(os.getenv("SUMMARY_CACHE_TTL_SECONDS", "86400"))
+SUMMARY_CACHE_DISK = os.getenv("SUMMARY_CACHE_DISK", "false").lower() == "true"
+SUMMARY_CACHE_DIR = DATA_DIR / "cache"
+# The disk tier is swept for expired and least recently used entries beyond the limit (0: no limit)
+SUMMARY_CACHE_DISK_MAX_ENTRIES = int(os.getenv("SUMMARY_CACHE_DISK_MAX_ENTRIES", "10000"))
+SUMMARY_CACHE_SWEEP_INTERVAL_SECONDS = float(os.getenv("SUMMARY_CACHE_SWEEP_INTERVAL_SECONDS", "3600"))
+
+summary_cache = SummaryCache(
+    max_entries=SUMMARY_CACHE_MAX_ENTRIES,
+    ttl_seconds=SUMMARY_CACHE_TTL_SECONDS,
+    disk_dir=SUMMARY_CACHE_DIR if SUMMARY_CACHE_DISK else None,
+    disk_max_entries=SUMMARY_CACHE_DISK_MAX_ENTRIES,
+)
+
+# Concurrent identical summarize requests share one Gemini call
+summary_flights = SingleFlight()
+
+# On a cache miss, reuse the saved summary of a near-identical page of the same length
+# (estimated Jaccard similarity of word 3-grams at least this high) instead of calling Gemini;
+# 0 disables. Needs the sqlite history backend
+NEAR_DUPLICATE_THRESHOLD = float(os.getenv("NEAR_DUPLICATE_THRESHOLD", "0.8"))
+NEAR_DUPLICATE_ENABLED = NEAR_DUPLICATE_THRESHOLD > 0 and history_store.supports_similarity
+
+# Revisits of a page (same URL and length) are diffed paragraph by paragraph against the last saved
+# version: if nothing changed its summary is reused, and if at most REVISION_MAX_CHANGED_RATIO of the
+# content changed, only the changed paragraphs and the previous summary are sent to update it
+INCREMENTAL_UPDATES = os.getenv("INCREMENTAL_UPDATES", "true").lower() == "true"
+REVISION_MAX_CHANGED_RATIO = float(os.getenv("REVISION_MAX_CHANGED_RATIO", "0.3"))
+
+# Upper bound on Gemini calls running at the same time in this worker
+GEMINI_MAX_CONCURRENCY = int(os.getenv("GEMINI_MAX_CONCURRENCY", "16"))
+gemini_semaphore = asyncio.Semaphore(GEMINI_MAX_CONCURRENCY)
+
+# Admission control for summaries that need the model: at most SUMMARIZE_MAX_ACTIVE run at once,
+# up to SUMMARIZE_MAX_QUEUE wait (for at most SUMMARIZE_QUEUE_TIMEOUT_SECONDS), the rest get a 429
+SUMMARIZE_MAX_ACTIVE = int(os.getenv("SUMMARIZE_MAX_ACTIVE", str(GEMINI_MAX_CONCURRENCY)))
+SUMMARIZE_MAX_QUEUE = int(os.getenv("SUMMARIZE_MAX_QUEUE", "64"))
+SUMMARIZE_QUEUE_TIMEOUT_SECONDS = float(os.getenv("SUMMARIZE_QUEUE_TIMEOUT_SECONDS", "30"))
+summarize_admission = AdmissionController(
+    max_active=SUMMARIZE_MAX_ACTIVE,
+    max_queue=SUMMARIZE_MAX_QUEUE,
+    queue_timeout=SUMMARIZE_QUEUE_TIMEOUT_SECONDS,
+)
+
+# Per-client token bucket for summarize requests (0 disables rate limiting). Clients are
+# identified by address, and X-Client-Id only splits an address between several clients
+# (users behind one NAT), up to RATE_LIMIT_CLIENTS_PER_ADDRESS times the per-client limit
+RATE_LIMIT_PER_MINUTE = float(os.getenv("RATE_LIMIT_PER_MINUTE", "60"))
+RATE_LIMIT_BURST = int(os.getenv("RATE_LIMIT_BURST", "20"))
+RATE_LIMIT_CLIENTS_PER_ADDRESS = int(os.getenv("RATE_LIMIT_CLIENTS_PER_ADDRESS", "4"))
+# Header a trusted reverse proxy sets to the client address (e.g. X-Forwarded-For); only set
+# this behind such a proxy, since clients can send any header themselves
+RATE_LIMIT_ADDRESS_HEADER = os.getenv("RATE_LIMIT_ADDRESS_HEADER", "").strip().lower()
+client_rate_limiter = ClientRateLimiter(RATE_LIMIT_PER_MINUTE, RATE_LIMIT_BURST)
+address_rate_limiter = ClientRateLimiter(RATE_LIMIT_PER_MINUTE * RATE_LIMIT_CLIENTS_PER_ADDRESS,
+                                         RATE_LIMIT_BURST * RATE_LIMIT_CLIENTS_PER_ADDRESS)
+
+# Content longer than this is summarized in chunks (map) and then merged (reduce)
+MAP_REDUCE_THRESHOLD_CHARS = int(os.getenv("MAP_REDUCE_THRESHOLD_CHARS", "20000"))
+MAP_REDUCE_CHUNK_CHARS = int(os.getenv("MAP_REDUCE_CHUNK_CHARS", "8000"))
+MAP_REDUCE_MAX_PARALLEL = int(os.getenv("MAP_REDUCE_MAX_PARALLEL", "4"))
+
+# Estimated-token budget for page content sent to the model in a single call, per summary length.
+# Content longer than MAP_REDUCE_THRESHOLD_CHARS after cleanup is summarized in chunks and never trimmed
+PREPROCESS_TOKEN_BUDGETS = {
+    "short": int(os.getenv("PREPROCESS_TOKEN_BUDGET_SHORT", "8000")),
+    "medium": int(os.getenv("PREPROCESS_TOKEN_BUDGET_MEDIUM", "16000")),
+    "long": int(os.getenv("PREPROCESS_TOKEN_BUDGET_LONG", "25000")),
+}
+
+# Also generate the other summary lengths on a cache miss, so switching length later is served
+# from the cache: off, combined (one model call returns all three lengths) or derive (the long
+# summary, then one follow-up call that shortens it without resending the page content)
+MULTI_LENGTH_MODE = os.getenv("MULTI_LENGTH_MODE", "off")
+if MULTI_LENGTH_MODE not in ("off", "combined", "derive"):
+    raise ValueError("MULTI_LENGTH_MODE must be one of off, combined, derive")
+
+# Batch summarization limits
+BATCH_MAX_ITEMS = int(os.getenv("BATCH_MAX_ITEMS", "500"))
+BATCH_DEFAULT_CONCURRENCY = int(os.getenv("BATCH_DEFAULT_CONCURRENCY", "4"))
+BATCH_MAX_CONCURRENCY = int(os.getenv("BATCH_MAX_CONCURRENCY", "16"))
+
+# Feedback is appended to DATA_DIR/feedback.jsonl in batches of up to FEEDBACK_MAX_BUFFER entries,
+# and at least every FEEDBACK_FLUSH_INTERVAL_SECONDS
+FEEDBACK_MAX_BUFFER = int(os.getenv("FEEDBACK_MAX_BUFFER", "100"))
+FEEDBACK_FLUSH_INTERVAL_SECONDS = float(os.getenv("FEEDBACK_FLUSH_INTERVAL_SECONDS", "5"))
+# Per-URL rating aggregates held in memory; pages rated less recently are recounted from the log when queried
+FEEDBACK_MAX_URLS = int(os.getenv("FEEDBACK_MAX_URLS", "10000"))
+feedback_store = FeedbackStore(
+    DATA_DIR / "feedback.jsonl", max_buffer=FEEDBACK_MAX_BUFFER, max_urls=FEEDBACK_MAX_URLS
+)
+
+# Key point returned when the model output could not be parsed; such summaries are never cached
+FALLBACK_KEY_POINT = "Unable to extract structured data from the response"
+
+# Add a Server-Timing header with per-stage durations to summarize responses
+SERVER_TIMING_HEADER = os.getenv("SERVER_TIMING_HEADER", "true").lower() == "true"
+
+# Metrics exposed on /metrics in the Prometheus text format
+metrics_registry = Registry()
+STAGE_SECONDS = metrics_registry.histogram(
+    "summarizer_stage_seconds", "Time spent in each request stage", ["stage"]
+)
+CACHE_LOOKUPS = metrics_registry.counter(
+    "summarizer_cache_lookups_total", "Summary cache lookups by result (hit, near, revision, shared, miss)", ["result"]
+)
+NEAR_DUPLICATE_LOOKUPS = metrics_registry.counter(
+    "summarizer_near_duplicate_lookups_total", "Near-duplicate lookups after a cache miss by result (reused, miss)",
+    ["result"]
+)
+NEAR_DUPLICATE_SIMILARITY = metrics_registry.histogram(
+    "summarizer_near_duplicate_similarity", "Similarity of near-duplicate pages whose summary was reused",
+    buckets=(0.5, 0.6, 0.7, 0.8, 0.85, 0.9, 0.95, 0.99, 1.0)
+)
+REVISION_LOOKUPS = metrics_registry.counter(
+    "summarizer_revision_lookups_total",
+    "Comparisons with the last saved version of a page by result (new, unchanged, updated, changed)", ["result"]
+)
+REVISION_PROMPT_TOKENS = metrics_registry.counter(
+    "summarizer_revision_prompt_tokens_total",
+    "Estimated prompt tokens for revisited pages: sent, and saved by not resending the whole page", ["kind"]
+)
+MODEL_CALLS = metrics_registry.counter("summarizer_model_calls_total", "Gemini API calls")
+MODEL_ERRORS = metrics_registry.counter("summarizer_model_errors_total", "Failed Gemini API calls")
+PARSE_REPAIRS = metrics_registry.counter(
+    "summarizer_parse_repairs_total", "Repairs applied to model output while parsing JSON", ["repair"]
+)
+FALLBACK_SUMMARIES = metrics_registry.counter(
+    "summarizer_fallback_summaries_total", "Summaries built from unparseable model output"
+)
+HTTP_REQUESTS = metrics_registry.counter(
+    "summarizer_http_requests_total", "HTTP requests by method, route and status", ["method", "path", "status"]
+)
+IN_FLIGHT_REQUESTS = metrics_registry.gauge("summarizer_in_flight_requests", "HTTP requests being processed")
+# History gauges query the store, so they are read on a worker thread before each render
+metrics_registry.gauge("summarizer_history_size", "Summaries stored in history",
+                       callback=lambda: history_store.count(), blocking=True)
+metrics_registry.gauge("summarizer_history_disk_bytes", "Bytes used on disk by the history store",
+                       callback=lambda: history_store.disk_usage(), blocking=True)
+metrics_registry.gauge("summarizer_cache_entries", "Summaries held in the in-memory cache",
+                       callback=lambda: summary_cache.stats()["entries"])
+metrics_registry.gauge("summarizer_model_calls_in_flight", "Distinct summaries being generated",
+                       callback=lambda: summary_flights.in_flight())
+metrics_registry.gauge("summarizer_history_write_queue", "Summaries waiting to be written to history",
+                       callback=lambda: history_writer.pending)
+metrics_registry.gauge("summarizer_admission_active", "Summaries holding an admission slot",
+                       callback=lambda: summarize_admission.active)
+metrics_registry.gauge("summarizer_admission_queue_depth", "Summaries waiting for an admission slot",
+                       callback=lambda: summarize_admission.queued)
+ADMISSION_REJECTIONS = metrics_registry.counter(
+    "summarizer_admission_rejections_total",
+    "Summarize requests rejected with 429 by reason (rate_limited, queue_full, queue_timeout)", ["reason"]
+)
+
+def timed(stage: str, timings: Optional[Dict[str, float]] = None) -> StageTimer:
+    """Time a block into the stage histogram and, if given, the per-request timings"""
+    return StageTimer(STAGE_SECONDS, stage, timings)
+
+def too_many_requests(reason: str, retry_after: int) -> HTTPException:
+    """429 response for a request turned away by rate limiting or admission control"""
+    ADMISSION_REJECTIONS.inc(reason)
+    return HTTPException(
+        status_code=429,
+        detail=f"Server is busy ({reason.replace('_', ' ')}), retry after {retry_after} seconds",
+        headers={"Retry-After": str(retry_after)}
+    )
+
+def client_address(request: Request) -> str:
+    """Address of the client: the peer, or the address a trusted proxy put in RATE_LIMIT_ADDRESS_HEADER"""
+    if RATE_LIMIT_ADDRESS_HEADER:
+        forwarded = request.headers.get(RATE_LIMIT_ADDRESS_HEADER, "")
+        # Proxies append to X-Forwarded-For, so the last entry is the one our proxy added
+        address = forwarded.split(",")[-1].strip()
+        if address:
+            return address
+    return request.client.host if request.client else "unknown"
+
+def check_rate_limit(request: Request, cost: float = 1) -> None:
+    """Charge cost tokens to the client's bucket and to its address's, raising a 429 if either is empty"""
+    address = client_address(request)
+    client_id = f"{address}|{request.headers.get('x-client-id', '')}"
+    # Check both buckets before charging either, so a request rejected by one costs nothing from the other
+    client_wait = client_rate_limiter.wait_time(client_id, cost)
+    address_wait = address_rate_limiter.wait_time(address, cost)
+    if client_wait > 0 or address_wait > 0:
+        if client_wait > 0:
+            client_rate_limiter.rejected += 1
+        else:
+            address_rate_limiter.rejected += 1
+        logger.warning(f"Rate limit exceeded for client {client_id}")
+        raise too_many_requests("rate_limited", math.ceil(max(client_wait, address_wait)))
+    client_rate_limiter.take(client_id, cost)
+    address_rate_limiter.take(address, cost)
+
+def enforce_rate_limit(request: Request) -> None:
+    """Dependency applying the per-client token bucket to summarize endpoints"""
+    check_rate_limit(request)
+
+@asynccontextmanager
+async def admitted(request_id: str, timings: Optional[Dict[str, float]] = None):
+    """Hold a summarize admission slot, raising a 429 if the wait queue is full or times out"""
+    try:
+        with timed("admission_wait", timings):
+            granted_at = await summarize_admission.acquire()
+    except AdmissionRejected as e:
+        logger.warning(f"[{request_id}] Rejected by admission control: {e.reason}")
+        raise too_many_requests(e.reason, e.retry_after)
+    try:
+        yield
+    finally:
+        summarize_admission.release(granted_at)
+
 logger.info("Starting Universal Summarizer API with Gemini API configuration")
 
 # Initialize FastAPI app
@@ -102,6 +386,8 @@ class SummaryResponse(BaseModel):
     title: Optional[str] = None
     main: str
     keyPoints: Optional[List[str]] = None
+    # Every generated length ({"short": {...}, "medium": {...}, "long": {...}}) when MULTI_LENGTH_MODE is on
+    variants: Optional[Dict[str, Dict[str, Any]]] = None
 
 class SavedSummary(BaseModel):
     id: str
@@ -141,22 +427,50 @@ class SummarizeRequest(BaseModel):
             raise ValueError('URL is too long')
         return v
 
+class BatchSummarizeRequest(BaseModel):
+    # Items are validated one by one so a bad item fails on its own instead of rejecting the batch
+    items: List[Dict[str, Any]]
+    concurrency: Optional[int] = Field(default=None, description="Maximum number of items processed at once")
+
+    @validator('items')
+    def validate_items(cls, v):
+        if not v:
+            raise ValueError('Batch must contain at least one item')
+        if len(v) > BATCH_MAX_ITEMS:
+            raise ValueError(f'Batch is too large (maximum {BATCH_MAX_ITEMS} items)')
+        return v
+
+    @validator('concurrency')
+    def validate_concurrency(cls, v):
+        if v is not None and not 1 <= v <= BATCH_MAX_CONCURRENCY:
+            raise ValueError(f'Concurrency must be between 1 and {BATCH_MAX_CONCURRENCY}')
+        return v
+
 class FeedbackRequest(BaseModel):
     url: str
     rating: int = Field(ge=1, le=5, description="Rating from 1 to 5")
     comment: Optional[str] = None
+    length: Optional[str] = Field(default=None, description="Length of the rated summary: short, medium, or long")
+    summary_id: Optional[str] = Field(default=None, description="History ID of the rated summary")
+
+    @validator('length')
+    def validate_length(cls, v):
+        if v is not None and v not in ['short', 'medium', 'long']:
+            raise ValueError('Length must be one of: short, medium, long')
+        return v
 
 # Helper functions
+SUMMARY_MIN_LENGTHS = {
+    "short": "100 words",
+    "medium": "200 words",
+    "long": "600 words",
+}
+
 def generate_summary_prompt(title: Optional[str], content: str, length: str, is_selection: bool) -> str:
     """Generate prompt for Gemini API based on content and parameters"""
     
     # Determine minimum length based on summary type
-    if length == "short":
-        min_length = "100 words"
-    elif length == "medium":
-        min_length = "200 words"
-    else:  # long
-        min_length = "600 words"
+    min_length = SUMMARY_MIN_LENGTHS[length]
         
     # Build the prompt
     prompt = f"""Provide a detailed summary of the following {"selected text" if is_selection else "web content"}:
@@ -182,164 +496,661 @@ Instructions:
 8. Ensure the JSON is properly formatted and valid.
 """
     
-    logger.info(f"Generated prompt for {length} summary")
+    logger.debug(f"Generated prompt for {length} summary")
+    return prompt
+
+def generate_chunk_prompt(title: Optional[str], chunk: str, index: int, total: int, is_selection: bool) -> str:
+    """Generate the map-stage prompt for one section of a long document"""
+    prompt = f"""The following is section {index + 1} of {total} of a longer {"selected text" if is_selection else "web page"}.
+
+Title: {title or "Unknown"}
+
+Section content:
+{chunk}
+
+Instructions:
+1. Summarize this section factually, keeping specific details, names, numbers and examples.
+2. Extract up to 5 key points from this section.
+3. Format the output as JSON with the following structure:
+   {{
+     "main": "Summary of this section",
+     "keyPoints": ["Key point 1", "Key point 2", ...]
+   }}
+4. Do not include any markdown formatting in the output.
+5. Ensure the JSON is properly formatted and valid.
+"""
+    return prompt
+
+def format_section_summaries(partials: List[Dict[str, Any]]) -> str:
+    """Lay out map-stage summaries in document order for a reduce prompt"""
+    sections = []
+    for i, partial in enumerate(partials):
+        key_points = "\n".join(f"- {point}" for point in partial.get("keyPoints") or [] if point != FALLBACK_KEY_POINT)
+        sections.append(f"Section {i + 1} summary:\n{partial.get('main', '')}\nSection {i + 1} key points:\n{key_points}")
+    return "\n\n".join(sections)
+
+def generate_reduce_prompt(title: Optional[str], partials: List[Dict[str, Any]], length: str, is_selection: bool) -> str:
+    """Generate the reduce-stage prompt that merges section summaries into one summary"""
+    joined_sections = format_section_summaries(partials)
+    
+    prompt = f"""The following are summaries of consecutive sections of a long {"selected text" if is_selection else "web page"}.
+    
+Title: {title or "Unknown"}
+
+{joined_sections}
+
+Instructions:
+1. Merge the section summaries into one comprehensive summary with a minimum length of {SUMMARY_MIN_LENGTHS[length]}.
+2. Cover the content from start to end in order, without repeating information shared between sections.
+3. Select the 3-5 most important key points across all sections, merging duplicates.
+4. Format the output as JSON with the following structure:
+   {{
+     "title": "Brief title or main topic",
+     "main": "The detailed summary text",
+     "keyPoints": ["Key point 1", "Key point 2", "Key point 3", ...]
+   }}
+5. Ensure the summary is factual and based solely on the provided section summaries.
+6. Do not include any markdown formatting in the output.
+7. Ensure the JSON is properly formatted and valid.
+"""
     return prompt
 
+def generate_multi_length_prompt(title: Optional[str], content: str, is_selection: bool,
+                                 from_sections: bool = False) -> str:
+    """Generate a prompt asking for short, medium and long summaries of the same content at once
+    
+    With from_sections, content is the formatted map-stage summaries of a long document.
+    """
+    source = "selected text" if is_selection else "web content"
+    if from_sections:
+        intro = f"The following are summaries of consecutive sections of a long {source}."
+    else:
+        intro = f"Summarize the following {source} at three different lengths."
+    
+    prompt = f"""{intro}
+    
+Title: {title or "Unknown"}
+
+Content:
+{content}
+
+Instructions:
+1. Write three independent summaries of the whole content: "short" with a minimum length of {SUMMARY_MIN_LENGTHS['short']}, "medium" with a minimum length of {SUMMARY_MIN_LENGTHS['medium']} and "long" with a minimum length of {SUMMARY_MIN_LENGTHS['long']}.
+2. Each summary should cover the content from start to end; longer summaries add detail, examples and explanation.
+3. Give each summary its own 3-5 key points.
+4. Format the output as JSON with the following structure:
+   {{
+     "short": {{"title": "Brief title or main topic", "main": "The summary text", "keyPoints": ["Key point 1", ...]}},
+     "medium": {{"title": "Brief title or main topic", "main": "The summary text", "keyPoints": ["Key point 1", ...]}},
+     "long": {{"title": "Brief title or main topic", "main": "The summary text", "keyPoints": ["Key point 1", ...]}}
+   }}
+5. Ensure the summaries are factual and based solely on the provided content.
+6. Do not include any markdown formatting in the output.
+7. Ensure the JSON is properly formatted and valid.
+"""
+    logger.debug("Generated prompt for all summary lengths")
+    return prompt
+
+def generate_derive_prompt(title: Optional[str], long_summary: Dict[str, Any]) -> str:
+    """Generate a follow-up prompt that shortens a long summary into the short and medium ones"""
+    key_points = "\n".join(f"- {point}" for point in long_summary.get("keyPoints") or [])
+    prompt = f"""The following is a detailed summary of a web page.
+
+Title: {long_summary.get("title") or title or "Unknown"}
+
+Summary:
+{long_summary.get("main", "")}
+
+Key points:
+{key_points}
+
+Instructions:
+1. Condense it into a "short" summary with a minimum length of {SUMMARY_MIN_LENGTHS['short']} and a "medium" summary with a minimum length of {SUMMARY_MIN_LENGTHS['medium']}.
+2. Keep the most important facts; do not add anything that is not in the detailed summary.
+3. Give each summary its own 3-5 key points.
+4. Format the output as JSON with the following structure:
+   {{
+     "short": {{"title": "Brief title or main topic", "main": "The summary text", "keyPoints": ["Key point 1", ...]}},
+     "medium": {{"title": "Brief title or main topic", "main": "The summary text", "keyPoints": ["Key point 1", ...]}}
+   }}
+5. Do not include any markdown formatting in the output.
+6. Ensure the JSON is properly formatted and valid.
+"""
+    return prompt
+
+def format_revision_changes(changes: List[Dict[str, Any]]) -> str:
+    """Lay out changed paragraphs for an update prompt, with the unchanged text around each"""
+    sections = []
+    for i, change in enumerate(changes):
+        lines = [f"Change {i + 1}:"]
+        if change["before"]:
+            lines.append(f"Preceded by: ...{change['before']}")
+        if change["text"] and change["removed"]:
+            lines.append(f"New text, replacing {change['removed']} earlier paragraph(s):\n{change['text']}")
+        elif change["text"]:
+            lines.append(f"New text:\n{change['text']}")
+        else:
+            lines.append(f"{change['removed']} paragraph(s) removed")
+        if change["after"]:
+            lines.append(f"Followed by: {change['after']}...")
+        sections.append("\n".join(lines))
+    return "\n\n".join(sections)
+
+def generate_update_prompt(title: Optional[str], previous_summary: Dict[str, Any], changes: List[Dict[str, Any]],
+                           length: str, is_selection: bool) -> str:
+    """Generate a prompt that revises the summary of an earlier version of a page, given only what changed"""
+    key_points = "\n".join(f"- {point}" for point in previous_summary.get("keyPoints") or [])
+    prompt = f"""The following is a summary of an earlier version of a {"selected text" if is_selection else "web page"}, followed by the parts of the page that have changed since. The rest of the page is unchanged.
+
+Title: {title or "Unknown"}
+
+Previous summary:
+{previous_summary.get("main", "")}
+
+Previous key points:
+{key_points}
+
+Changes:
+{format_revision_changes(changes)}
+
+Instructions:
+1. Update the summary so it describes the current version of the page, with a minimum length of {SUMMARY_MIN_LENGTHS[length]}.
+2. Add the information in new text, and drop details of the previous summary that came from replaced or removed paragraphs.
+3. Keep the rest of the previous summary as it is, since that part of the page has not changed.
+4. Update the 3-5 key points the same way.
+5. Format the output as JSON with the following structure:
+   {{
+     "title": "Brief title or main topic",
+     "main": "The detailed summary text",
+     "keyPoints": ["Key point 1", "Key point 2", "Key point 3", ...]
+   }}
+6. Ensure the summary is factual and based solely on the previous summary and the changes.
+7. Do not include any markdown formatting in the output.
+8. Ensure the JSON is properly formatted and valid.
+"""
+    logger.debug(f"Generated update prompt for {len(changes)} changes")
+    return prompt
+
+def fallback_summary(response_text: str) -> Dict[str, Any]:
+    """Summary used when the model output cannot be parsed at all"""
+    return {
+        "title": "Summary",
+        "main": response_text[:500],  # Limit to first 500 chars as fallback
+        "keyPoints": [FALLBACK_KEY_POINT]
+    }
+
+def parse_summary_response(response_text: str) -> Dict[str, Any]:
+    """Extract the summary JSON from raw model output, falling back to the first 500 characters"""
+    try:
+        summary_data, repairs = parse_summary_json(response_text)
+    except ResponseParseError as e:
+        # The response itself is only logged in part: it can be as long as the whole summary
+        logger.error(f"Failed to parse JSON response, using fallback summary format: {str(e)}",
+                     extra={"response_chars": len(response_text), "response_head": response_text[:200]})
+        FALLBACK_SUMMARIES.inc()
+        return fallback_summary(response_text)
+    
+    if repairs:
+        logger.info(f"Parsed JSON response after repairs: {', '.join(repairs)}")
+        for repair in repairs:
+            PARSE_REPAIRS.inc(repair)
+    else:
+        logger.debug("Successfully parsed JSON response")
+    return summary_data
+
 async def call_gemini_api(prompt: str) -> Dict[str, Any]:
     """Call Gemini API to generate the summary"""
     try:
-        model = genai.GenerativeModel(
-            model_name='gemini-2.0-flash',
-            generation_config=generation_config,
-            safety_settings=safety_settings
-        )
-        
-        logger.info("Calling Gemini API with prompt")
-        response = model.generate_content(prompt)
-        
-        if not response or not response.text:
-            logger.error("Empty response from Gemini API")
-            raise HTTPException(status_code=500, detail="Empty response from Gemini API")
+        model = await gemini_client.get_model()
         
-        # Extract JSON from response
-        response_text = response.text
-        logger.info("Received response from Gemini API")
-        
-        # Check if the response contains a JSON structure
-        if '{' in response_text and '}' in response_text:
-            # Try to clean up the response if it's not pure JSON
-            import json
-            import re
+        for attempt in range(GEMINI_PARSE_RETRIES + 1):
+            logger.debug("Calling Gemini API with prompt")
+            MODEL_CALLS.inc()
+            async with gemini_semaphore:
+                with timed("gemini"):
+                    response = await model.generate_content_async(prompt)
             
-            # Extract content between first { and last }
-            json_match = re.search(r'({.*})', response_text, re.DOTALL)
-            if json_match:
-                json_str = json_match.group(1)
-                try:
-                    summary_data = json.loads(json_str)
-                    logger.info("Successfully parsed JSON response")
-                    return summary_data
-                except json.JSONDecodeError:
-                    logger.warning("Failed to parse JSON directly, attempting to fix common issues")
-                    # If direct parsing fails, try to fix common issues
-                    json_str = json_str.replace("'", '"')  # Replace single quotes with double quotes
-                    try:
-                        summary_data = json.loads(json_str)
-                        logger.info("Successfully parsed JSON after fixing quotes")
-                        return summary_data
-                    except json.JSONDecodeError as e:
-                        logger.error(f"Failed to parse JSON after fixes: {str(e)}")
-                        logger.error(f"Problematic JSON string: {json_str}")
+            if not response or not response.text:
+                logger.error("Empty response from Gemini API")
+                raise HTTPException(status_code=500, detail="Empty response from Gemini API")
             
-        # Fallback if JSON parsing fails
-        logger.warning("Using fallback summary format")
-        return {
-            "title": "Summary",
-            "main": response_text[:500],  # Limit to first 500 chars as fallback
-            "keyPoints": ["Unable to extract structured data from the response"]
-        }
-        
+            logger.debug("Received response from Gemini API")
+            try:
+                with timed("parse"):
+                    summary_data, repairs = parse_summary_json(response.text)
+            except ResponseParseError as e:
+                # Only unrecoverable output is worth paying for another model call
+                if attempt < GEMINI_PARSE_RETRIES:
+                    logger.warning(f"Unparseable response from Gemini API, retrying: {str(e)}")
+                    continue
+                return parse_summary_response(response.text)
+            
+            if repairs:
+                logger.info(f"Parsed JSON response after repairs: {', '.join(repairs)}")
+                for repair in repairs:
+                    PARSE_REPAIRS.inc(repair)
+            return summary_data
+    except HTTPException:
+        MODEL_ERRORS.inc()
+        raise
     except Exception as e:
+        MODEL_ERRORS.inc()
         logger.error(f"Error calling Gemini API: {str(e)}")
         raise HTTPException(status_code=500, detail=f"Error calling Gemini API: {str(e)}")
 
-def load_summaries() -> List[Dict[str, Any]]:
-    """Load saved summaries from the JSON file"""
-    try:
-        if not SUMMARIES_FILE.exists():
-            logger.info(f"Summaries file does not exist at {SUMMARIES_FILE}, creating new file")
-            with open(SUMMARIES_FILE, 'w') as f:
-                json.dump([], f)
-            return []
-            
-        with open(SUMMARIES_FILE, 'r') as f:
-            try:
-                summaries = json.load(f)
-                # Verify it's a list
-                if not isinstance(summaries, list):
-                    logger.error(f"Summaries file contains invalid data (not a list): {type(summaries)}")
-                    print(f"[API] Error: Summaries file contains invalid data, resetting file")
-                    with open(SUMMARIES_FILE, 'w') as f:
-                        json.dump([], f)
-                    return []
-                    
-                logger.info(f"Loaded {len(summaries)} summaries from file {SUMMARIES_FILE}")
-                return summaries
-            except json.JSONDecodeError as e:
-                logger.error(f"Error parsing summaries file: {str(e)}")
-                print(f"[API] JSON parse error in summaries file, creating backup and resetting")
-                
-                # Backup the corrupt file
-                backup_file = SUMMARIES_FILE.with_suffix('.json.corrupt')
-                import shutil
-                shutil.copy2(SUMMARIES_FILE, backup_file)
-                
-                # Create a new empty file
-                with open(SUMMARIES_FILE, 'w') as f:
-                    json.dump([], f)
-                return []
-    except Exception as e:
-        logger.error(f"Error loading summaries: {str(e)}")
-        print(f"[API] Error loading summaries: {str(e)}")
-        return []
-
-def save_summaries(summaries: List[Dict[str, Any]]) -> bool:
-    """Save summaries to the JSON file with backup"""
-    if not isinstance(summaries, list):
-        logger.error(f"Cannot save summaries: expected list but got {type(summaries)}")
-        return False
-        
+async def stream_gemini_api(prompt: str):
+    """Call Gemini API in streaming mode, yielding response text as it is generated"""
     try:
-        # Create backup of existing file if it exists
-        if SUMMARIES_FILE.exists():
-            backup_file = SUMMARIES_FILE.with_suffix('.json.bak')
-            import shutil
-            shutil.copy2(SUMMARIES_FILE, backup_file)
-            logger.info(f"Created backup of summaries file at {backup_file}")
-        
-        # Ensure data directory exists
-        DATA_DIR.mkdir(parents=True, exist_ok=True)
+        model = await gemini_client.get_model()
         
-        # Save new summaries with atomic write pattern
-        temp_file = SUMMARIES_FILE.with_suffix('.json.tmp')
-        with open(temp_file, 'w') as f:
-            json.dump(summaries, f, indent=2)
-            f.flush()
-            os.fsync(f.fileno())  # Force write to disk
+        logger.debug("Calling Gemini API with prompt (streaming)")
+        MODEL_CALLS.inc()
+        async with gemini_semaphore:
+            response = await model.generate_content_async(prompt, stream=True)
+            async for chunk in response:
+                if chunk.text:
+                    yield chunk.text
+    except Exception as e:
+        MODEL_ERRORS.inc()
+        logger.error(f"Error calling Gemini API: {str(e)}")
+        raise HTTPException(status_code=500, detail=f"Error calling Gemini API: {str(e)}")
+
+async def map_long_content(request: SummarizeRequest, request_id: str, timings: Dict[str, float]) -> List[Dict[str, Any]]:
+    """Map stage: split long content into chunks and summarize them concurrently"""
+    with timed("chunk", timings):
+        chunks = split_into_chunks(request.content, MAP_REDUCE_CHUNK_CHARS)
+    logger.debug(f"[{request_id}] Split {len(request.content)} characters into {len(chunks)} chunks")
+    
+    semaphore = asyncio.Semaphore(MAP_REDUCE_MAX_PARALLEL)
+    
+    async def summarize_chunk(index: int, chunk: str) -> Dict[str, Any]:
+        async with semaphore:
+            prompt = generate_chunk_prompt(request.title, chunk, index, len(chunks), request.isSelection)
+            partial = await call_gemini_api(prompt)
+            return partial if isinstance(partial, dict) else {"main": str(partial)}
+    
+    with timed("map", timings):
+        partials = await asyncio.gather(*[summarize_chunk(i, chunk) for i, chunk in enumerate(chunks)])
+    return partials
+
+async def summarize_long_content(request: SummarizeRequest, request_id: str, timings: Dict[str, float]) -> Dict[str, Any]:
+    """Map-reduce summarization: summarize chunks concurrently, then merge the partial summaries"""
+    partials = await map_long_content(request, request_id, timings)
+    
+    with timed("reduce", timings):
+        summary = await call_gemini_api(generate_reduce_prompt(request.title, partials, request.length, request.isSelection))
+    
+    logger.debug(
+        f"[{request_id}] Map-reduce timings: chunk={timings['chunk'] * 1000:.1f}ms "
+        f"map={timings['map'] * 1000:.1f}ms reduce={timings['reduce'] * 1000:.1f}ms"
+    )
+    return summary
+
+def validate_summary(summary: Any, request_id: str) -> None:
+    """Raise an HTTP 500 if the model output is not a usable summary"""
+    # Validate summary structure
+    if not isinstance(summary, dict):
+        logger.error(f"[{request_id}] Invalid summary structure received from API")
+        raise HTTPException(
+            status_code=500,
+            detail="Invalid summary structure received from API"
+        )
+    
+    required_fields = ['title', 'main']
+    missing_fields = [field for field in required_fields if field not in summary]
+    if missing_fields:
+        logger.error(f"[{request_id}] Missing required fields in summary: {missing_fields}")
+        raise HTTPException(
+            status_code=500,
+            detail=f"Missing required fields in summary: {', '.join(missing_fields)}"
+        )
+
+async def generate_summary(request: SummarizeRequest, cache_key: str, request_id: str,
+                           timings: Optional[Dict[str, float]] = None) -> Dict[str, Any]:
+    """Generate, validate and cache a summary for a request that missed the cache"""
+    timings = timings if timings is not None else {}
+    
+    async with admitted(request_id, timings):
+        if len(request.content) > MAP_REDUCE_THRESHOLD_CHARS:
+            summary = await summarize_long_content(request, request_id, timings)
+        else:
+            # Generate prompt
+            prompt = generate_summary_prompt(
+                request.title, 
+                request.content, 
+                request.length, 
+                request.isSelection
+            )
             
-        # Replace the old file with the new one (more atomic)
-        if os.name == 'nt':  # Windows
-            if SUMMARIES_FILE.exists():
-                os.replace(temp_file, SUMMARIES_FILE)
+            # Call Gemini API
+            with timed("model", timings):
+                summary = await call_gemini_api(prompt)
+    
+    validate_summary(summary, request_id)
+    
+    if summary.get("keyPoints") != [FALLBACK_KEY_POINT]:
+        await summary_cache.aset(cache_key, summary)
+    return summary
+
+async def update_summary(prompt: str, cache_key: str, request_id: str,
+                         timings: Optional[Dict[str, float]] = None) -> Dict[str, Any]:
+    """Revise a previous summary with an update prompt, then validate and cache the result"""
+    timings = timings if timings is not None else {}
+    
+    async with admitted(request_id, timings):
+        with timed("model", timings):
+            summary = await call_gemini_api(prompt)
+    
+    validate_summary(summary, request_id)
+    
+    if summary.get("keyPoints") != [FALLBACK_KEY_POINT]:
+        await summary_cache.aset(cache_key, summary)
+    return summary
+
+async def generate_variants(request: SummarizeRequest, variants_key: str, request_id: str,
+                           timings: Optional[Dict[str, float]] = None) -> Dict[str, Dict[str, Any]]:
+    """Generate every summary length for a request that missed the cache, per MULTI_LENGTH_MODE
+    
+    request is the original, unprocessed request; the content is prepared once with the long
+    token budget. Returns the lengths that came back usable, cached together under variants_key
+    when all of them did.
+    """
+    timings = timings if timings is not None else {}
+    content, _ = preprocess_content(request.content, PREPROCESS_TOKEN_BUDGETS["long"], MAP_REDUCE_THRESHOLD_CHARS)
+    request = request.copy(update={"content": content or request.content, "length": "long"})
+    
+    async with admitted(request_id, timings):
+        if MULTI_LENGTH_MODE == "combined":
+            if len(request.content) > MAP_REDUCE_THRESHOLD_CHARS:
+                partials = await map_long_content(request, request_id, timings)
+                prompt = generate_multi_length_prompt(
+                    request.title, format_section_summaries(partials), request.isSelection, from_sections=True
+                )
             else:
-                os.rename(temp_file, SUMMARIES_FILE)
-        else:  # Unix-like
-            os.rename(temp_file, SUMMARIES_FILE)
-            
-        logger.info(f"Saved {len(summaries)} summaries to file {SUMMARIES_FILE}")
-        
-        # Verify the file was saved correctly
-        if SUMMARIES_FILE.exists():
-            file_size = SUMMARIES_FILE.stat().st_size
-            logger.info(f"Verified summaries file exists with size {file_size} bytes")
-            
-            if file_size == 0:
-                logger.error("Summaries file has zero size after save!")
-                return False
-                
-            return True
+                prompt = generate_multi_length_prompt(request.title, request.content, request.isSelection)
+            with timed("model", timings):
+                result = await call_gemini_api(prompt)
         else:
-            logger.error("Summaries file does not exist after save operation!")
-            return False
+            if len(request.content) > MAP_REDUCE_THRESHOLD_CHARS:
+                long_summary = await summarize_long_content(request, request_id, timings)
+            else:
+                with timed("model", timings):
+                    long_summary = await call_gemini_api(
+                        generate_summary_prompt(request.title, request.content, "long", request.isSelection)
+                    )
+            validate_summary(long_summary, request_id)
+            if long_summary.get("keyPoints") == [FALLBACK_KEY_POINT]:
+                return {}
+            # Only the long summary goes back to the model, not the page content
+            with timed("derive", timings):
+                result = await call_gemini_api(generate_derive_prompt(request.title, long_summary))
+            result = {**result, "long": long_summary}
+    
+    variants = {}
+    for length in SUMMARY_MIN_LENGTHS:
+        variant = result.get(length)
+        if isinstance(variant, dict) and variant.get("main") and variant.get("keyPoints") != [FALLBACK_KEY_POINT]:
+            variant.setdefault("title", request.title or "Summary")
+            variants[length] = variant
+    logger.debug(f"[{request_id}] Generated {len(variants)} summary lengths in {MULTI_LENGTH_MODE} mode")
+    
+    if len(variants) == len(SUMMARY_MIN_LENGTHS):
+        await summary_cache.aset(variants_key, variants)
+    return variants
+
+def variants_cache_key(request: SummarizeRequest) -> str:
+    """Cache key for every length of a request's summary, from the content as submitted"""
+    return make_cache_key(request.content, "all", request.isSelection, GEMINI_MODEL_NAME,
+                          {**generation_config, "multi_length_mode": MULTI_LENGTH_MODE})
+
+def prepare_summarize_request(request: SummarizeRequest, request_id: str, headers: Dict[str, str],
+                              timings: Optional[Dict[str, float]] = None) -> tuple:
+    """Validate and preprocess a request; returns (cleaned request, cache key)"""
+    # Validate content length
+    if len(request.content) < 50:
+        logger.warning(f"[{request_id}] Content too short for summarization")
+        raise HTTPException(
+            status_code=400,
+            detail="Content is too short for summarization (minimum 50 characters)"
+        )
+    
+    # Strip boilerplate and duplicates before anything else sees the content. Only content sent
+    # in a single call is trimmed to the token budget; longer content is summarized in chunks
+    with timed("preprocess", timings):
+        content, preprocess_stats = preprocess_content(
+            request.content, PREPROCESS_TOKEN_BUDGETS[request.length], MAP_REDUCE_THRESHOLD_CHARS
+        )
+    if content:
+        request = request.copy(update={"content": content})
+    logger.debug(
+        f"[{request_id}] Preprocessing saved {preprocess_stats['bytes_saved']} bytes, "
+        f"~{preprocess_stats['tokens_saved']} tokens "
+        f"({preprocess_stats['boilerplate_lines_removed']} boilerplate lines, "
+        f"{preprocess_stats['duplicate_paragraphs_removed']} duplicate paragraphs, "
+        f"truncated={bool(preprocess_stats['truncated'])})"
+    )
+    headers["X-Content-Bytes-Saved"] = str(preprocess_stats["bytes_saved"])
+    headers["X-Content-Tokens-Saved"] = str(preprocess_stats["tokens_saved"])
+    
+    cache_key = make_cache_key(
+        request.content,
+        request.length,
+        request.isSelection,
+        GEMINI_MODEL_NAME,
+        generation_config
+    )
+    return request, cache_key
+
+def build_history_record(request: SummarizeRequest, summary: Dict[str, Any],
+                         fingerprint: Optional[str] = None, paragraphs: Optional[str] = None) -> Dict[str, Any]:
+    """Create the history entry for a summary - ALWAYS saved regardless of request.save_history"""
+    record = {
+        "id": str(uuid.uuid4()),
+        "url": request.url,
+        "title": request.title or "Untitled Page",
+        "summary": summary,
+        "created_at": datetime.now().isoformat(),
+        "length": request.length,
+        "content_preview": request.content[:200] + "..." if len(request.content) > 200 else request.content
+    }
+    # A fallback summary must never be reused for a later visit of the page or a similar one
+    if summary.get("keyPoints") != [FALLBACK_KEY_POINT]:
+        if fingerprint:
+            record["fingerprint"] = fingerprint
+        if paragraphs:
+            record["paragraphs"] = paragraphs
+    return record
+
+async def find_near_duplicate(request: SummarizeRequest, request_id: str, headers: Dict[str, str],
+                              timings: Optional[Dict[str, float]] = None) -> tuple:
+    """Look for a saved summary of a near-identical page; returns (summary or None, content fingerprint)
+    
+    The fingerprint (None when near-duplicate reuse is off) belongs in the history record
+    so later requests can match this page.
+    """
+    if not NEAR_DUPLICATE_ENABLED or request.isSelection:
+        return None, None
+    
+    with timed("fingerprint", timings):
+        fingerprint = (await run_in_threadpool(content_fingerprint, request.content)).hex()
+    try:
+        with timed("near_duplicate_lookup", timings):
+            match = await run_in_threadpool(
+                history_store.find_similar, fingerprint, request.length, NEAR_DUPLICATE_THRESHOLD
+            )
+    except Exception as e:
+        logger.error(f"[{request_id}] Near-duplicate lookup failed: {str(e)}")
+        match = None
+    if match is not None and match[0]["summary"].get("keyPoints") == [FALLBACK_KEY_POINT]:
+        # Fingerprinted before fallback summaries were excluded
+        match = None
+    
+    if match is None:
+        NEAR_DUPLICATE_LOOKUPS.inc("miss")
+        return None, fingerprint
+    
+    record, score = match
+    logger.info(f"[{request_id}] Reusing summary {record['id']} of a near-duplicate page (similarity {score:.3f})")
+    NEAR_DUPLICATE_LOOKUPS.inc("reused")
+    NEAR_DUPLICATE_SIMILARITY.observe(score)
+    headers["X-Similarity"] = f"{score:.3f}"
+    headers["X-Similar-To"] = record["id"]
+    return record["summary"], fingerprint
+
+async def find_revision(request: SummarizeRequest, request_id: str, headers: Dict[str, str],
+                        timings: Optional[Dict[str, float]] = None) -> tuple:
+    """Diff the page against the last saved version of the same URL and length
+    
+    Returns (paragraph hashes, previous record, changes). The hashes (None when incremental
+    updates are off) belong in the history record. previous is None on a first visit or when
+    too much changed to update its summary, and changes is empty when nothing meaningful changed.
+    """
+    if not INCREMENTAL_UPDATES or request.isSelection:
+        return None, None, []
+    
+    with timed("paragraph_hashes", timings):
+        paragraphs = split_paragraphs(request.content)
+        hashes = paragraph_hashes(paragraphs)
+    try:
+        with timed("revision_lookup", timings):
+            previous = await run_in_threadpool(history_store.find_revision, request.url, request.length)
     except Exception as e:
-        logger.error(f"Error saving summaries: {str(e)}")
-        print(f"[API] Error saving summaries: {str(e)}")
-        return False
+        logger.error(f"[{request_id}] Revision lookup failed: {str(e)}")
+        previous = None
+    if previous is not None and previous["summary"].get("keyPoints") == [FALLBACK_KEY_POINT]:
+        # Saved before fallback summaries were excluded; summarize the page afresh
+        previous = None
+    
+    if previous is None:
+        REVISION_LOOKUPS.inc("new")
+        return hashes.hex(), None, []
+    
+    changes, ratio = diff_paragraphs(bytes.fromhex(previous["paragraphs"]), paragraphs)
+    headers["X-Revision-Of"] = previous["id"]
+    headers["X-Changed-Ratio"] = f"{ratio:.3f}"
+    changed_chars = sum(len(change["text"]) for change in changes)
+    if ratio > REVISION_MAX_CHANGED_RATIO or changed_chars > MAP_REDUCE_THRESHOLD_CHARS:
+        logger.info(f"[{request_id}] {ratio:.1%} of the page changed since summary {previous['id']}, summarizing it again")
+        REVISION_LOOKUPS.inc("changed")
+        headers["X-Revision"] = "changed"
+        return hashes.hex(), None, []
+    
+    logger.info(f"[{request_id}] {len(changes)} changes ({ratio:.1%} of the page) since summary {previous['id']}")
+    return hashes.hex(), previous, changes
+
+async def process_summarize_request(request: SummarizeRequest, request_id: str, headers: Dict[str, str],
+                                    timings: Optional[Dict[str, float]] = None) -> tuple:
+    """Run the summarize pipeline for one request; returns (summary, history record)
+    
+    Response headers describing how the summary was produced are added to headers,
+    and per-stage durations to timings when given.
+    """
+    original_request = request
+    request, cache_key = prepare_summarize_request(request, request_id, headers, timings)
+    variants = None
+    with timed("cache_lookup", timings):
+        summary = await summary_cache.aget(cache_key)
+        if summary is None and MULTI_LENGTH_MODE != "off":
+            variants_key = variants_cache_key(original_request)
+            variants = await summary_cache.aget(variants_key)
+            summary = variants.get(request.length) if variants else None
+
+    fingerprint = paragraphs = previous = None
+    changes: List[Dict[str, Any]] = []
+    if summary is not None:
+        logger.debug(f"[{request_id}] Serving summary from cache")
+        headers["X-Cache"] = "HIT"
+        CACHE_LOOKUPS.inc("hit")
+    else:
+        paragraphs, previous, changes = await find_revision(request, request_id, headers, timings)
+        if previous is None:
+            summary, fingerprint = await find_near_duplicate(request, request_id, headers, timings)
+    
+    if summary is not None and fingerprint is not None:
+        headers["X-Cache"] = "NEAR"
+        CACHE_LOOKUPS.inc("near")
+        # Exact repeats of this page are then served from the cache
+        await summary_cache.aset(cache_key, summary)
+    elif previous is not None and not changes:
+        logger.debug(f"[{request_id}] Page unchanged since summary {previous['id']}, reusing it")
+        summary = previous["summary"]
+        headers["X-Cache"] = "REVISION"
+        headers["X-Revision"] = "unchanged"
+        CACHE_LOOKUPS.inc("revision")
+        REVISION_LOOKUPS.inc("unchanged")
+        REVISION_PROMPT_TOKENS.inc("saved", amount=estimate_tokens(request.content))
+        await summary_cache.aset(cache_key, summary)
+    elif previous is not None:
+        # Only the changed paragraphs and the previous summary go to the model
+        prompt = generate_update_prompt(request.title, previous["summary"], changes, request.length, request.isSelection)
+        tokens_sent = estimate_tokens(prompt)
+        tokens_saved = max(0, estimate_tokens(request.content) - tokens_sent)
+        generate_timings: Dict[str, float] = {}
+        summary, shared = await summary_flights.do(
+            cache_key,
+            lambda: update_summary(prompt, cache_key, request_id, generate_timings)
+        )
+        headers["X-Cache"] = "REVISION"
+        headers["X-Revision"] = "updated"
+        headers["X-Prompt-Tokens"] = str(tokens_sent)
+        headers["X-Prompt-Tokens-Saved"] = str(tokens_saved)
+        CACHE_LOOKUPS.inc("revision")
+        REVISION_LOOKUPS.inc("updated")
+        if not shared:
+            REVISION_PROMPT_TOKENS.inc("sent", amount=tokens_sent)
+            REVISION_PROMPT_TOKENS.inc("saved", amount=tokens_saved)
+        if timings is not None:
+            timings.update(generate_timings)
+    elif summary is None:
+        generate_timings: Dict[str, float] = {}
+        shared = False
+        if MULTI_LENGTH_MODE != "off":
+            variants, shared = await summary_flights.do(
+                variants_key,
+                lambda: generate_variants(original_request, variants_key, request_id, generate_timings)
+            )
+            summary = variants.get(request.length)
+        if summary is None:
+            # Single-length generation, or the multi-length output lacked this length
+            summary, shared = await summary_flights.do(
+                cache_key,
+                lambda: generate_summary(request, cache_key, request_id, generate_timings)
+            )
+        headers["X-Cache"] = "SHARED" if shared else "MISS"
+        CACHE_LOOKUPS.inc("shared" if shared else "miss")
+        if timings is not None:
+            timings.update(generate_timings)
+
+    new_summary = build_history_record(request, summary, fingerprint, paragraphs)
+    if variants:
+        summary = {**summary, "variants": variants}
+    
+    return summary, new_summary
+
+def near_duplicate_stats() -> Dict[str, Any]:
+    reused = NEAR_DUPLICATE_LOOKUPS.value("reused")
+    lookups = reused + NEAR_DUPLICATE_LOOKUPS.value("miss")
+    return {
+        "enabled": NEAR_DUPLICATE_ENABLED,
+        "threshold": NEAR_DUPLICATE_THRESHOLD,
+        "lookups": lookups,
+        "reused": reused,
+        "reuse_rate": round(reused / lookups, 4) if lookups else 0.0,
+    }
+
+def revision_stats() -> Dict[str, Any]:
+    lookups = {result: REVISION_LOOKUPS.value(result) for result in ("new", "unchanged", "updated", "changed")}
+    return {
+        "enabled": INCREMENTAL_UPDATES,
+        "max_changed_ratio": REVISION_MAX_CHANGED_RATIO,
+        "lookups": lookups,
+        "prompt_tokens_sent": REVISION_PROMPT_TOKENS.value("sent"),
+        "prompt_tokens_saved": REVISION_PROMPT_TOKENS.value("saved"),
+    }
 
 # Routes
 @app.get("/")
 async def root():
-    logger.info("Root endpoint accessed")
     return {"message": "Universal Summarizer API is running"}
 
 @app.get("/api/status")
@@ -348,114 +1159,51 @@ async def status():
     Return API status to check if the service is running
     Used by the extension to verify connectivity
     """
-    logger.info("Status endpoint accessed - API is running")
     return {
         "status": "online",
         "api_version": "1.0.0",
-        "message": "API is operational and ready to process requests"
+        "message": "API is operational and ready to process requests",
+        "cache": summary_cache.stats(),
+        "in_flight": summary_flights.stats(),
+        "admission": summarize_admission.stats(),
+        "rate_limit": {**client_rate_limiter.stats(), "addresses": address_rate_limiter.stats()["clients"],
+                       "rejected": client_rate_limiter.rejected + address_rate_limiter.rejected},
+        "history_writer": history_writer.stats(),
+        "model": gemini_client.stats(),
+        "near_duplicates": near_duplicate_stats(),
+        "revisions": revision_stats(),
+        "logging": {**log_pipeline.stats(), "access_lines_suppressed": access_log_sampler.suppressed},
+        "retention": {
+            **retention_policy.to_dict(),
+            "compaction_interval_seconds": HISTORY_COMPACTION_INTERVAL_SECONDS,
+            "last_compaction": last_compaction,
+        }
     }
 
-@app.post("/api/summarize", response_model=Union[SummaryResponse, str])
-async def summarize(request: SummarizeRequest):
+@app.post("/api/summarize", response_model=Union[SummaryResponse, str], dependencies=[Depends(enforce_rate_limit)])
+async def summarize(request: SummarizeRequest, response: Response):
     """
     Summarize web content using Gemini API
     """
     request_id = str(uuid.uuid4())[:8]  # Short ID for request tracking
     
-    logger.info(f"[{request_id}] Summarize endpoint accessed - URL: {request.url}, Length: {request.length}")
-    logger.info(f"[{request_id}] Content length: {len(request.content)} characters")
-    logger.info(f"[{request_id}] save_history parameter: {request.save_history}")
-    
-    # Also print to console for immediate visibility
-    print(f"[API] [{request_id}] Summarize request for: {request.url}")
-    print(f"[API] [{request_id}] Content length: {len(request.content)} chars, Save history: {request.save_history}")
+    logger.info(f"[{request_id}] Summarize request",
+                extra={"request_id": request_id, "url": request.url, "length": request.length,
+                       "content_chars": len(request.content)})
     
     try:
-        # Validate content length
-        if len(request.content) < 50:
-            logger.warning(f"[{request_id}] Content too short for summarization")
-            raise HTTPException(
-                status_code=400,
-                detail="Content is too short for summarization (minimum 50 characters)"
-            )
-        
-        # Generate prompt
-        prompt = generate_summary_prompt(
-            request.title, 
-            request.content, 
-            request.length, 
-            request.isSelection
-        )
-        
-        # Call Gemini API
-        summary = await call_gemini_api(prompt)
-        
-        # Validate summary structure
-        if not isinstance(summary, dict):
-            logger.error(f"[{request_id}] Invalid summary structure received from API")
-            raise HTTPException(
-                status_code=500,
-                detail="Invalid summary structure received from API"
-            )
-        
-        required_fields = ['title', 'main']
-        missing_fields = [field for field in required_fields if field not in summary]
-        if missing_fields:
-            logger.error(f"[{request_id}] Missing required fields in summary: {missing_fields}")
-            raise HTTPException(
-                status_code=500,
-                detail=f"Missing required fields in summary: {', '.join(missing_fields)}"
-            )
-        
-        # Create summary object - ALWAYS save regardless of request.save_history
-        new_summary = {
-            "id": str(uuid.uuid4()),
-            "url": request.url,
-            "title": request.title or "Untitled Page",
-            "summary": summary,
-            "created_at": datetime.now().isoformat(),
-            "length": request.length,
-            "content_preview": request.content[:200] + "..." if len(request.content) > 200 else request.content
-        }
+        headers: Dict[str, str] = {}
+        timings: Dict[str, float] = {}
+        summary, new_summary = await process_summarize_request(request, request_id, headers, timings)
+        response.headers.update(headers)
         
         # Always save to history, regardless of the request parameter
-        logger.info(f"[{request_id}] Saving summary to history with ID: {new_summary['id']}")
-        print(f"[API] [{request_id}] Saving summary with ID: {new_summary['id']}")
-        
-        summaries = load_summaries()
-        logger.info(f"[{request_id}] Loaded {len(summaries)} existing summaries")
-        
-        # Add new summary
-        summaries.append(new_summary)
-        logger.info(f"[{request_id}] Added new summary with ID: {new_summary['id']}")
-        
-        # Save updated list
-        success = save_summaries(summaries)
-        if success:
-            logger.info(f"[{request_id}] Successfully saved {len(summaries)} summaries to file")
-            print(f"[API] [{request_id}] Successfully saved summary to {SUMMARIES_FILE}")
-        else:
-            logger.error(f"[{request_id}] Failed to save summaries to file")
-            print(f"[API] [{request_id}] FAILED to save summary to {SUMMARIES_FILE}")
+        logger.debug(f"[{request_id}] Saving summary to history with ID: {new_summary['id']}")
+        with timed("history_save", timings):
+            await history_writer.submit(new_summary)
         
-        # Wait a moment to ensure file operations complete
-        time.sleep(0.5)
-        
-        # Verify the file contains the new summary
-        try:
-            with open(SUMMARIES_FILE, 'r') as f:
-                saved_data = json.load(f)
-                saved_ids = [s.get('id') for s in saved_data]
-                
-                if new_summary['id'] in saved_ids:
-                    logger.info(f"[{request_id}] Verified summary is in saved file")
-                    print(f"[API] [{request_id}] Verified summary is saved correctly")
-                else:
-                    logger.error(f"[{request_id}] Summary not found in saved file!")
-                    print(f"[API] [{request_id}] ERROR: Summary not found in saved file!")
-        except Exception as e:
-            logger.error(f"[{request_id}] Error verifying saved summary: {str(e)}")
-            print(f"[API] [{request_id}] Error verifying summary: {str(e)}")
+        if SERVER_TIMING_HEADER:
+            response.headers["Server-Timing"] = format_server_timing(timings)
         
         # Return the summary
         return summary
@@ -465,51 +1213,428 @@ async def summarize(request: SummarizeRequest):
         logger.error(f"[{request_id}] Error in summarize endpoint: {str(e)}")
         raise HTTPException(status_code=500, detail=str(e))
 
+@app.post("/api/summarize/stream", dependencies=[Depends(enforce_rate_limit)])
+async def summarize_stream(request: SummarizeRequest):
+    """
+    Summarize web content, streaming the result as Server-Sent Events
+    
+    Events: "title", "main" (text deltas), "keyPoint" (one per key point), then
+    "done" with the full validated summary, or "error".
+    """
+    request_id = str(uuid.uuid4())[:8]
+    logger.info(f"[{request_id}] Streaming summarize request",
+                extra={"request_id": request_id, "url": request.url, "length": request.length,
+                       "content_chars": len(request.content)})
+    
+    headers: Dict[str, str] = {"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    original_request = request
+    request, cache_key = prepare_summarize_request(request, request_id, headers)
+    with timed("cache_lookup"):
+        cached = await summary_cache.aget(cache_key)
+        # Lengths generated together earlier are reused, but a miss streams just this length
+        if cached is None and MULTI_LENGTH_MODE != "off":
+            variants = await summary_cache.aget(variants_cache_key(original_request))
+            cached = variants.get(request.length) if variants else None
+    fingerprint = paragraphs = previous = None
+    changes: List[Dict[str, Any]] = []
+    near_duplicate = False
+    if cached is None:
+        paragraphs, previous, changes = await find_revision(request, request_id, headers)
+        if previous is None:
+            cached, fingerprint = await find_near_duplicate(request, request_id, headers)
+            near_duplicate = cached is not None
+        elif not changes:
+            cached = previous["summary"]
+            headers["X-Revision"] = "unchanged"
+            REVISION_LOOKUPS.inc("unchanged")
+            REVISION_PROMPT_TOKENS.inc("saved", amount=estimate_tokens(request.content))
+        else:
+            headers["X-Revision"] = "updated"
+        if cached is not None:
+            await summary_cache.aset(cache_key, cached)
+    # Shed load with a real 429 while we still can; once the stream starts errors become events
+    if cached is None and summarize_admission.would_reject():
+        raise too_many_requests("queue_full", summarize_admission.retry_after())
+    
+    async def emit_summary(summary: Dict[str, Any]):
+        if summary.get("title"):
+            yield format_sse("title", {"title": summary["title"]})
+        yield format_sse("main", {"delta": summary.get("main", "")})
+        for index, point in enumerate(summary.get("keyPoints") or []):
+            yield format_sse("keyPoint", {"index": index, "text": point})
+    
+    async def event_stream():
+        try:
+            summary = cached
+            if summary is not None:
+                logger.debug(f"[{request_id}] Serving streamed summary from cache")
+                CACHE_LOOKUPS.inc("near" if near_duplicate else "revision" if previous is not None else "hit")
+                async for event in emit_summary(summary):
+                    yield event
+            else:
+                CACHE_LOOKUPS.inc("revision" if previous is not None else "miss")
+                timings: Dict[str, float] = {}
+                async with admitted(request_id, timings):
+                    if previous is not None:
+                        prompt = generate_update_prompt(
+                            request.title, previous["summary"], changes, request.length, request.isSelection
+                        )
+                        tokens_sent = estimate_tokens(prompt)
+                        REVISION_LOOKUPS.inc("updated")
+                        REVISION_PROMPT_TOKENS.inc("sent", amount=tokens_sent)
+                        REVISION_PROMPT_TOKENS.inc("saved", amount=max(0, estimate_tokens(request.content) - tokens_sent))
+                    elif len(request.content) > MAP_REDUCE_THRESHOLD_CHARS:
+                        # Only the reduce pass produces user-visible text, so that is the part we stream
+                        partials = await map_long_content(request, request_id, timings)
+                        prompt = generate_reduce_prompt(request.title, partials, request.length, request.isSelection)
+                    else:
+                        prompt = generate_summary_prompt(request.title, request.content, request.length, request.isSelection)
+                    
+                    parser = SummaryStreamParser()
+                    async for text in stream_gemini_api(prompt):
+                        for name, data in parser.feed(text):
+                            yield format_sse(name, data)
+                
+                summary = parse_summary_response(parser.text)
+                validate_summary(summary, request_id)
+                if summary.get("keyPoints") != [FALLBACK_KEY_POINT]:
+                    await summary_cache.aset(cache_key, summary)
+            
+            with timed("history_save"):
+                await history_writer.submit(build_history_record(request, summary, fingerprint, paragraphs))
+            yield format_sse("done", summary)
+        except HTTPException as e:
+            yield format_sse("error", {"status_code": e.status_code, "detail": e.detail})
+        except Exception as e:
+            logger.error(f"[{request_id}] Error in streaming summarize endpoint: {str(e)}")
+            yield format_sse("error", {"status_code": 500, "detail": str(e)})
+    
+    return StreamingResponse(event_stream(), media_type="text/event-stream", headers=headers)
+
+@app.post("/api/summarize/batch")
+async def summarize_batch(batch: BatchSummarizeRequest, request: Request):
+    """
+    Summarize many pages, streaming one NDJSON line per item as it finishes
+    
+    Each line is {"index", "url", "status": "ok", "summary"} or
+    {"index", "url", "status": "error", "status_code", "error"}. History for the
+    whole batch is written in one operation after the last item, followed by a
+    final {"status": "done", ...} line.
+    """
+    # Every item is a summarize request of its own
+    check_rate_limit(request, len(batch.items))
+    batch_id = str(uuid.uuid4())[:8]
+    concurrency = batch.concurrency or BATCH_DEFAULT_CONCURRENCY
+    semaphore = asyncio.Semaphore(concurrency)
+    logger.info(f"[{batch_id}] Batch summarize request with {len(batch.items)} items, concurrency {concurrency}")
+    
+    async def run_item(index: int, item: Dict[str, Any]) -> tuple:
+        url = item.get("url") if isinstance(item, dict) else None
+        try:
+            request = SummarizeRequest(**item)
+        except (ValueError, TypeError) as e:
+            return {"index": index, "url": url, "status": "error", "status_code": 422, "error": str(e)}, None
+        
+        async with semaphore:
+            request_id = f"{batch_id}-{index}"
+            try:
+                summary, record = await process_summarize_request(request, request_id, {})
+                return {"index": index, "url": url, "status": "ok", "summary": summary}, record
+            except HTTPException as e:
+                return {"index": index, "url": url, "status": "error", "status_code": e.status_code, "error": e.detail}, None
+            except Exception as e:
+                logger.error(f"[{request_id}] Error in batch item: {str(e)}")
+                return {"index": index, "url": url, "status": "error", "status_code": 500, "error": str(e)}, None
+    
+    async def stream_results():
+        tasks = [asyncio.ensure_future(run_item(i, item)) for i, item in enumerate(batch.items)]
+        records = []
+        failed = 0
+        saved = False
+        try:
+            for next_done in asyncio.as_completed(tasks):
+                line, record = await next_done
+                if record is not None:
+                    records.append(record)
+                else:
+                    failed += 1
+                yield json.dumps(line) + "\n"
+            
+            with timed("history_save"):
+                await history_writer.submit_many(records)
+            saved = True
+            logger.info(f"[{batch_id}] Batch finished: {len(records)} succeeded, {failed} failed")
+            yield json.dumps({"status": "done", "succeeded": len(records), "failed": failed, "saved": len(records)}) + "\n"
+        finally:
+            # Client went away mid-stream (possibly on the last item): stop outstanding work
+            # but keep what already finished
+            for task in tasks:
+                if not task.done():
+                    task.cancel()
+            if not saved and records:
+                await history_writer.submit_many(records)
+    
+    return StreamingResponse(stream_results(), media_type="application/x-ndjson")
+
 @app.post("/api/feedback")
 async def submit_feedback(request: FeedbackRequest):
     """
     Submit user feedback for summaries
     """
     try:
-        # In a production app, you would store this feedback in a database
-        logger.info(f"Received feedback: {request.rating} stars for URL: {request.url}")
+        logger.info(f"Received feedback: {request.rating} stars",
+                    extra={"url": request.url, "rating": request.rating, "comment": request.comment})
         
-        if request.comment:
-            logger.info(f"Comment: {request.comment}")
+        entry = {
+            "id": str(uuid.uuid4()),
+            "url": request.url,
+            "rating": request.rating,
+            "length": request.length,
+            "summary_id": request.summary_id,
+            "comment": request.comment,
+            "created_at": datetime.now().isoformat(),
+        }
+        if feedback_store.record(entry):
+            await run_in_threadpool(feedback_store.flush)
             
         return {"message": "Feedback received successfully"}
     except Exception as e:
         logger.error(f"Error in feedback endpoint: {str(e)}")
         raise HTTPException(status_code=500, detail=str(e))
 
-@app.get("/api/history", response_model=List[SavedSummary])
-async def get_summary_history():
+@app.get("/api/feedback/stats")
+async def get_feedback_stats(
+    url: Optional[str] = Query(default=None, description="Aggregate ratings for this URL"),
+    length: Optional[str] = Query(default=None, description="Aggregate ratings for this summary length"),
+):
+    """
+    Get rating count, mean and distribution, overall or for a URL and/or summary length
+    """
+    # Queries first read feedback other workers appended to the log
+    if not url and not length:
+        return await run_in_threadpool(feedback_store.stats)
+    
+    stats: Dict[str, Any] = {}
+    if url:
+        stats["url"] = await run_in_threadpool(feedback_store.url_stats, url)
+    if length:
+        stats["length"] = await run_in_threadpool(feedback_store.length_stats, length)
+    return stats
+
+async def flush_feedback_periodically():
+    """Write buffered feedback to disk at least every FEEDBACK_FLUSH_INTERVAL_SECONDS"""
+    while True:
+        await asyncio.sleep(FEEDBACK_FLUSH_INTERVAL_SECONDS)
+        try:
+            await run_in_threadpool(feedback_store.flush)
+        except Exception as e:
+            logger.error(f"Error flushing feedback: {str(e)}")
+
+async def compact_history_periodically():
+    """Apply the retention policy and compact history every HISTORY_COMPACTION_INTERVAL_SECONDS"""
+    global last_compaction
+    while True:
+        await asyncio.sleep(HISTORY_COMPACTION_INTERVAL_SECONDS)
+        try:
+            await history_writer.flush()
+            last_compaction = await run_in_threadpool(
+                compact_history, history_store, retention_policy, HISTORY_VACUUM
+            )
+        except Exception as e:
+            logger.error(f"Error compacting history: {str(e)}")
+
+async def sweep_cache_periodically():
+    """Bound the disk cache tier, at startup and every SUMMARY_CACHE_SWEEP_INTERVAL_SECONDS"""
+    while True:
+        try:
+            await run_in_threadpool(summary_cache.sweep_disk)
+        except Exception as e:
+            logger.error(f"Error sweeping the summary cache: {str(e)}")
+        await asyncio.sleep(SUMMARY_CACHE_SWEEP_INTERVAL_SECONDS)
+
+@app.on_event("startup")
+async def start_background_tasks():
+    app.state.feedback_flusher = asyncio.create_task(flush_feedback_periodically())
+    app.state.history_compactor = None
+    if HISTORY_COMPACTION_INTERVAL_SECONDS > 0:
+        app.state.history_compactor = asyncio.create_task(compact_history_periodically())
+    app.state.cache_sweeper = None
+    if SUMMARY_CACHE_DISK and SUMMARY_CACHE_SWEEP_INTERVAL_SECONDS > 0:
+        app.state.cache_sweeper = asyncio.create_task(sweep_cache_periodically())
+    if GEMINI_INIT == "background":
+        app.state.gemini_warmup = asyncio.create_task(gemini_client.warm())
+
+@app.on_event("shutdown")
+async def stop_background_tasks():
+    app.state.feedback_flusher.cancel()
+    if app.state.history_compactor is not None:
+        app.state.history_compactor.cancel()
+    if app.state.cache_sweeper is not None:
+        app.state.cache_sweeper.cancel()
+    feedback_store.flush()
+    await history_writer.close()
+    history_store.close()
+    log_pipeline.stop()
+
+def encode_history_cursor(record: Dict[str, Any]) -> str:
+    """Encode the position after a history record as an opaque cursor"""
+    raw = json.dumps([record["created_at"], record["id"]]).encode("utf-8")
+    return base64.urlsafe_b64encode(raw).decode("ascii")
+
+def decode_history_cursor(cursor: str) -> tuple:
+    """Decode a cursor produced by encode_history_cursor"""
+    try:
+        created_at, summary_id = json.loads(base64.urlsafe_b64decode(cursor.encode("ascii")))
+        return str(created_at), str(summary_id)
+    except (ValueError, TypeError):
+        raise HTTPException(status_code=400, detail="Invalid cursor")
+
+@app.get("/api/history")
+async def get_summary_history(
+    request: Request,
+    limit: int = Query(default=50, ge=1, le=500, description="Maximum number of summaries to return"),
+    cursor: Optional[str] = Query(default=None, description="Cursor from the X-Next-Cursor header of the previous page"),
+    url: Optional[str] = Query(default=None, description="Only return summaries for this URL"),
+    fields: Optional[str] = Query(default=None, description="Comma-separated list of fields to include"),
+):
     """
-    Get all saved summaries
+    Get saved summaries, newest first, one page at a time
     """
     try:
-        summaries = load_summaries()
-        # Sort by date, newest first
-        summaries.sort(key=lambda x: x['created_at'], reverse=True)
-        logger.info(f"Retrieved {len(summaries)} summaries from history")
-        return summaries
+        if fields:
+            requested = [f.strip() for f in fields.split(",") if f.strip()]
+            unknown = [f for f in requested if f not in HISTORY_FIELDS]
+            if unknown:
+                raise HTTPException(status_code=400, detail=f"Unknown fields: {', '.join(unknown)}")
+        else:
+            requested = list(HISTORY_FIELDS)
+        after = decode_history_cursor(cursor) if cursor else None
+        # Make summaries still queued for writing visible (and part of the ETag)
+        await history_writer.flush()
+        
+        # The ETag covers both the stored history and the query, so an unchanged page costs a 304
+        revision = await run_in_threadpool(history_store.revision)
+        query_key = f"{revision}|{limit}|{cursor}|{url}|{','.join(requested)}"
+        etag = f'W/"{hashlib.sha1(query_key.encode("utf-8")).hexdigest()}"'
+        headers = {"ETag": etag, "Cache-Control": "no-cache"}
+        if request.headers.get("if-none-match") == etag:
+            return Response(status_code=304, headers=headers)
+        
+        # Cursor pagination needs created_at and id even if they are not returned
+        columns = set(requested) | {"created_at", "id"}
+        with timed("history_load"):
+            summaries = await run_in_threadpool(history_store.list_page, limit + 1, after, url, columns)
+        
+        if len(summaries) > limit:
+            summaries = summaries[:limit]
+            next_cursor = encode_history_cursor(summaries[-1])
+            headers["X-Next-Cursor"] = next_cursor
+            headers["Link"] = f'<{request.url.include_query_params(cursor=next_cursor)}>; rel="next"'
+        
+        items = [{f: summary.get(f) for f in requested} for summary in summaries]
+        logger.debug(f"Retrieved {len(items)} summaries from history")
+        return JSONResponse(content=items, headers=headers)
+    except HTTPException:
+        raise
     except Exception as e:
         logger.error(f"Error retrieving summary history: {str(e)}")
         raise HTTPException(status_code=500, detail=str(e))
 
+# Fields returned by history search unless others are requested
+SEARCH_DEFAULT_FIELDS = ("id", "url", "title", "length", "created_at")
+
+@app.get("/api/history/search")
+async def search_summary_history(
+    q: str = Query(min_length=1, max_length=500, description="Words to search for; each also matches as a prefix"),
+    limit: int = Query(default=20, ge=1, le=100, description="Maximum number of results to return"),
+    offset: int = Query(default=0, ge=0, le=10000, description="Number of results to skip"),
+    fields: Optional[str] = Query(default=None, description="Comma-separated list of fields to include"),
+):
+    """
+    Search saved summaries by title, summary text, key points and page preview, best match first
+    """
+    try:
+        if fields:
+            requested = [f.strip() for f in fields.split(",") if f.strip()]
+            unknown = [f for f in requested if f not in HISTORY_FIELDS]
+            if unknown:
+                raise HTTPException(status_code=400, detail=f"Unknown fields: {', '.join(unknown)}")
+        else:
+            requested = list(SEARCH_DEFAULT_FIELDS)
+        
+        await history_writer.flush()
+        with timed("history_search"):
+            results = await run_in_threadpool(history_store.search, q, limit + 1, offset, requested)
+        
+        headers = {}
+        if len(results) > limit:
+            results = results[:limit]
+            headers["X-Next-Offset"] = str(offset + limit)
+        logger.debug(f"History search for {q!r} returned {len(results)} results")
+        return JSONResponse(content=results, headers=headers)
+    except NotImplementedError:
+        raise HTTPException(status_code=501, detail=f"Search is not supported by the {HISTORY_BACKEND} history backend")
+    except HTTPException:
+        raise
+    except Exception as e:
+        logger.error(f"Error searching summary history: {str(e)}")
+        raise HTTPException(status_code=500, detail=str(e))
+
+@app.get("/api/history/export")
+async def export_summary_history(
+    gzip: bool = Query(default=False, description="Compress the export with gzip"),
+):
+    """
+    Stream every saved summary as NDJSON, one record per line, optionally gzip-compressed
+    """
+    await history_writer.flush()
+    logger.info(f"Exporting summary history{' (gzip)' if gzip else ''}")
+    filename = f"summaries-{datetime.now().strftime('%Y%m%d-%H%M%S')}.ndjson"
+    if gzip:
+        media_type = "application/gzip"
+        filename += ".gz"
+    else:
+        media_type = "application/x-ndjson"
+    # A plain iterator is consumed on the threadpool, so reading the store stays off the event loop
+    return StreamingResponse(
+        export_ndjson(history_store, compress=gzip),
+        media_type=media_type,
+        headers={"Content-Disposition": f'attachment; filename="{filename}"'},
+    )
+
+@app.post("/api/history/import")
+async def import_summary_history(request: Request):
+    """
+    Import summaries from an NDJSON body (as produced by the export, plain or gzip)
+
+    Records are inserted in batches as the body arrives; ids that already exist are skipped.
+    """
+    try:
+        with timed("history_import"):
+            result = await import_ndjson(request.stream(), history_store, HISTORY_IMPORT_BATCH_SIZE)
+        return result
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    except Exception as e:
+        logger.error(f"Error importing summary history: {str(e)}")
+        raise HTTPException(status_code=500, detail=str(e))
+
 @app.get("/api/history/{summary_id}", response_model=SavedSummary)
 async def get_summary_by_id(summary_id: str):
     """
     Get a specific summary by ID
     """
     try:
-        summaries = load_summaries()
-        for summary in summaries:
-            if summary["id"] == summary_id:
-                logger.info(f"Retrieved summary with ID: {summary_id}")
-                return summary
+        await history_writer.flush()
+        with timed("history_load"):
+            summary = await run_in_threadpool(history_store.get, summary_id)
+        if summary is not None:
+            logger.debug(f"Retrieved summary with ID: {summary_id}")
+            return summary
         logger.warning(f"Summary not found with ID: {summary_id}")
         raise HTTPException(status_code=404, detail="Summary not found")
+    except HTTPException:
+        raise
     except Exception as e:
         logger.error(f"Error retrieving summary: {str(e)}")
         raise HTTPException(status_code=500, detail=str(e))
@@ -520,29 +1645,55 @@ async def delete_summary(summary_id: str):
     Delete a specific summary by ID
     """
     try:
-        summaries = load_summaries()
-        original_length = len(summaries)
-        summaries = [s for s in summaries if s["id"] != summary_id]
-        
-        if len(summaries) == original_length:
+        await history_writer.flush()
+        if not await run_in_threadpool(history_store.delete, summary_id):
             logger.warning(f"Summary not found for deletion: {summary_id}")
             raise HTTPException(status_code=404, detail="Summary not found")
             
-        if not save_summaries(summaries):
-            raise HTTPException(status_code=500, detail="Failed to save summaries after deletion")
-            
         logger.info(f"Successfully deleted summary with ID: {summary_id}")
         return {"message": "Summary deleted successfully"}
+    except HTTPException:
+        raise
     except Exception as e:
         logger.error(f"Error deleting summary: {str(e)}")
         raise HTTPException(status_code=500, detail=str(e))
 
+@app.get("/metrics")
+async def metrics():
+    """
+    Expose request, stage and cache metrics in the Prometheus text format
+    """
+    await run_in_threadpool(metrics_registry.refresh_blocking)
+    # Rendered on the event loop, where every other metric update happens
+    body = metrics_registry.render()
+    return PlainTextResponse(body, media_type="text/plain; version=0.0.4")
+
 @app.middleware("http")
 async def log_requests(request: Request, call_next):
-    """Log all requests"""
-    logger.info(f"Request: {request.method} {request.url}")
-    response = await call_next(request)
-    return response
+    """Count every request and write one access log line for it once it completes
+
+    Requests to LOG_SAMPLED_ROUTES are only logged at LOG_SAMPLE_RATE, unless they fail.
+    """
+    IN_FLIGHT_REQUESTS.inc()
+    status_code = 500
+    start = time.perf_counter()
+    try:
+        response = await call_next(request)
+        status_code = response.status_code
+        return response
+    finally:
+        IN_FLIGHT_REQUESTS.dec()
+        # Label by route template so ids in the path do not create a series per request
+        route = request.scope.get("route")
+        HTTP_REQUESTS.inc(request.method, getattr(route, "path", "unmatched"), str(status_code))
+        # Path only: query strings can carry whole page URLs
+        path = request.url.path
+        if access_log_sampler.should_log(path, status_code):
+            access_logger.info(
+                f"{request.method} {path} {status_code}",
+                extra={"method": request.method, "path": path, "status": status_code,
+                       "duration_ms": round((time.perf_counter() - start) * 1000, 2)},
+            )
 
 # Main entry point
 if __name__ == "__main__":
@@ -0,0 +1,29 @@
+"""
+One-shot migration of api/data/summaries.json into the SQLite history store
+
+Usage:
+    python migrate_history.py [--json data/summaries.json] [--db data/summaries.db]
+
+Records that already exist in the database (same id) are skipped, so the
+script can safely be run more than once.
+"""
+import argparse
+import logging
+from pathlib import Path
+
+from storage import SQLiteHistoryStore, migrate_json_history
+
+DATA_DIR = Path(__file__).resolve().parent / "data"
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s - %(name)s - %(levelname)s - %(message)s")
+
+    parser = argparse.ArgumentParser(description="Migrate summaries.json into SQLite")
+    parser.add_argument("--json", type=Path, default=DATA_DIR / "summaries.json", help="Legacy summaries.json file")
+    parser.add_argument("--db", type=Path, default=DATA_DIR / "summaries.db", help="Target SQLite database")
+    args = parser.parse_args()
+
+    store = SQLiteHistoryStore(args.db)
+    inserted = migrate_json_history(args.json, store)
+    print(f"Migrated {inserted} summaries into {args.db} ({store.count()} total)")
+    store.close()
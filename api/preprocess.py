@@ -0,0 +1,134 @@
+import re
+import hashlib
+from collections import Counter
+from typing import Dict, List, Optional, Tuple
+
+# Rough average for English text with Gemini's tokenizer
+CHARS_PER_TOKEN = 4
+
+# Lines longer than this are treated as real content and never dropped as boilerplate
+MAX_BOILERPLATE_LINE_CHARS = 160
+
+# Short lines (menu items, bylines, share buttons) repeated at least this often are dropped
+REPEATED_LINE_MAX_CHARS = 60
+REPEATED_LINE_MIN_COUNT = 3
+
+# Navigation and footer links; a line made up only of these (and separators) is boilerplate
+_LINK_PHRASES = (
+    r"privacy policy|terms of (use|service)|cookie (policy|settings|preferences)|accept (all )?cookies|"
+    r"skip to (main )?content|share (this|on) (facebook|twitter|linkedin|whatsapp|x)|advertisement|"
+    r"sign in|log in|sign up|register|menu|search|home|close|share|print|email|"
+    r"(previous|next) (article|post|page)|back to top|read more|related (articles|posts)"
+)
+
+# Cookie, newsletter and social notices: the opening phrase followed by at most one short clause
+_NOTICE_PHRASES = (
+    r"we use cookies|this (web)?site uses cookies|(subscribe to|sign up for) (our )?newsletter|follow us on"
+)
+
+# Every pattern matches the whole line, so a sentence that merely mentions a privacy
+# policy or cookies, or a longer line that happens to start like a notice, is kept
+_BOILERPLATE = re.compile(
+    rf"^\W*({_LINK_PHRASES})(\W+({_LINK_PHRASES}))*\W*$|"
+    r"^(©|\(c\)|copyright).{0,100}all rights reserved\W*$|^all rights reserved\W*$|"
+    rf"^({_NOTICE_PHRASES})\b[^.!?]{{0,80}}\W*$",
+    re.IGNORECASE,
+)
+
+
+def estimate_tokens(text: str) -> int:
+    """Cheap token estimate used for budgeting (no tokenizer round trip)"""
+    return (len(text) + CHARS_PER_TOKEN - 1) // CHARS_PER_TOKEN
+
+
+def _paragraphs(content: str) -> List[List[str]]:
+    """Group whitespace-normalized lines into paragraphs separated by blank lines"""
+    paragraphs: List[List[str]] = []
+    current: List[str] = []
+    for raw_line in content.splitlines():
+        line = " ".join(raw_line.split())
+        if line:
+            current.append(line)
+        elif current:
+            paragraphs.append(current)
+            current = []
+    if current:
+        paragraphs.append(current)
+    return paragraphs
+
+
+def preprocess_content(content: str, token_budget: int,
+                       chunked_above_chars: Optional[int] = None) -> Tuple[str, Dict[str, int]]:
+    """Strip whitespace runs, boilerplate and duplicate paragraphs, then trim to token_budget
+
+    Cleaned text longer than chunked_above_chars is summarized in chunks, so
+    every part of it is read; it is returned whole rather than trimmed. Runs in
+    linear time over the input. Returns the cleaned text and a stats dict with
+    the bytes and estimated tokens saved.
+    """
+    paragraphs = _paragraphs(content)
+
+    short_line_counts = Counter(
+        line.lower()
+        for paragraph in paragraphs
+        for line in paragraph
+        if len(line) <= REPEATED_LINE_MAX_CHARS
+    )
+
+    seen = set()
+    kept: List[str] = []
+    lines_removed = 0
+    duplicates_removed = 0
+    for paragraph in paragraphs:
+        lines = []
+        for line in paragraph:
+            if len(line) <= MAX_BOILERPLATE_LINE_CHARS and (
+                _BOILERPLATE.search(line)
+                or (len(line) <= REPEATED_LINE_MAX_CHARS
+                    and short_line_counts[line.lower()] >= REPEATED_LINE_MIN_COUNT)
+            ):
+                lines_removed += 1
+                continue
+            lines.append(line)
+        if not lines:
+            continue
+
+        text = "\n".join(lines)
+        fingerprint = hashlib.blake2b(text.lower().encode("utf-8"), digest_size=16).digest()
+        if fingerprint in seen:
+            duplicates_removed += 1
+            continue
+        seen.add(fingerprint)
+        kept.append(text)
+
+    # Trim to the budget at a paragraph boundary where possible
+    max_chars = token_budget * CHARS_PER_TOKEN
+    kept_chars = sum(len(text) for text in kept) + 2 * max(len(kept) - 1, 0)
+    if chunked_above_chars is not None and kept_chars > chunked_above_chars:
+        max_chars = kept_chars
+    trimmed: List[str] = []
+    total = 0
+    truncated = False
+    for text in kept:
+        separator = 2 if trimmed else 0
+        if total + separator + len(text) > max_chars:
+            if not trimmed:
+                trimmed.append(text[:max_chars])
+            truncated = True
+            break
+        trimmed.append(text)
+        total += separator + len(text)
+
+    result = "\n\n".join(trimmed)
+    original_bytes = len(content.encode("utf-8"))
+    result_bytes = len(result.encode("utf-8"))
+    stats = {
+        "original_bytes": original_bytes,
+        "bytes_saved": original_bytes - result_bytes,
+        "original_tokens": estimate_tokens(content),
+        "tokens_saved": estimate_tokens(content) - estimate_tokens(result),
+        "boilerplate_lines_removed": lines_removed,
+        "duplicate_paragraphs_removed": duplicates_removed,
+        "truncated": int(truncated),
+    }
+    return result, stats
@@ -0,0 +1,211 @@
+import json
+from typing import Any, Dict, List, Tuple
+
+_WHITESPACE = " \t\r\n"
+_ESCAPABLE = '"\\/bfnrtu'
+_CONTROL_ESCAPES = {"\n": "\\n", "\r": "\\r", "\t": "\\t", "\b": "\\b", "\f": "\\f"}
+
+
+class ResponseParseError(ValueError):
+    """Model output could not be turned into a JSON object"""
+
+
+def _next_significant(text: str, i: int) -> Tuple[str, int]:
+    """Return the next non-whitespace character at or after i (or '' at the end) and its index"""
+    n = len(text)
+    while i < n and text[i] in _WHITESPACE:
+        i += 1
+    return (text[i], i) if i < n else ("", n)
+
+
+def _closes_string(text: str, i: int) -> Tuple[bool, bool]:
+    """Decide whether the quote at text[i] ends the current string or is an unescaped quote inside it
+
+    Returns (closes, missing_comma). A quote followed by a line break and
+    another quoted string is treated as the end of a value with a missing comma.
+    """
+    ch, j = _next_significant(text, i + 1)
+    if ch in ("", ":", "}", "]"):
+        return True, False
+    if ch == ",":
+        after, _ = _next_significant(text, j + 1)
+        return after in ("", '"', "'", "}", "]", "{", "["), False
+    if ch in ('"', "'") and "\n" in text[i + 1:j]:
+        return True, True
+    return False, False
+
+
+def repair_json(text: str) -> Tuple[str, List[str]]:
+    """Rewrite near-JSON model output into valid JSON in a single left-to-right pass
+
+    Handles leading prose or code fences, single-quoted strings, unescaped
+    quotes and raw newlines inside strings, invalid escapes, trailing commas
+    and output truncated mid-object. Returns the repaired text and the list of
+    repairs that were applied.
+    """
+    repairs = set()
+    start = text.find("{")
+    if start < 0:
+        raise ResponseParseError("No JSON object found in response")
+    if text[:start].strip():
+        repairs.add("leading_text")
+
+    out: List[str] = []
+    stack: List[str] = []
+    quote = ""               # quote character of the string being read, "" when outside strings
+    string_start = 0         # index in out where the current string began
+    expect_key = False       # the next string in the current object is a key
+    pending_key_at = -1      # index in out of a key still waiting for its value
+    last_sig = ""            # last significant character written outside strings
+
+    i = start
+    n = len(text)
+    while i < n:
+        ch = text[i]
+
+        if quote:
+            if ch == "\\":
+                nxt = text[i + 1] if i + 1 < n else ""
+                if nxt and nxt in _ESCAPABLE and nxt != "u":
+                    out.append(ch + nxt)
+                    i += 2
+                    continue
+                if nxt == "u" and i + 6 <= n and all(c in "0123456789abcdefABCDEF" for c in text[i + 2:i + 6]):
+                    out.append(text[i:i + 6])
+                    i += 6
+                    continue
+                if not nxt:
+                    # Truncated in the middle of an escape sequence
+                    i += 1
+                    continue
+                # Invalid escape such as \' - drop the backslash and read the character normally
+                repairs.add("invalid_escape")
+                i += 1
+                continue
+            closes, missing_comma = _closes_string(text, i) if ch == quote else (False, False)
+            if closes:
+                out.append('"')
+                quote = ""
+                if expect_key:
+                    pending_key_at = string_start
+                    expect_key = False
+                last_sig = '"'
+                if missing_comma:
+                    repairs.add("missing_comma")
+                    out.append(",")
+                    last_sig = ","
+                    expect_key = bool(stack) and stack[-1] == "}"
+            elif ch == '"':
+                # Either an embedded quote, or the quote style differs from the opening one
+                if quote == '"':
+                    repairs.add("escaped_quote")
+                out.append('\\"')
+            elif ch in _CONTROL_ESCAPES:
+                repairs.add("control_character")
+                out.append(_CONTROL_ESCAPES[ch])
+            elif ord(ch) < 0x20:
+                repairs.add("control_character")
+                out.append(f"\\u{ord(ch):04x}")
+            else:
+                out.append(ch)
+            i += 1
+            continue
+
+        if ch == '"' or ch == "'":
+            if ch == "'":
+                repairs.add("single_quotes")
+            quote = ch
+            string_start = len(out)
+            if not expect_key:
+                pending_key_at = -1
+            out.append('"')
+        elif ch in "{[":
+            pending_key_at = -1
+            stack.append("}" if ch == "{" else "]")
+            expect_key = ch == "{"
+            out.append(ch)
+            last_sig = ch
+        elif ch in "}]":
+            if last_sig == ",":
+                repairs.add("trailing_comma")
+                while out and out[-1] != ",":
+                    out.pop()
+                out.pop()
+            if not stack:
+                break
+            out.append(stack.pop())
+            last_sig = out[-1]
+            expect_key = False
+            pending_key_at = -1
+            if not stack:
+                i += 1
+                break
+        elif ch == ",":
+            out.append(ch)
+            last_sig = ch
+            expect_key = bool(stack) and stack[-1] == "}"
+            pending_key_at = -1
+        elif ch == ":":
+            out.append(ch)
+            last_sig = ch
+        elif ch in _WHITESPACE:
+            out.append(ch)
+        elif ch == "`":
+            # Stray code fence inside the object
+            repairs.add("leading_text")
+        else:
+            out.append(ch)
+            last_sig = ch
+            pending_key_at = -1
+        i += 1
+
+    if stack or quote:
+        repairs.add("truncated")
+        if quote:
+            out.append('"')
+            last_sig = '"'
+            if expect_key:
+                pending_key_at = string_start
+        if pending_key_at >= 0 and last_sig in ('"', ":"):
+            # A key with no value: drop it together with the separator before it
+            del out[pending_key_at:]
+            while out and out[-1] in _WHITESPACE + ",":
+                out.pop()
+        else:
+            while out and out[-1] in _WHITESPACE:
+                out.pop()
+            if out and out[-1] == ",":
+                out.pop()
+            elif out and out[-1] == ":":
+                out.append("null")
+        out.extend(reversed(stack))
+    elif text[i:].strip(" \t\r\n`"):
+        repairs.add("trailing_text")
+
+    return "".join(out), sorted(repairs)
+
+
+def parse_summary_json(text: str) -> Tuple[Dict[str, Any], List[str]]:
+    """Parse the JSON object in model output, repairing it if needed
+
+    Returns (object, repairs). Raises ResponseParseError when the output is
+    unrecoverable, which callers can treat as a signal to retry the model.
+    """
+    start = text.find("{")
+    end = text.rfind("}")
+    if start >= 0 and end > start:
+        try:
+            data = json.loads(text[start:end + 1])
+            if isinstance(data, dict):
+                return data, [] if not text[:start].strip() else ["leading_text"]
+        except json.JSONDecodeError:
+            pass
+
+    repaired, repairs = repair_json(text)
+    try:
+        data = json.loads(repaired)
+    except json.JSONDecodeError as e:
+        raise ResponseParseError(f"Unrecoverable JSON after repairs {repairs}: {str(e)}")
+    if not isinstance(data, dict):
+        raise ResponseParseError(f"Expected a JSON object but got {type(data).__name__}")
+    return data, repairs
@@ -0,0 +1,94 @@
+import sys
+import time
+import logging
+from datetime import datetime, timedelta
+from typing import Any, Dict, Optional
+
+from storage import HistoryStore
+
+try:
+    import resource
+except ImportError:  # Windows
+    resource = None
+
+logger = logging.getLogger(__name__)
+
+
+def process_rss() -> Optional[int]:
+    """Resident set size of this process in bytes, or None where it cannot be measured
+
+    Read from /proc where available; elsewhere falls back to the peak RSS.
+    """
+    if resource is None:
+        return None
+    try:
+        with open("/proc/self/statm") as f:
+            return int(f.read().split()[1]) * resource.getpagesize()
+    except (OSError, ValueError, IndexError):
+        peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        # ru_maxrss is in bytes on macOS and in kilobytes elsewhere
+        return peak if sys.platform == "darwin" else peak * 1024
+
+
+class RetentionPolicy:
+    """Limits on how much history is kept
+
+    max_entries keeps only that many of the newest summaries and max_age_days
+    drops summaries older than that; 0 disables either limit. latest_per_url
+    keeps only the newest summary per page and length.
+    """
+
+    def __init__(self, max_entries: int = 0, max_age_days: float = 0, latest_per_url: bool = False):
+        self.max_entries = max_entries
+        self.max_age_days = max_age_days
+        self.latest_per_url = latest_per_url
+
+    @property
+    def enabled(self) -> bool:
+        return bool(self.max_entries or self.max_age_days or self.latest_per_url)
+
+    def created_before(self, now: Optional[datetime] = None) -> Optional[str]:
+        """ISO timestamp before which summaries are too old to keep, or None"""
+        if not self.max_age_days:
+            return None
+        return ((now or datetime.now()) - timedelta(days=self.max_age_days)).isoformat()
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "max_entries": self.max_entries,
+            "max_age_days": self.max_age_days,
+            "latest_per_url": self.latest_per_url,
+        }
+
+
+def compact_history(store: HistoryStore, policy: RetentionPolicy, vacuum: bool = False) -> Dict[str, Any]:
+    """Apply the retention policy, then compact the store
+
+    vacuum lets the store rebuild its file to give free space back; see
+    HistoryStore.compact for the locking this implies. Returns a report with the number of summaries removed and the store's disk
+    usage and the process RSS before and after.
+    """
+    start = time.perf_counter()
+    before = {"entries": store.count(), "disk_bytes": store.disk_usage(), "rss_bytes": process_rss()}
+    deleted = 0
+    if policy.enabled:
+        deleted = store.apply_retention(
+            max_entries=policy.max_entries or None,
+            created_before=policy.created_before(),
+            latest_per_url=policy.latest_per_url,
+        )
+    store.compact(vacuum=vacuum)
+    after = {"entries": store.count(), "disk_bytes": store.disk_usage(), "rss_bytes": process_rss()}
+    report = {
+        "finished_at": datetime.now().isoformat(),
+        "duration_seconds": round(time.perf_counter() - start, 3),
+        "deleted": deleted,
+        "before": before,
+        "after": after,
+    }
+    logger.info(
+        f"History compaction removed {deleted} summaries: {before['entries']} -> {after['entries']} entries, "
+        f"disk {before['disk_bytes']} -> {after['disk_bytes']} bytes, "
+        f"RSS {before['rss_bytes']} -> {after['rss_bytes']} bytes"
+    )
+    return report
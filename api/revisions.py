@@ -0,0 +1,82 @@
+import re
+import difflib
+import hashlib
+from typing import Any, Dict, List, Tuple
+
+# Bytes kept per paragraph hash
+PARAGRAPH_HASH_BYTES = 8
+# Characters of unchanged text shown on each side of a change, so the model can place it
+CONTEXT_CHARS = 300
+
+# Numbers that change without the page changing: clock times, dates, "5 minutes ago" and
+# counters such as "1,234 views". Other numbers (prices, scores, figures) are real edits.
+_VOLATILE_NUMBER = re.compile(
+    r"\b\d{1,2}:\d{2}(:\d{2})?(\s?[ap]\.?m\b\.?)?|"
+    r"\b\d{4}-\d{2}-\d{2}([t ]\d{2}:\d{2}(:\d{2}(\.\d+)?)?(z|[+-]\d{2}:?\d{2})?)?\b|"
+    r"\b\d{1,2}/\d{1,2}/\d{2,4}\b|"
+    r"\b\d+\s?(seconds?|secs?|minutes?|mins?|hours?|hrs?|days?|weeks?|months?|years?|[smhdw])\s+ago\b|"
+    r"\b\d[\d,.]*\s?[km]?\s+(views|comments|likes|shares|reads|replies|followers|reactions|votes|points|"
+    r"upvotes|retweets|reposts|subscribers|watching|online)\b|"
+    r"\b(viewed|read|played|shared|downloaded) \d[\d,.]*\s?[km]? times\b"
+)
+
+
+def mask_volatile_numbers(text: str) -> str:
+    """Replace timestamps, relative ages and counters in lower-cased text by 0
+
+    Used wherever pages are compared, so view counts and "updated 5 minutes
+    ago" lines do not make a page look different, while any other changed
+    number (a price, a score, a figure) does.
+    """
+    return _VOLATILE_NUMBER.sub("0", text)
+
+
+def _normalize(paragraph: str) -> str:
+    """Lower-cased paragraph with whitespace collapsed and volatile numbers masked"""
+    return mask_volatile_numbers(" ".join(paragraph.lower().split()))
+
+
+def paragraph_hashes(paragraphs: List[str]) -> bytes:
+    """PARAGRAPH_HASH_BYTES-byte hash of each normalized paragraph, concatenated in document order"""
+    return b"".join(
+        hashlib.blake2b(_normalize(p).encode("utf-8"), digest_size=PARAGRAPH_HASH_BYTES).digest()
+        for p in paragraphs
+    )
+
+
+def _split_hashes(hashes: bytes) -> List[bytes]:
+    return [hashes[i:i + PARAGRAPH_HASH_BYTES] for i in range(0, len(hashes), PARAGRAPH_HASH_BYTES)]
+
+
+def diff_paragraphs(previous: bytes, paragraphs: List[str]) -> Tuple[List[Dict[str, Any]], float]:
+    """Compare paragraphs against the hashes of an earlier version of the same page
+
+    Returns (changes, changed ratio). Each change is a dict with "text" (the new
+    paragraphs, empty for a pure removal), "removed" (how many earlier paragraphs
+    it replaces), and "before"/"after" (the unchanged text around it). The ratio
+    is the larger of the share of current characters that are new and the share
+    of earlier paragraphs that are gone, so 0.0 means nothing meaningful changed.
+    """
+    old = _split_hashes(previous)
+    new = _split_hashes(paragraph_hashes(paragraphs))
+    matcher = difflib.SequenceMatcher(None, old, new, autojunk=False)
+
+    changes = []
+    new_chars = removed = 0
+    for tag, old_start, old_end, new_start, new_end in matcher.get_opcodes():
+        if tag == "equal":
+            continue
+        text = "\n\n".join(paragraphs[new_start:new_end])
+        new_chars += len(text)
+        removed += old_end - old_start
+        changes.append({
+            "text": text,
+            "removed": old_end - old_start,
+            "before": paragraphs[new_start - 1][-CONTEXT_CHARS:] if new_start > 0 else "",
+            "after": paragraphs[new_end][:CONTEXT_CHARS] if new_end < len(paragraphs) else "",
+        })
+
+    total_chars = sum(len(p) for p in paragraphs)
+    ratio = max(new_chars / total_chars if total_chars else 0.0, removed / len(old) if old else 1.0)
+    return changes, min(ratio, 1.0)
+
@@ -0,0 +1,90 @@
+import re
+import struct
+import hashlib
+from typing import List, Sequence, Set
+
+from revisions import mask_volatile_numbers
+
+# MinHash signature size (one-permutation hashing: one bin per value)
+SIGNATURE_SIZE = 64
+# LSH banding: 16 bands of 4 values. Pages with Jaccard similarity 0.7 share at least
+# one band with probability 0.99, pages at 0.3 with probability 0.12
+LSH_BANDS = 16
+SHINGLE_WORDS = 3
+
+_WORD = re.compile(r"\w+", re.UNICODE)
+_EMPTY = 0xFFFFFFFF
+_BAND_ROWS = SIGNATURE_SIZE // LSH_BANDS
+
+
+def shingles(text: str, size: int = SHINGLE_WORDS) -> Set[str]:
+    """Overlapping word n-grams of the lower-cased text, with volatile numbers replaced by 0
+
+    Timestamps, view and comment counts do not make otherwise identical pages
+    look different; pages whose other figures differ are not duplicates.
+    """
+    words = _WORD.findall(mask_volatile_numbers(text.lower()))
+    if len(words) <= size:
+        return {" ".join(words)} if words else set()
+    return {" ".join(words[i:i + size]) for i in range(len(words) - size + 1)}
+
+
+def content_fingerprint(text: str) -> bytes:
+    """MinHash signature of the text's shingles, SIGNATURE_SIZE 32-bit values packed little-endian
+
+    Uses one hash per shingle: the low bits pick a bin and each bin keeps the
+    smallest remaining value. Empty bins (short texts) borrow the next
+    non-empty bin's value, offset by the distance, so signatures stay comparable.
+    """
+    features = shingles(text)
+    digests = b"".join(hashlib.blake2b(f.encode("utf-8"), digest_size=8).digest() for f in features)
+    bin_bits = SIGNATURE_SIZE.bit_length() - 1
+    signature = [_EMPTY] * SIGNATURE_SIZE
+    for value in struct.unpack(f"<{len(features)}Q", digests):
+        index = value & (SIGNATURE_SIZE - 1)
+        value = (value >> bin_bits) & 0xFFFFFFFE
+        if value < signature[index]:
+            signature[index] = value
+
+    if _EMPTY in signature and len(set(signature)) > 1:
+        filled = list(signature)
+        for index, value in enumerate(signature):
+            distance = 1
+            while value == _EMPTY:
+                value = signature[(index + distance) % SIGNATURE_SIZE]
+                if value != _EMPTY:
+                    value = ((value + distance) & 0xFFFFFFFF) | 1
+                distance += 1
+            filled[index] = value
+        signature = filled
+    return struct.pack(f"<{SIGNATURE_SIZE}I", *signature)
+
+
+def estimate_similarity(a: bytes, b: bytes) -> float:
+    """Estimated Jaccard similarity of two fingerprints: the fraction of equal values"""
+    values_a = struct.unpack(f"<{SIGNATURE_SIZE}I", a)
+    values_b = struct.unpack(f"<{SIGNATURE_SIZE}I", b)
+    return sum(x == y for x, y in zip(values_a, values_b)) / SIGNATURE_SIZE
+
+
+def band_keys(scope: str, fingerprint: bytes) -> List[int]:
+    """One signed 64-bit LSH bucket key per band; near-duplicates in the same scope share at least one"""
+    keys = []
+    band_bytes = _BAND_ROWS * 4
+    for band in range(LSH_BANDS):
+        digest = hashlib.blake2b(digest_size=8)
+        digest.update(scope.encode("utf-8"))
+        digest.update(bytes((band,)))
+        digest.update(fingerprint[band * band_bytes:(band + 1) * band_bytes])
+        keys.append(int.from_bytes(digest.digest(), "little", signed=True))
+    return keys
+
+
+def best_match(fingerprint: bytes, candidates: Sequence[tuple], threshold: float) -> tuple:
+    """Pick the (id, fingerprint) candidate most similar to fingerprint; returns (id, score) or (None, 0.0)"""
+    best_id, best_score = None, 0.0
+    for candidate_id, candidate in candidates:
+        score = estimate_similarity(fingerprint, candidate)
+        if score >= threshold and score > best_score:
+            best_id, best_score = candidate_id, score
+    return best_id, best_score
@@ -0,0 +1,962 @@
+import os
+import re
+import json
+import uuid
+import zlib
+import shutil
+import sqlite3
+import logging
+import threading
+from pathlib import Path
+from datetime import datetime
+from typing import Optional, List, Dict, Any, Iterable, Iterator, Sequence, Tuple
+
+from file_locks import exclusive_lock
+from similarity import SIGNATURE_SIZE, band_keys, best_match
+from revisions import PARAGRAPH_HASH_BYTES
+
+logger = logging.getLogger(__name__)
+
+# Fields a history record can be projected to
+HISTORY_FIELDS = ("id", "url", "title", "length", "created_at", "summary", "content_preview")
+SUMMARY_LENGTHS = ("short", "medium", "long")
+
+# Durability policies: fsync on every commit, on a timer (HistoryStore.sync), or leave it to the OS
+DURABILITY_POLICIES = ("always", "interval", "never")
+
+# BM25 column weights for search: title, summary main text, key points, content preview
+SEARCH_WEIGHTS = (10.0, 4.0, 3.0, 1.0)
+# Ranking costs a lookup per matching summary, so queries matching more than this
+# many summaries only rank the most recently saved ones
+SEARCH_MAX_RANKED = 2000
+_SEARCH_TOKEN = re.compile(r"\w+", re.UNICODE)
+# Near-duplicate lookups verify at most this many LSH candidates
+SIMILARITY_MAX_CANDIDATES = 100
+# Retention deletes and recompression run in transactions of at most this many rows,
+# so writers from other requests and workers are never held up for long
+COMPACTION_BATCH_SIZE = 1000
+# Compaction rebuilds the database file (when allowed to) once at least this share of its pages are free
+VACUUM_FREE_RATIO = 0.2
+# created_at is stored as naive local time with microseconds, so timestamps compare correctly as text
+_DIGIT = "[0-9]"
+_CANONICAL_TIMESTAMP = f"{_DIGIT * 4}-{_DIGIT * 2}-{_DIGIT * 2}T{_DIGIT * 2}:{_DIGIT * 2}:{_DIGIT * 2}.{_DIGIT * 6}"
+
+
+def normalize_timestamp(value: str) -> str:
+    """ISO timestamp in the form created_at is stored in; values that do not parse are returned unchanged
+
+    Offsets are converted to local time, the zone new summaries are saved in.
+    """
+    try:
+        timestamp = datetime.fromisoformat(value)
+    except (TypeError, ValueError):
+        return value
+    if timestamp.tzinfo is not None:
+        timestamp = timestamp.astimezone().replace(tzinfo=None)
+    return timestamp.isoformat(timespec="microseconds")
+
+
+def build_match_query(query: str) -> str:
+    """Turn free text into an FTS5 query matching every word, each as a prefix
+
+    Words are quoted so FTS5 operators in user input are treated as text.
+    Single characters are matched exactly, since a one-letter prefix matches
+    most of the index.
+    """
+    terms = []
+    for token in _SEARCH_TOKEN.findall(query):
+        terms.append(f'"{token}"*' if len(token) > 1 else f'"{token}"')
+    return " ".join(terms)
+
+
+def _is_hex(value: Any, multiple_of: int) -> bool:
+    if not isinstance(value, str) or len(value) % (2 * multiple_of):
+        return False
+    try:
+        bytes.fromhex(value)
+    except ValueError:
+        return False
+    return True
+
+
+def history_record_error(record: Any) -> Optional[str]:
+    """Why record cannot be stored as a history record, or None if it can
+
+    Checks everything the API relies on when serving a stored record: the
+    summary must be a valid SummaryResponse, the length one of the summary
+    lengths, created_at an ISO timestamp, and a fingerprint or paragraph hashes
+    must have the size this version computes.
+    """
+    if not isinstance(record, dict):
+        return "not a JSON object"
+    for key in ("id", "url", "length", "created_at"):
+        if not isinstance(record.get(key), str) or not record[key]:
+            return f"{key} must be a non-empty string"
+    if record["length"] not in SUMMARY_LENGTHS:
+        return f"length must be one of: {', '.join(SUMMARY_LENGTHS)}"
+    try:
+        datetime.fromisoformat(record["created_at"])
+    except ValueError:
+        return "created_at must be an ISO timestamp"
+    for key in ("title", "content_preview"):
+        if record.get(key) is not None and not isinstance(record[key], str):
+            return f"{key} must be a string"
+    summary = record.get("summary")
+    if not isinstance(summary, dict):
+        return "summary must be an object"
+    if not isinstance(summary.get("main"), str):
+        return "summary.main must be a string"
+    if summary.get("title") is not None and not isinstance(summary["title"], str):
+        return "summary.title must be a string"
+    key_points = summary.get("keyPoints")
+    if key_points is not None and not (isinstance(key_points, list)
+                                       and all(isinstance(point, str) for point in key_points)):
+        return "summary.keyPoints must be a list of strings"
+    if summary.get("variants") is not None and not isinstance(summary["variants"], dict):
+        return "summary.variants must be an object"
+    if record.get("fingerprint") is not None and not (
+            _is_hex(record["fingerprint"], 4 * SIGNATURE_SIZE) and len(record["fingerprint"]) == 8 * SIGNATURE_SIZE):
+        return f"fingerprint must be {4 * SIGNATURE_SIZE} hex-encoded bytes"
+    if record.get("paragraphs") is not None and not _is_hex(record["paragraphs"], PARAGRAPH_HASH_BYTES):
+        return f"paragraphs must be hex-encoded {PARAGRAPH_HASH_BYTES}-byte hashes"
+    return None
+
+
+def encode_summary(summary: Dict[str, Any], compress: bool) -> Any:
+    """Serialize a summary for storage: JSON text, or zlib-compressed JSON bytes"""
+    text = json.dumps(summary, separators=(",", ":"))
+    return zlib.compress(text.encode("utf-8")) if compress else text
+
+
+def summary_json(value: Any) -> Any:
+    """JSON text of a stored summary, whether or not it was compressed"""
+    if isinstance(value, bytes):
+        return zlib.decompress(value).decode("utf-8")
+    return value
+
+
+def decode_summary(value: Any) -> Dict[str, Any]:
+    """Inverse of encode_summary"""
+    return json.loads(summary_json(value))
+
+
+class HistoryStore:
+    """Interface for summary history backends
+
+    Records are plain dicts shaped like SavedSummary plus content_preview, and
+    optionally a hex-encoded content fingerprint (similarity.content_fingerprint)
+    and hex-encoded paragraph hashes (revisions.paragraph_hashes).
+    """
+
+    # Whether find_similar is implemented
+    supports_similarity = False
+
+    def add(self, record: Dict[str, Any]) -> None:
+        """Insert a single summary record"""
+        self.add_many([record])
+
+    def add_many(self, records: List[Dict[str, Any]]) -> int:
+        """Insert several records in one operation; returns the number inserted"""
+        raise NotImplementedError
+
+    def get(self, summary_id: str) -> Optional[Dict[str, Any]]:
+        """Return the record with the given id, or None"""
+        raise NotImplementedError
+
+    def delete(self, summary_id: str) -> bool:
+        """Delete a record; returns False if it does not exist"""
+        raise NotImplementedError
+
+    def list_all(self) -> List[Dict[str, Any]]:
+        """Return every record, newest first"""
+        raise NotImplementedError
+
+    def iter_records(self, batch_size: int = 1000) -> Iterator[Dict[str, Any]]:
+        """Yield every record in insertion order
+
+        The SQLite backend reads batch_size records at a time, so memory does not
+        grow with the size of the history; the json backend loads its whole file.
+        Records may include their fingerprint and paragraphs.
+        """
+        raise NotImplementedError
+
+    def list_page(self, limit: int, after: Optional[Tuple[str, str]] = None,
+                  url: Optional[str] = None,
+                  fields: Sequence[str] = HISTORY_FIELDS) -> List[Dict[str, Any]]:
+        """Return up to limit records ordered by (created_at, id) descending
+
+        after is the (created_at, id) of the last record of the previous page.
+        Only the requested fields are included in each record.
+        """
+        raise NotImplementedError
+
+    def revision(self) -> str:
+        """Opaque token that changes whenever the stored history changes"""
+        raise NotImplementedError
+
+    def count(self) -> int:
+        """Number of stored records"""
+        raise NotImplementedError
+
+    def search(self, query: str, limit: int, offset: int = 0,
+               fields: Sequence[str] = HISTORY_FIELDS) -> List[Dict[str, Any]]:
+        """Return up to limit records matching every word of query, best match first
+
+        Each record has the requested fields plus a relevance "score" (higher is better).
+        """
+        raise NotImplementedError
+
+    def find_similar(self, fingerprint: str, length: str,
+                     threshold: float) -> Optional[Tuple[Dict[str, Any], float]]:
+        """Return the stored record of the same length most similar to fingerprint, with its score
+
+        Only records saved with a fingerprint are considered, and only if their
+        estimated similarity is at least threshold.
+        """
+        raise NotImplementedError
+
+    def find_revision(self, url: str, length: str) -> Optional[Dict[str, Any]]:
+        """Return the newest record for url and length saved with paragraph hashes, or None
+
+        The record includes its hex-encoded "paragraphs".
+        """
+        raise NotImplementedError
+
+    def apply_retention(self, max_entries: Optional[int] = None, created_before: Optional[str] = None,
+                        latest_per_url: bool = False) -> int:
+        """Delete records outside the retention limits; returns the number deleted
+
+        latest_per_url keeps only the newest record per (url, length), created_before
+        drops records created earlier than that ISO timestamp, and max_entries keeps
+        only that many of the newest records. They are applied in that order.
+        """
+        raise NotImplementedError
+
+    def compact(self, vacuum: bool = False) -> None:
+        """Reclaim space left by deleted records and compress bodies stored uncompressed
+
+        vacuum allows rebuilding the whole store to return free space to the
+        file system; backends that do so block other writers while it runs.
+        """
+        pass
+
+    def disk_usage(self) -> int:
+        """Bytes used on disk by the store"""
+        raise NotImplementedError
+
+    def sync(self) -> None:
+        """Force committed changes to stable storage"""
+        pass
+
+    def close(self) -> None:
+        pass
+
+
+class SQLiteHistoryStore(HistoryStore):
+    """History stored in SQLite (WAL mode) with indexes on id, url and created_at
+
+    Safe to share between worker processes: writes are transactions that wait
+    for each other (up to the connection timeout), and in WAL mode readers
+    never wait for writers.
+    """
+
+    SCHEMA = """
+        CREATE TABLE IF NOT EXISTS summaries (
+            id TEXT PRIMARY KEY,
+            url TEXT NOT NULL,
+            title TEXT,
+            length TEXT NOT NULL,
+            created_at TEXT NOT NULL,
+            summary TEXT NOT NULL,
+            content_preview TEXT,
+            fingerprint BLOB,
+            paragraphs BLOB
+        );
+        CREATE INDEX IF NOT EXISTS idx_summaries_created ON summaries(created_at, id);
+        CREATE INDEX IF NOT EXISTS idx_summaries_url_created ON summaries(url, created_at, id);
+
+        CREATE TABLE IF NOT EXISTS meta (
+            key TEXT PRIMARY KEY,
+            value INTEGER NOT NULL
+        );
+        INSERT OR IGNORE INTO meta (key, value) VALUES ('revision', 0);
+        CREATE TRIGGER IF NOT EXISTS summaries_revision_insert AFTER INSERT ON summaries BEGIN
+            UPDATE meta SET value = value + 1 WHERE key = 'revision';
+        END;
+        CREATE TRIGGER IF NOT EXISTS summaries_revision_delete AFTER DELETE ON summaries BEGIN
+            UPDATE meta SET value = value + 1 WHERE key = 'revision';
+        END;
+    """
+
+    # Full-text index over the searchable parts of each summary. Its rowid mirrors
+    # summaries.rowid and triggers keep it in step with inserts and deletes
+    SEARCH_SCHEMA = """
+        CREATE VIRTUAL TABLE IF NOT EXISTS summaries_fts USING fts5(
+            title, main, key_points, content_preview,
+            tokenize = 'porter unicode61 remove_diacritics 2',
+            prefix = '2 3'
+        );
+        CREATE TRIGGER IF NOT EXISTS summaries_fts_delete AFTER DELETE ON summaries BEGIN
+            DELETE FROM summaries_fts WHERE rowid = old.rowid;
+        END;
+    """
+
+    # Summary bodies may be compressed, so the insert trigger reads them through the
+    # summary_json() function every connection registers
+    SEARCH_INSERT_TRIGGER = """
+        CREATE TRIGGER summaries_fts_insert AFTER INSERT ON summaries BEGIN
+            INSERT INTO summaries_fts (rowid, title, main, key_points, content_preview)
+            VALUES (new.rowid, new.title, json_extract(summary_json(new.summary), '$.main'),
+                    (SELECT group_concat(value, ' ') FROM json_each(summary_json(new.summary), '$.keyPoints')),
+                    new.content_preview);
+        END
+    """
+
+    # LSH buckets for near-duplicate lookups: one row per band of each fingerprinted summary
+    SIMILARITY_SCHEMA = """
+        CREATE TABLE IF NOT EXISTS summary_bands (
+            band_key INTEGER NOT NULL,
+            summary_id TEXT NOT NULL,
+            PRIMARY KEY (band_key, summary_id)
+        ) WITHOUT ROWID;
+        CREATE INDEX IF NOT EXISTS idx_summary_bands_summary ON summary_bands(summary_id);
+        CREATE TRIGGER IF NOT EXISTS summary_bands_delete AFTER DELETE ON summaries BEGIN
+            DELETE FROM summary_bands WHERE summary_id = old.id;
+        END;
+    """
+
+    COLUMNS = "id, url, title, length, created_at, summary, content_preview"
+
+    supports_similarity = True
+
+    # PRAGMA synchronous per durability policy. In WAL mode NORMAL only syncs at checkpoints,
+    # so the "interval" policy relies on sync() checkpointing regularly
+    SYNCHRONOUS = {"always": "FULL", "interval": "NORMAL", "never": "OFF"}
+
+    def __init__(self, db_file: Path, durability: str = "interval", compress: bool = False):
+        self.db_file = Path(db_file)
+        self.db_file.parent.mkdir(parents=True, exist_ok=True)
+        self.synchronous = self.SYNCHRONOUS[durability]
+        self.compress = compress
+        self._local = threading.local()
+        conn = self._connect()
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.executescript(self.SCHEMA)
+        # Databases created before fingerprints and paragraph hashes were stored
+        existing = {row[1] for row in conn.execute("PRAGMA table_info(summaries)")}
+        for column in ("fingerprint", "paragraphs"):
+            if column in existing:
+                continue
+            try:
+                conn.execute(f"ALTER TABLE summaries ADD COLUMN {column} BLOB")
+            except sqlite3.OperationalError as e:
+                # Another worker opening the same database added it first
+                if "duplicate column" not in str(e):
+                    raise
+        conn.executescript(self.SIMILARITY_SCHEMA)
+        has_search_index = conn.execute(
+            "SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'summaries_fts'"
+        ).fetchone()
+        conn.executescript(self.SEARCH_SCHEMA)
+        self._ensure_search_insert_trigger(conn)
+        if not has_search_index:
+            self.rebuild_search_index()
+        logger.info(f"Opened SQLite history store at {self.db_file}")
+
+    @staticmethod
+    def _search_insert_trigger_sql(conn: sqlite3.Connection) -> Optional[str]:
+        row = conn.execute(
+            "SELECT sql FROM sqlite_master WHERE type = 'trigger' AND name = 'summaries_fts_insert'"
+        ).fetchone()
+        return row[0] if row else None
+
+    def _ensure_search_insert_trigger(self, conn: sqlite3.Connection) -> None:
+        """Create the search insert trigger, or replace one that predates compressed bodies
+
+        A schema change makes every other worker's connections re-prepare their
+        statements, so the schema is only changed when the trigger is missing or
+        outdated, never on a plain open.
+        """
+        sql = self._search_insert_trigger_sql(conn)
+        if sql is not None and "summary_json" in sql:
+            return
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            # Another worker may have replaced it while we waited for the write lock
+            sql = self._search_insert_trigger_sql(conn)
+            if sql is None or "summary_json" not in sql:
+                if sql is not None:
+                    conn.execute("DROP TRIGGER summaries_fts_insert")
+                conn.execute(self.SEARCH_INSERT_TRIGGER)
+            conn.execute("COMMIT")
+        except Exception:
+            conn.execute("ROLLBACK")
+            raise
+
+    def _connect(self) -> sqlite3.Connection:
+        # One connection per thread; FastAPI runs sync work on a threadpool
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self.db_file, timeout=30, isolation_level=None, check_same_thread=False)
+            conn.execute(f"PRAGMA synchronous={self.synchronous}")
+            conn.create_function("summary_json", 1, summary_json, deterministic=True)
+            self._local.conn = conn
+        return conn
+
+    def _to_row(self, record: Dict[str, Any]) -> tuple:
+        return (
+            record["id"],
+            record["url"],
+            record.get("title"),
+            record["length"],
+            normalize_timestamp(record["created_at"]),
+            encode_summary(record["summary"], self.compress),
+            record.get("content_preview"),
+            bytes.fromhex(record["fingerprint"]) if record.get("fingerprint") else None,
+            bytes.fromhex(record["paragraphs"]) if record.get("paragraphs") else None,
+        )
+
+    @staticmethod
+    def _from_row(row: tuple) -> Dict[str, Any]:
+        return {
+            "id": row[0],
+            "url": row[1],
+            "title": row[2],
+            "length": row[3],
+            "created_at": row[4],
+            "summary": decode_summary(row[5]),
+            "content_preview": row[6],
+        }
+
+    def add_many(self, records: List[Dict[str, Any]]) -> int:
+        if not records:
+            return 0
+        conn = self._connect()
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            cursor = conn.executemany(
+                f"INSERT OR IGNORE INTO summaries ({self.COLUMNS}, fingerprint, paragraphs) "
+                f"VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                [self._to_row(record) for record in records],
+            )
+            inserted = cursor.rowcount
+            conn.executemany(
+                "INSERT OR IGNORE INTO summary_bands (band_key, summary_id) VALUES (?, ?)",
+                [(key, record["id"])
+                 for record in records if record.get("fingerprint")
+                 for key in band_keys(record["length"], bytes.fromhex(record["fingerprint"]))],
+            )
+            conn.execute("COMMIT")
+        except Exception:
+            conn.execute("ROLLBACK")
+            raise
+        return inserted
+
+    def get(self, summary_id: str) -> Optional[Dict[str, Any]]:
+        row = self._connect().execute(
+            f"SELECT {self.COLUMNS} FROM summaries WHERE id = ?", (summary_id,)
+        ).fetchone()
+        return self._from_row(row) if row else None
+
+    def delete(self, summary_id: str) -> bool:
+        cursor = self._connect().execute("DELETE FROM summaries WHERE id = ?", (summary_id,))
+        return cursor.rowcount > 0
+
+    def list_all(self) -> List[Dict[str, Any]]:
+        rows = self._connect().execute(
+            f"SELECT {self.COLUMNS} FROM summaries ORDER BY created_at DESC, id DESC"
+        ).fetchall()
+        return [self._from_row(row) for row in rows]
+
+    def iter_records(self, batch_size: int = 1000) -> Iterator[Dict[str, Any]]:
+        last_rowid = 0
+        while True:
+            # One short query per batch, so no read transaction stays open between them. The
+            # generator may be resumed on a different thread, so the connection is looked up
+            # each time rather than held
+            rows = self._connect().execute(
+                f"SELECT rowid, {self.COLUMNS} FROM summaries WHERE rowid > ? ORDER BY rowid LIMIT ?",
+                (last_rowid, batch_size),
+            ).fetchall()
+            if not rows:
+                return
+            last_rowid = rows[-1][0]
+            for row in rows:
+                yield self._from_row(row[1:])
+
+    def list_page(self, limit: int, after: Optional[Tuple[str, str]] = None,
+                  url: Optional[str] = None,
+                  fields: Sequence[str] = HISTORY_FIELDS) -> List[Dict[str, Any]]:
+        columns = [f for f in HISTORY_FIELDS if f in fields]
+        conditions = []
+        params: List[Any] = []
+        if url is not None:
+            conditions.append("url = ?")
+            params.append(url)
+        if after is not None:
+            conditions.append("(created_at, id) < (?, ?)")
+            params.extend(after)
+        where = f"WHERE {' AND '.join(conditions)}" if conditions else ""
+        params.append(limit)
+
+        rows = self._connect().execute(
+            f"SELECT {', '.join(columns)} FROM summaries {where} "
+            f"ORDER BY created_at DESC, id DESC LIMIT ?",
+            params,
+        ).fetchall()
+
+        records = []
+        for row in rows:
+            record = dict(zip(columns, row))
+            if "summary" in record:
+                record["summary"] = decode_summary(record["summary"])
+            records.append(record)
+        return records
+
+    def revision(self) -> str:
+        row = self._connect().execute("SELECT value FROM meta WHERE key = 'revision'").fetchone()
+        return str(row[0])
+
+    def count(self) -> int:
+        return self._connect().execute("SELECT COUNT(*) FROM summaries").fetchone()[0]
+
+    def search(self, query: str, limit: int, offset: int = 0,
+               fields: Sequence[str] = HISTORY_FIELDS) -> List[Dict[str, Any]]:
+        match = build_match_query(query)
+        if not match:
+            return []
+        columns = [f for f in HISTORY_FIELDS if f in fields]
+        weights = ", ".join(str(w) for w in SEARCH_WEIGHTS)
+        conn = self._connect()
+
+        # Walking the matches newest first without ranking them is cheap; use it to find
+        # where the newest SEARCH_MAX_RANKED matches start
+        floor = conn.execute(
+            "SELECT rowid FROM summaries_fts WHERE summaries_fts MATCH ? ORDER BY rowid DESC LIMIT 1 OFFSET ?",
+            (match, SEARCH_MAX_RANKED - 1),
+        ).fetchone()
+
+        # Rank inside the FTS query and only join the page that is returned
+        rows = conn.execute(
+            f"SELECT {', '.join('s.' + c for c in columns)}, top.score FROM ("
+            f"  SELECT rowid, -bm25(summaries_fts, {weights}) AS score FROM summaries_fts"
+            f"  WHERE summaries_fts MATCH ? AND rowid >= ? ORDER BY score DESC LIMIT ? OFFSET ?"
+            f") top JOIN summaries s ON s.rowid = top.rowid ORDER BY top.score DESC",
+            (match, floor[0] if floor else 0, limit, offset),
+        ).fetchall()
+
+        records = []
+        for row in rows:
+            record = dict(zip(columns, row))
+            if "summary" in record:
+                record["summary"] = decode_summary(record["summary"])
+            record["score"] = row[-1]
+            records.append(record)
+        return records
+
+    def find_similar(self, fingerprint: str, length: str,
+                     threshold: float) -> Optional[Tuple[Dict[str, Any], float]]:
+        target = bytes.fromhex(fingerprint)
+        keys = band_keys(length, target)
+        # Candidates sharing the most bands are the likeliest matches, so a busy band
+        # cannot push the best one past the candidate limit
+        candidates = self._connect().execute(
+            f"SELECT s.id, s.fingerprint FROM ("
+            f"  SELECT summary_id, COUNT(*) AS shared FROM summary_bands"
+            f"  WHERE band_key IN ({', '.join('?' * len(keys))}) GROUP BY summary_id"
+            f") b JOIN summaries s ON s.id = b.summary_id WHERE s.length = ? ORDER BY b.shared DESC LIMIT ?",
+            (*keys, length, SIMILARITY_MAX_CANDIDATES),
+        ).fetchall()
+        best_id, score = best_match(target, candidates, threshold)
+        if best_id is None:
+            return None
+        record = self.get(best_id)
+        return (record, score) if record else None
+
+    def find_revision(self, url: str, length: str) -> Optional[Dict[str, Any]]:
+        row = self._connect().execute(
+            f"SELECT {self.COLUMNS}, paragraphs FROM summaries "
+            f"WHERE url = ? AND length = ? AND paragraphs IS NOT NULL ORDER BY created_at DESC, id DESC LIMIT 1",
+            (url, length),
+        ).fetchone()
+        if row is None:
+            return None
+        record = self._from_row(row)
+        record["paragraphs"] = row[7].hex()
+        return record
+
+    def rebuild_search_index(self) -> None:
+        """Repopulate the full-text index from the summaries table"""
+        conn = self._connect()
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            conn.execute("DELETE FROM summaries_fts")
+            conn.execute(
+                "INSERT INTO summaries_fts (rowid, title, main, key_points, content_preview) "
+                "SELECT rowid, title, json_extract(summary_json(summary), '$.main'), "
+                "(SELECT group_concat(value, ' ') FROM json_each(summary_json(summary), '$.keyPoints')), "
+                "content_preview "
+                "FROM summaries"
+            )
+            conn.execute("COMMIT")
+        except Exception:
+            conn.execute("ROLLBACK")
+            raise
+        logger.info(f"Rebuilt search index for {self.db_file}")
+
+    def _delete_where(self, condition: str, params: Sequence[Any] = ()) -> int:
+        """Delete the records matching condition, at most COMPACTION_BATCH_SIZE per transaction
+
+        The table is walked once in rowid order, so each batch picks up where the last one stopped.
+        """
+        conn = self._connect()
+        deleted = 0
+        last_rowid = 0
+        while True:
+            rowids = [row[0] for row in conn.execute(
+                f"SELECT rowid FROM summaries AS s WHERE rowid > ? AND ({condition}) ORDER BY rowid LIMIT ?",
+                (last_rowid, *params, COMPACTION_BATCH_SIZE),
+            )]
+            if not rowids:
+                return deleted
+            last_rowid = rowids[-1]
+            cursor = conn.execute(
+                f"DELETE FROM summaries AS s WHERE rowid IN ({', '.join('?' * len(rowids))}) AND ({condition})",
+                (*rowids, *params),
+            )
+            deleted += cursor.rowcount
+
+    def apply_retention(self, max_entries: Optional[int] = None, created_before: Optional[str] = None,
+                        latest_per_url: bool = False) -> int:
+        self._normalize_timestamps()
+        deleted = 0
+        if latest_per_url:
+            deleted += self._delete_where(
+                "EXISTS (SELECT 1 FROM summaries AS newer WHERE newer.url = s.url AND newer.length = s.length"
+                " AND (newer.created_at, newer.id) > (s.created_at, s.id))"
+            )
+        if created_before is not None:
+            deleted += self._delete_where("created_at < ?", (normalize_timestamp(created_before),))
+        if max_entries is not None:
+            # Everything older than the oldest record that is kept
+            oldest_kept = self._connect().execute(
+                "SELECT created_at, id FROM summaries ORDER BY created_at DESC, id DESC LIMIT 1 OFFSET ?",
+                (max_entries - 1,),
+            ).fetchone()
+            if oldest_kept is not None:
+                deleted += self._delete_where("(created_at, id) < (?, ?)", oldest_kept)
+        return deleted
+
+    def _normalize_timestamps(self) -> None:
+        """Rewrite created_at values stored in another ISO form, e.g. by an older version or an import"""
+        conn = self._connect()
+        rows = conn.execute(
+            "SELECT rowid, created_at FROM summaries WHERE created_at NOT GLOB ?", (_CANONICAL_TIMESTAMP,)
+        ).fetchall()
+        updates = [(normalize_timestamp(created_at), rowid) for rowid, created_at in rows
+                   if normalize_timestamp(created_at) != created_at]
+        for start in range(0, len(updates), COMPACTION_BATCH_SIZE):
+            conn.execute("BEGIN IMMEDIATE")
+            try:
+                conn.executemany("UPDATE summaries SET created_at = ? WHERE rowid = ?",
+                                 updates[start:start + COMPACTION_BATCH_SIZE])
+                conn.execute("COMMIT")
+            except Exception:
+                conn.execute("ROLLBACK")
+                raise
+        if updates:
+            logger.info(f"Normalized {len(updates)} created_at timestamps in {self.db_file}")
+
+    def compact(self, vacuum: bool = False) -> None:
+        conn = self._connect()
+        compressed = 0
+        if self.compress:
+            while True:
+                rows = conn.execute(
+                    "SELECT rowid, summary FROM summaries WHERE typeof(summary) = 'text' LIMIT ?",
+                    (COMPACTION_BATCH_SIZE,),
+                ).fetchall()
+                if not rows:
+                    break
+                conn.execute("BEGIN IMMEDIATE")
+                try:
+                    # Only the encoding changes, so the search index and revision stay as they are
+                    conn.executemany(
+                        "UPDATE summaries SET summary = ? WHERE rowid = ? AND typeof(summary) = 'text'",
+                        [(encode_summary(json.loads(text), True), rowid) for rowid, text in rows],
+                    )
+                    conn.execute("COMMIT")
+                except Exception:
+                    conn.execute("ROLLBACK")
+                    raise
+                compressed += len(rows)
+            if compressed:
+                logger.info(f"Compressed {compressed} stored summaries in {self.db_file}")
+
+        # Merge the full-text index segments left behind by inserts and deletes
+        conn.execute("INSERT INTO summaries_fts (summaries_fts) VALUES ('optimize')")
+        conn.execute("PRAGMA wal_checkpoint(TRUNCATE)")
+        pages = conn.execute("PRAGMA page_count").fetchone()[0]
+        free = conn.execute("PRAGMA freelist_count").fetchone()[0]
+        # Compressing rewrites every body once, which frees space spread over the whole
+        # file; rebuild it then even if the free share is still below the threshold. VACUUM
+        # holds an exclusive lock for the whole rebuild, so saves from every worker wait for
+        # it (up to the connection timeout) and it only runs when asked for
+        if vacuum and pages and (compressed or free / pages >= VACUUM_FREE_RATIO):
+            conn.execute("VACUUM")
+            conn.execute("PRAGMA wal_checkpoint(TRUNCATE)")
+            logger.info(f"Vacuumed {self.db_file}, releasing {free} of {pages} pages")
+
+    def disk_usage(self) -> int:
+        total = 0
+        for path in (self.db_file, Path(f"{self.db_file}-wal"), Path(f"{self.db_file}-shm")):
+            try:
+                total += path.stat().st_size
+            except FileNotFoundError:
+                pass
+        return total
+
+    def sync(self) -> None:
+        # A checkpoint fsyncs the WAL before copying it into the database file
+        self._connect().execute("PRAGMA wal_checkpoint(PASSIVE)")
+
+    def close(self) -> None:
+        conn = getattr(self._local, "conn", None)
+        if conn is not None:
+            conn.close()
+            self._local.conn = None
+
+
+class JSONHistoryStore(HistoryStore):
+    """Legacy backend: the whole history as one JSON array, rewritten on every change
+
+    Changes are read-modify-write cycles under a lock file, so worker processes
+    sharing the file do not overwrite each other's records. The file is only
+    ever replaced atomically, so readers take no lock and never see a partial write.
+    """
+
+    def __init__(self, summaries_file: Path, durability: str = "always"):
+        self.summaries_file = Path(summaries_file)
+        self.lock_file = self.summaries_file.with_suffix('.json.lock')
+        self.fsync = durability == "always"
+        self._lock = threading.Lock()
+        self.summaries_file.parent.mkdir(parents=True, exist_ok=True)
+        if not self.summaries_file.exists():
+            with open(self.summaries_file, 'w') as f:
+                json.dump([], f)
+            logger.info(f"Created new summaries.json file at {self.summaries_file}")
+
+    def load(self) -> List[Dict[str, Any]]:
+        """Load saved summaries from the JSON file"""
+        try:
+            if not self.summaries_file.exists():
+                logger.info(f"Summaries file does not exist at {self.summaries_file}, creating new file")
+                with open(self.summaries_file, 'w') as f:
+                    json.dump([], f)
+                return []
+
+            with open(self.summaries_file, 'r') as f:
+                try:
+                    summaries = json.load(f)
+                except json.JSONDecodeError as e:
+                    logger.error(f"Error parsing summaries file: {str(e)}")
+
+                    # Backup the corrupt file and start over
+                    backup_file = self.summaries_file.with_suffix('.json.corrupt')
+                    shutil.copy2(self.summaries_file, backup_file)
+                    with open(self.summaries_file, 'w') as f:
+                        json.dump([], f)
+                    return []
+
+            # Verify it's a list
+            if not isinstance(summaries, list):
+                logger.error(f"Summaries file contains invalid data (not a list): {type(summaries)}")
+                with open(self.summaries_file, 'w') as f:
+                    json.dump([], f)
+                return []
+
+            logger.info(f"Loaded {len(summaries)} summaries from file {self.summaries_file}")
+            return summaries
+        except Exception as e:
+            logger.error(f"Error loading summaries: {str(e)}")
+            return []
+
+    def save(self, summaries: List[Dict[str, Any]]) -> bool:
+        """Save summaries to the JSON file"""
+        try:
+            # Atomic write pattern: the previous file stays intact until the new one is
+            # complete, so no backup copy is needed; the temp name is unique per writer
+            temp_file = self.summaries_file.with_suffix(f'.{uuid.uuid4().hex}.tmp')
+            with open(temp_file, 'w') as f:
+                json.dump(summaries, f, separators=(",", ":"))
+                f.flush()
+                if self.fsync:
+                    os.fsync(f.fileno())  # Force write to disk
+            os.replace(temp_file, self.summaries_file)
+
+            logger.info(f"Saved {len(summaries)} summaries to file {self.summaries_file}")
+            return True
+        except Exception as e:
+            logger.error(f"Error saving summaries: {str(e)}")
+            return False
+
+    def add_many(self, records: List[Dict[str, Any]]) -> int:
+        if not records:
+            return 0
+        with self._lock, exclusive_lock(self.lock_file):
+            summaries = self.load()
+            existing = {s.get("id") for s in summaries}
+            new_records = [{**r, "created_at": normalize_timestamp(r["created_at"])}
+                           for r in records if r["id"] not in existing]
+            summaries.extend(new_records)
+            if not self.save(summaries):
+                raise IOError(f"Failed to save summaries to {self.summaries_file}")
+        return len(new_records)
+
+    def get(self, summary_id: str) -> Optional[Dict[str, Any]]:
+        for summary in self.load():
+            if summary.get("id") == summary_id:
+                return summary
+        return None
+
+    def delete(self, summary_id: str) -> bool:
+        with self._lock, exclusive_lock(self.lock_file):
+            summaries = self.load()
+            remaining = [s for s in summaries if s.get("id") != summary_id]
+            if len(remaining) == len(summaries):
+                return False
+            if not self.save(remaining):
+                raise IOError(f"Failed to save summaries to {self.summaries_file}")
+        return True
+
+    def list_all(self) -> List[Dict[str, Any]]:
+        summaries = self.load()
+        summaries.sort(key=lambda x: x['created_at'], reverse=True)
+        return summaries
+
+    def iter_records(self, batch_size: int = 1000) -> Iterator[Dict[str, Any]]:
+        # The whole file is one JSON array, so it has to be loaded at once
+        yield from self.load()
+
+    def list_page(self, limit: int, after: Optional[Tuple[str, str]] = None,
+                  url: Optional[str] = None,
+                  fields: Sequence[str] = HISTORY_FIELDS) -> List[Dict[str, Any]]:
+        summaries = self.load()
+        summaries.sort(key=lambda x: (x['created_at'], x['id']), reverse=True)
+        page = []
+        for summary in summaries:
+            if url is not None and summary.get("url") != url:
+                continue
+            if after is not None and (summary['created_at'], summary['id']) >= tuple(after):
+                continue
+            page.append({f: summary.get(f) for f in HISTORY_FIELDS if f in fields})
+            if len(page) >= limit:
+                break
+        return page
+
+    def revision(self) -> str:
+        try:
+            stat = self.summaries_file.stat()
+        except FileNotFoundError:
+            return "0"
+        return f"{stat.st_mtime_ns}-{stat.st_size}"
+
+    def count(self) -> int:
+        return len(self.load())
+
+    def find_revision(self, url: str, length: str) -> Optional[Dict[str, Any]]:
+        revisions = [s for s in self.load()
+                     if s.get("url") == url and s.get("length") == length and s.get("paragraphs")]
+        return max(revisions, key=lambda s: (s['created_at'], s['id']), default=None)
+
+    def apply_retention(self, max_entries: Optional[int] = None, created_before: Optional[str] = None,
+                        latest_per_url: bool = False) -> int:
+        with self._lock, exclusive_lock(self.lock_file):
+            summaries = self.load()
+            for summary in summaries:
+                summary['created_at'] = normalize_timestamp(summary['created_at'])
+            kept = sorted(summaries, key=lambda x: (x['created_at'], x['id']), reverse=True)
+            if latest_per_url:
+                seen = set()
+                newest = []
+                for summary in kept:
+                    key = (summary.get("url"), summary.get("length"))
+                    if key not in seen:
+                        seen.add(key)
+                        newest.append(summary)
+                kept = newest
+            if created_before is not None:
+                created_before = normalize_timestamp(created_before)
+                kept = [s for s in kept if s['created_at'] >= created_before]
+            if max_entries is not None:
+                kept = kept[:max_entries]
+            deleted = len(summaries) - len(kept)
+            if deleted and not self.save(kept):
+                raise IOError(f"Failed to save summaries to {self.summaries_file}")
+        return deleted
+
+    def disk_usage(self) -> int:
+        try:
+            return self.summaries_file.stat().st_size
+        except FileNotFoundError:
+            return 0
+
+    def sync(self) -> None:
+        with self._lock:
+            fd = os.open(self.summaries_file, os.O_RDONLY)
+            try:
+                os.fsync(fd)
+            finally:
+                os.close(fd)
+
+
+def iter_json_history(summaries_file: Path) -> Iterable[Dict[str, Any]]:
+    """Yield valid records from a legacy summaries.json file"""
+    with open(summaries_file, 'r') as f:
+        summaries = json.load(f)
+    if not isinstance(summaries, list):
+        raise ValueError(f"{summaries_file} does not contain a JSON array")
+    for record in summaries:
+        if history_record_error(record) is None:
+            yield record
+        else:
+            logger.warning(f"Skipping malformed history record: {str(record)[:100]}")
+
+
+def migrate_json_history(summaries_file: Path, store: HistoryStore, batch_size: int = 500) -> int:
+    """Copy every record from a legacy summaries.json into store; safe to re-run"""
+    inserted = 0
+    batch = []
+    for record in iter_json_history(summaries_file):
+        batch.append(record)
+        if len(batch) >= batch_size:
+            inserted += store.add_many(batch)
+            batch = []
+    inserted += store.add_many(batch)
+    logger.info(f"Migrated {inserted} summaries from {summaries_file}")
+    return inserted
+
+
+def open_history_store(backend: str, data_dir: Path, durability: str = "interval",
+                       compress: bool = False) -> HistoryStore:
+    """Create the configured history backend, migrating legacy JSON history on first use
+
+    compress stores summary bodies zlib-compressed; only the sqlite backend supports it.
+    """
+    if durability not in DURABILITY_POLICIES:
+        raise ValueError(f"Unknown durability policy: {durability}")
+    summaries_file = data_dir / "summaries.json"
+    if backend == "json":
+        return JSONHistoryStore(summaries_file, durability)
+    if backend != "sqlite":
+        raise ValueError(f"Unknown history backend: {backend}")
+
+    db_file = data_dir / "summaries.db"
+    is_new = not db_file.exists()
+    store = SQLiteHistoryStore(db_file, durability, compress)
+    if is_new and summaries_file.exists():
+        try:
+            migrate_json_history(summaries_file, store)
+        except (OSError, ValueError, json.JSONDecodeError) as e:
+            logger.error(f"Could not migrate {summaries_file}: {str(e)}")
+    return store
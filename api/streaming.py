@@ -0,0 +1,139 @@
+import json
+from typing import Any, Dict, List, Optional, Tuple
+
+# Events produced by SummaryStreamParser.feed: (name, data)
+StreamEvent = Tuple[str, Dict[str, Any]]
+
+_SIMPLE_ESCAPES = {'"': '"', '\\': '\\', '/': '/', 'b': '\b', 'f': '\f', 'n': '\n', 'r': '\r', 't': '\t'}
+
+
+class SummaryStreamParser:
+    """Incrementally extract summary fields from partial model output
+
+    Feed text as it arrives from the model. The parser walks the JSON object
+    one character at a time (ignoring anything before the first "{", such as
+    a code fence) and emits:
+
+    - ("title", {"title": ...}) once the title string is complete
+    - ("main", {"delta": ...}) for each newly decoded piece of the main text
+    - ("keyPoint", {"index": i, "text": ...}) for each completed key point
+
+    Only top-level "title", "main" and "keyPoints" are reported; the full text
+    is still parsed and validated separately once the stream ends.
+    """
+
+    def __init__(self):
+        self.text_parts: List[str] = []
+        self._started = False
+        self._stack: List[str] = []      # "{" / "[" for each open container
+        self._in_string = False
+        self._escape: Optional[str] = None
+        self._string: List[str] = []
+        self._expect_key = False         # next string in the current object is a key
+        self._key: Optional[str] = None  # last key seen at the top level
+        self._key_points = 0
+
+    @property
+    def text(self) -> str:
+        return "".join(self.text_parts)
+
+    def feed(self, chunk: str) -> List[StreamEvent]:
+        """Consume a chunk of model output and return any events it completes"""
+        self.text_parts.append(chunk)
+        events: List[StreamEvent] = []
+        main_delta: List[str] = []
+
+        for ch in chunk:
+            if not self._started:
+                if ch == '{':
+                    self._started = True
+                    self._stack.append('{')
+                    self._expect_key = True
+                continue
+
+            if self._in_string:
+                decoded = self._string_char(ch)
+                if decoded is None:
+                    continue
+                if decoded == '':  # closing quote
+                    self._in_string = False
+                    self._end_string(events, main_delta)
+                    continue
+                if self._streaming_main():
+                    main_delta.append(decoded)
+                else:
+                    self._string.append(decoded)
+                continue
+
+            if ch == '"':
+                self._in_string = True
+                self._string = []
+            elif ch in '{[':
+                self._stack.append(ch)
+                self._expect_key = ch == '{'
+            elif ch in '}]':
+                if self._stack:
+                    self._stack.pop()
+                self._expect_key = False
+            elif ch == ',':
+                self._expect_key = bool(self._stack) and self._stack[-1] == '{'
+            elif ch == ':':
+                self._expect_key = False
+
+        self._flush_main(events, main_delta)
+        return events
+
+    @staticmethod
+    def _flush_main(events: List[StreamEvent], main_delta: List[str]) -> None:
+        if main_delta:
+            events.append(("main", {"delta": "".join(main_delta)}))
+            main_delta.clear()
+
+    def _streaming_main(self) -> bool:
+        return (self._in_string and len(self._stack) == 1 and not self._expect_key
+                and self._key == "main")
+
+    def _string_char(self, ch: str) -> Optional[str]:
+        """Decode one character inside a string; '' marks the closing quote, None means 'need more input'"""
+        if self._escape is not None:
+            self._escape += ch
+            if self._escape[1] == 'u':
+                if len(self._escape) < 6:
+                    return None
+                try:
+                    decoded = chr(int(self._escape[2:], 16))
+                except ValueError:
+                    decoded = self._escape
+                self._escape = None
+                return decoded
+            decoded = _SIMPLE_ESCAPES.get(ch, ch)
+            self._escape = None
+            return decoded
+        if ch == '\\':
+            self._escape = '\\'
+            return None
+        if ch == '"':
+            return ''
+        return ch
+
+    def _end_string(self, events: List[StreamEvent], main_delta: List[str]) -> None:
+        value = "".join(self._string)
+        self._string = []
+        depth = len(self._stack)
+
+        if depth == 1 and self._expect_key:
+            self._key = value
+            self._expect_key = False
+            return
+        if depth == 1 and self._key == "title":
+            self._flush_main(events, main_delta)
+            events.append(("title", {"title": value}))
+        elif depth == 2 and self._key == "keyPoints" and self._stack[-1] == '[':
+            self._flush_main(events, main_delta)
+            events.append(("keyPoint", {"index": self._key_points, "text": value}))
+            self._key_points += 1
+
+
+def format_sse(event: str, data: Dict[str, Any]) -> str:
+    """Serialize one Server-Sent Event"""
+    return f"event: {event}\ndata: {json.dumps(data)}\n\n"
@@ -0,0 +1,177 @@
+import time
+import asyncio
+import logging
+from typing import Any, Dict, List, Optional, Tuple
+
+from storage import HistoryStore
+
+logger = logging.getLogger(__name__)
+
+
+class HistoryWriter:
+    """Write-behind queue that group-commits history records
+
+    submit() only appends to an in-memory queue; a background task drains it
+    and writes everything queued so far with one store.add_many call, so
+    concurrent requests share a single commit instead of each paying for
+    their own. Records stay queued until their commit succeeds. A failed
+    commit is retried; only if it keeps failing are the records written one by
+    one, so a single record the store rejects cannot hold up the rest.
+
+    With sync_interval set, committed changes are forced to disk with
+    store.sync() at most that often (and at the latest that long after a
+    commit); otherwise durability is whatever the store's own policy gives.
+    """
+
+    def __init__(self, store: HistoryStore, sync_interval: Optional[float] = None,
+                 max_batch: int = 500, max_pending: int = 10000, retry_delay: float = 0.5,
+                 max_retries: int = 5):
+        self.store = store
+        self.sync_interval = sync_interval
+        self.max_batch = max_batch
+        self.max_pending = max_pending
+        self.retry_delay = retry_delay
+        self.max_retries = max_retries
+        self._pending: List[Dict[str, Any]] = []
+        self._task: Optional["asyncio.Task[None]"] = None
+        self._wakeup = asyncio.Event()
+        # Records ever submitted and ever taken off the queue (written or dropped); flush()
+        # waits for the committed count to reach the submitted count at the time of the call
+        self._submitted = 0
+        self._committed = 0
+        self._flush_waiters: List[Tuple[int, "asyncio.Future[None]"]] = []
+        self._dirty = False
+        self._last_sync = time.monotonic()
+        self.commits = 0
+        self.written = 0
+        self.failures = 0
+        self.dropped = 0
+        self.syncs = 0
+
+    @property
+    def pending(self) -> int:
+        return len(self._pending)
+
+    async def submit(self, record: Dict[str, Any]) -> None:
+        """Queue a record for the next group commit"""
+        await self.submit_many([record])
+
+    async def submit_many(self, records: List[Dict[str, Any]]) -> None:
+        if not records:
+            return
+        if len(self._pending) >= self.max_pending:
+            # Backpressure: let the writer catch up rather than grow without bound
+            await self.flush()
+        self._pending.extend(records)
+        self._submitted += len(records)
+        self._wakeup.set()
+        self._ensure_running()
+
+    async def flush(self) -> None:
+        """Wait until every record submitted so far has been committed
+
+        Records submitted after the call are not waited for, so this returns
+        even while new records keep arriving.
+        """
+        target = self._submitted
+        if self._committed >= target:
+            return
+        waiter = asyncio.get_running_loop().create_future()
+        self._flush_waiters.append((target, waiter))
+        self._ensure_running()
+        await waiter
+
+    async def close(self) -> None:
+        """Commit everything still queued, sync, and stop the background task"""
+        await self.flush()
+        if self._dirty:
+            await self._sync()
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+    def stats(self) -> Dict[str, int]:
+        return {
+            "pending": len(self._pending),
+            "commits": self.commits,
+            "written": self.written,
+            "failures": self.failures,
+            "dropped": self.dropped,
+            "syncs": self.syncs,
+        }
+
+    def _ensure_running(self) -> None:
+        # Started lazily so the writer works whether or not startup hooks ran
+        if self._task is None or self._task.done():
+            self._task = asyncio.ensure_future(self._run())
+
+    async def _run(self) -> None:
+        while True:
+            timeout = None
+            if self._dirty and self.sync_interval is not None:
+                timeout = max(0.0, self._last_sync + self.sync_interval - time.monotonic())
+            try:
+                await asyncio.wait_for(self._wakeup.wait(), timeout)
+            except asyncio.TimeoutError:
+                pass
+            self._wakeup.clear()
+
+            await self._commit_pending()
+            if (self._dirty and self.sync_interval is not None
+                    and time.monotonic() - self._last_sync >= self.sync_interval):
+                await self._sync()
+
+    async def _commit_pending(self) -> None:
+        attempts = 0
+        while self._pending:
+            batch = self._pending[:self.max_batch]
+            try:
+                await asyncio.to_thread(self.store.add_many, batch)
+                self.written += len(batch)
+            except Exception as e:
+                self.failures += 1
+                attempts += 1
+                if attempts < self.max_retries:
+                    logger.error(f"History commit of {len(batch)} records failed, retrying: {str(e)}")
+                    await asyncio.sleep(self.retry_delay * attempts)
+                    continue
+                await self._commit_individually(batch)
+            attempts = 0
+            # New records are only ever appended, so the committed batch is still at the front
+            del self._pending[:len(batch)]
+            self._committed += len(batch)
+            self._wake_flushers()
+            self.commits += 1
+            self._dirty = self.sync_interval is not None
+
+    def _wake_flushers(self) -> None:
+        waiting = []
+        for target, waiter in self._flush_waiters:
+            if self._committed >= target:
+                if not waiter.done():
+                    waiter.set_result(None)
+            else:
+                waiting.append((target, waiter))
+        self._flush_waiters = waiting
+
+    async def _commit_individually(self, batch: List[Dict[str, Any]]) -> None:
+        for record in batch:
+            try:
+                await asyncio.to_thread(self.store.add_many, [record])
+                self.written += 1
+            except Exception as e:
+                self.dropped += 1
+                logger.error(f"Dropping history record {record.get('id')} that cannot be stored: {str(e)}")
+
+    async def _sync(self) -> None:
+        try:
+            await asyncio.to_thread(self.store.sync)
+            self.syncs += 1
+            self._dirty = False
+        except Exception as e:
+            logger.error(f"History sync failed: {str(e)}")
+        self._last_sync = time.monotonic()
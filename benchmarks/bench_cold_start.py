@@ -0,0 +1,99 @@
+"""
+Cold start benchmark for the summarizer API
+
+Starts fresh interpreters that import api/main.py, run the startup hooks and
+call GET /api/status, once per GEMINI_INIT mode, and reports:
+
+- import: time to import main
+- first status: time from the start of the import until /api/status has answered
+- model ready: time until the Gemini model is built and a summary could be
+  generated (lazy mode builds it on demand at that point, as the first
+  summarize request would)
+
+The real google-generativeai SDK is imported and configured with a dummy key;
+no network calls are made. --breakdown prints the slowest imports for each
+mode from python -X importtime (modules imported by main, including
+anything load() imports when the model is built at import time).
+
+Usage:
+    python benchmarks/bench_cold_start.py [--runs 5] [--breakdown]
+"""
+import os
+import sys
+import json
+import argparse
+import tempfile
+import statistics
+import subprocess
+from pathlib import Path
+
+API_DIR = Path(__file__).resolve().parent.parent / "api"
+MODES = ("eager", "background", "lazy")
+
+CHILD = """
+import time, json, logging
+start = time.perf_counter()
+import main
+imported = time.perf_counter()
+logging.disable(logging.WARNING)
+from fastapi.testclient import TestClient
+with TestClient(main.app) as client:
+    client.get("/api/status").raise_for_status()
+    first_status = time.perf_counter()
+    if main.GEMINI_INIT == "lazy":
+        main.gemini_client.load()
+    while not main.gemini_client.ready:
+        time.sleep(0.001)
+    ready = time.perf_counter()
+print(json.dumps({"import": imported - start, "first_status": first_status - start, "model_ready": ready - start}))
+"""
+
+
+def child_env(mode):
+    env = dict(os.environ)
+    env.update({
+        "GEMINI_API_KEY": "benchmark",
+        "GEMINI_INIT": mode,
+        "SUMMARIZER_DATA_DIR": tempfile.mkdtemp(prefix="summarizer-cold-"),
+        "PYTHONWARNINGS": "ignore",
+    })
+    return env
+
+
+def run_child(mode):
+    output = subprocess.run([sys.executable, "-c", CHILD], cwd=API_DIR, env=child_env(mode),
+                            capture_output=True, text=True, check=True).stdout
+    return json.loads(output.strip().splitlines()[-1])
+
+
+def slowest_imports(mode, top):
+    stderr = subprocess.run([sys.executable, "-X", "importtime", "-c", "import main"], cwd=API_DIR,
+                            env=child_env(mode), capture_output=True, text=True, check=True).stderr
+    rows = []
+    for line in stderr.splitlines():
+        if not line.startswith("import time:") or "cumulative" in line:
+            continue
+        _, cumulative, name = line[len("import time:"):].split("|")
+        # Only modules imported directly by main, so nested imports are not counted twice
+        if len(name) - len(name.lstrip()) == 3:
+            rows.append((int(cumulative), name.strip()))
+    return sorted(rows, reverse=True)[:top]
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="API cold start benchmark")
+    parser.add_argument("--runs", type=int, default=5, help="Fresh interpreters per mode")
+    parser.add_argument("--breakdown", action="store_true", help="Show the slowest imports per mode")
+    args = parser.parse_args()
+
+    print(f"{'GEMINI_INIT':<12} {'import ms':>10} {'first status ms':>16} {'model ready ms':>15}")
+    for mode in MODES:
+        runs = [run_child(mode) for _ in range(args.runs)]
+        median = {key: statistics.median(run[key] for run in runs) * 1000 for key in runs[0]}
+        print(f"{mode:<12} {median['import']:>10.0f} {median['first_status']:>16.0f} {median['model_ready']:>15.0f}")
+
+    if args.breakdown:
+        for mode in ("eager", "lazy"):
+            print(f"\nSlowest imports with GEMINI_INIT={mode}")
+            for cumulative, name in slowest_imports(mode, 8):
+                print(f"  {cumulative / 1000:>8.0f} ms  {name}")
@@ -0,0 +1,138 @@
+"""
+History export/import benchmark
+
+Fills a SQLite history store, then streams it out as NDJSON (plain and gzip)
+the way GET /api/history/export does and reads each export back in 64 KB
+chunks the way POST /api/history/import does: into an empty store, and again
+into the same store, where every record is a duplicate. Reports records per
+second, export size, and how much the process RSS grew, which should stay
+flat however many records there are.
+
+Usage:
+    python benchmarks/bench_history_io.py [--records 1000000] [--batch-size 1000]
+"""
+import sys
+import time
+import random
+import asyncio
+import logging
+import argparse
+import tempfile
+from datetime import datetime, timedelta
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent / "api"))
+
+from storage import SQLiteHistoryStore  # noqa: E402
+from history_io import export_ndjson, import_ndjson  # noqa: E402
+from retention import process_rss  # noqa: E402
+
+READ_CHUNK_BYTES = 64 * 1024
+
+
+def make_records(count, seed=0):
+    rng = random.Random(seed)
+    words = ["copyright", "patent", "trademark", "court", "license", "section", "act", "rights", "owner", "work"]
+    now = datetime.now()
+    for i in range(count):
+        yield {
+            "id": f"io-{i:08d}",
+            "url": f"https://example.com/{i}",
+            "title": f"Page {i}",
+            "summary": {"title": f"Page {i}", "main": " ".join(rng.choice(words) for _ in range(120)),
+                        "keyPoints": [" ".join(rng.choice(words) for _ in range(10)) for _ in range(3)]},
+            "created_at": (now - timedelta(seconds=i)).isoformat(),
+            "length": "medium",
+            "content_preview": " ".join(rng.choice(words) for _ in range(30)),
+        }
+
+
+def fill(store, count):
+    batch = []
+    for record in make_records(count):
+        batch.append(record)
+        if len(batch) >= 5000:
+            store.add_many(batch)
+            batch = []
+    store.add_many(batch)
+
+
+class PeakRSS:
+    """Track the highest RSS seen while sampling"""
+
+    def __init__(self):
+        self.start = process_rss() or 0
+        self.peak = self.start
+
+    def sample(self):
+        self.peak = max(self.peak, process_rss() or 0)
+
+    @property
+    def growth_mb(self):
+        return (self.peak - self.start) / 1e6
+
+
+def export_to(store, path, compress, batch_size):
+    rss = PeakRSS()
+    start = time.perf_counter()
+    with open(path, "wb") as f:
+        for i, chunk in enumerate(export_ndjson(store, compress, batch_size)):
+            f.write(chunk)
+            if i % 64 == 0:
+                rss.sample()
+    rss.sample()
+    return time.perf_counter() - start, rss.growth_mb
+
+
+async def read_chunks(path, rss):
+    with open(path, "rb") as f:
+        i = 0
+        while True:
+            chunk = f.read(READ_CHUNK_BYTES)
+            if not chunk:
+                return
+            if i % 64 == 0:
+                rss.sample()
+            i += 1
+            yield chunk
+
+
+def import_from(store, path, batch_size):
+    rss = PeakRSS()
+    start = time.perf_counter()
+    stats = asyncio.run(import_ndjson(read_chunks(path, rss), store, batch_size))
+    rss.sample()
+    return time.perf_counter() - start, rss.growth_mb, stats
+
+
+def main(args):
+    logging.disable(logging.WARNING)
+    work_dir = Path(tempfile.mkdtemp(prefix="summarizer-io-"))
+    source = SQLiteHistoryStore(work_dir / "source.db", "never")
+    start = time.perf_counter()
+    fill(source, args.records)
+    print(f"Filled {args.records} records in {time.perf_counter() - start:.1f}s")
+
+    print(f"{'operation':<22} {'format':<7} {'records/s':>11} {'seconds':>9} {'size MB':>9} {'RSS growth MB':>14}")
+    for compress in (False, True):
+        fmt = "gzip" if compress else "ndjson"
+        path = work_dir / f"export.{fmt}"
+        elapsed, growth = export_to(source, path, compress, args.batch_size)
+        size = path.stat().st_size / 1e6
+        print(f"{'export':<22} {fmt:<7} {args.records / elapsed:>11,.0f} {elapsed:>9.2f} {size:>9.1f} {growth:>14.1f}")
+
+        target = SQLiteHistoryStore(work_dir / f"target-{fmt}.db", "never")
+        for operation in ("import (empty store)", "import (duplicates)"):
+            elapsed, growth, stats = import_from(target, path, args.batch_size)
+            expected = stats["imported"] if operation.endswith("store)") else stats["duplicates"]
+            assert expected == args.records, stats
+            print(f"{operation:<22} {fmt:<7} {args.records / elapsed:>11,.0f} {elapsed:>9.2f} {'':>9} {growth:>14.1f}")
+        target.close()
+    source.close()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="History export/import benchmark")
+    parser.add_argument("--records", type=int, default=1_000_000)
+    parser.add_argument("--batch-size", type=int, default=1000, help="Records per store read and import transaction")
+    main(parser.parse_args())
@@ -0,0 +1,105 @@
+"""
+History write benchmark: per-request commits vs. write-behind group commit
+
+Saves the same number of summaries from many concurrent "requests", first by
+calling store.add directly for each one (the old request-path write) and then
+through HistoryWriter, for each backend and durability policy. Reports how
+long a request waits for its save, the total time until everything is
+committed, the number of commits, and checks that no record was lost.
+
+Usage:
+    python benchmarks/bench_history_writes.py [--records 2000] [--concurrency 64] [--json-records 300]
+"""
+import sys
+import time
+import uuid
+import asyncio
+import logging
+import argparse
+import tempfile
+from datetime import datetime
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent / "api"))
+
+from storage import open_history_store, DURABILITY_POLICIES  # noqa: E402
+from writebehind import HistoryWriter  # noqa: E402
+
+
+def make_record(i):
+    return {
+        "id": str(uuid.uuid4()),
+        "url": f"https://example.com/{i}",
+        "title": f"Page {i}",
+        "summary": {"title": f"Page {i}", "main": "Summary text. " * 30, "keyPoints": ["one", "two", "three"]},
+        "created_at": datetime.now().isoformat(),
+        "length": "medium",
+        "content_preview": "Preview text. " * 10,
+    }
+
+
+async def run_requests(save, records, concurrency):
+    """Save records from `concurrency` concurrent workers; returns per-request save latencies"""
+    queue = list(records)
+    latencies = []
+
+    async def worker():
+        while queue:
+            record = queue.pop()
+            start = time.perf_counter()
+            await save(record)
+            latencies.append(time.perf_counter() - start)
+
+    await asyncio.gather(*[worker() for _ in range(concurrency)])
+    return sorted(latencies)
+
+
+async def bench(backend, durability, mode, count, concurrency):
+    store = open_history_store(backend, Path(tempfile.mkdtemp(prefix="summarizer-writes-")), durability)
+    records = [make_record(i) for i in range(count)]
+    writer = HistoryWriter(store, sync_interval=1.0 if durability == "interval" else None)
+
+    if mode == "direct":
+        async def save(record):
+            await asyncio.to_thread(store.add, record)
+            if durability == "interval":
+                await asyncio.to_thread(store.sync)
+    else:
+        save = writer.submit
+
+    start = time.perf_counter()
+    latencies = await run_requests(save, records, concurrency)
+    await writer.close()
+    total = time.perf_counter() - start
+    stored = store.count()
+    commits = writer.commits if mode == "write-behind" else count
+    store.close()
+    return {
+        "p50_ms": latencies[len(latencies) // 2] * 1000,
+        "p99_ms": latencies[int(len(latencies) * 0.99)] * 1000,
+        "total_s": total,
+        "commits": commits,
+        "lost": count - stored,
+    }
+
+
+async def main_async(args):
+    logging.disable(logging.WARNING)
+    print(f"{args.concurrency} concurrent requests")
+    print(f"{'backend':<7} {'durability':<10} {'mode':<13} {'records':>8} {'save p50 ms':>12} {'save p99 ms':>12} "
+          f"{'total s':>8} {'commits':>8} {'lost':>5}")
+    for backend in ("sqlite", "json"):
+        count = args.records if backend == "sqlite" else args.json_records
+        for durability in DURABILITY_POLICIES:
+            for mode in ("direct", "write-behind"):
+                result = await bench(backend, durability, mode, count, args.concurrency)
+                print(f"{backend:<7} {durability:<10} {mode:<13} {count:>8} {result['p50_ms']:>12.3f} "
+                      f"{result['p99_ms']:>12.3f} {result['total_s']:>8.2f} {result['commits']:>8} {result['lost']:>5}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="History write benchmark")
+    parser.add_argument("--records", type=int, default=2000, help="Records saved per SQLite run")
+    parser.add_argument("--json-records", type=int, default=300, help="Records saved per JSON run (quadratic)")
+    parser.add_argument("--concurrency", type=int, default=64)
+    asyncio.run(main_async(parser.parse_args()))
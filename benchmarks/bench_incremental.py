@@ -0,0 +1,149 @@
+"""
+Incremental re-summarization benchmark
+
+Summarizes a set of pages, then revisits each one after an edit of a given
+size (only numbers changed, or a share of its paragraphs rewritten, inserted
+and removed), once with INCREMENTAL_UPDATES on and once with it off, against
+the fake Gemini backend. Reports how revisits were served, model calls and
+estimated prompt tokens per revisit, and revisit latency.
+
+The fake model's latency grows with the prompt (--latency plus --ms-per-1k-tokens
+for every 1000 estimated prompt tokens), since long prompts take longer to process.
+
+Usage:
+    python benchmarks/bench_incremental.py [--pages 10] [--paragraphs 60] [--latency 0.5] [--ms-per-1k-tokens 40]
+"""
+import os
+import sys
+import time
+import random
+import asyncio
+import logging
+import argparse
+import statistics
+import tempfile
+from collections import Counter
+from pathlib import Path
+
+BENCH_DIR = Path(__file__).resolve().parent
+sys.path.insert(0, str(BENCH_DIR.parent / "api"))
+sys.path.insert(0, str(BENCH_DIR))
+
+os.environ.setdefault("GEMINI_API_KEY", "benchmark")
+os.environ["SUMMARIZER_DATA_DIR"] = tempfile.mkdtemp(prefix="summarizer-incremental-")
+os.environ["RATE_LIMIT_PER_MINUTE"] = "0"
+# Revisits should be handled by the revision check, not matched as near-duplicates
+os.environ["NEAR_DUPLICATE_THRESHOLD"] = "0"
+
+import httpx  # noqa: E402
+import main  # noqa: E402
+import fake_gemini  # noqa: E402
+from preprocess import estimate_tokens  # noqa: E402
+
+# (label, share of paragraphs edited); 0 changes only the numbers on the page
+EDITS = [("numbers only", 0.0), ("1 paragraph", None), ("5% edited", 0.05), ("10% edited", 0.10),
+         ("25% edited", 0.25), ("50% edited", 0.50)]
+
+
+class CountingModel(fake_gemini.FakeModel):
+    calls = 0
+    prompt_tokens = 0
+    ms_per_1k_tokens = 0.0
+
+    async def generate_content_async(self, prompt, **kwargs):
+        tokens = estimate_tokens(prompt)
+        CountingModel.calls += 1
+        CountingModel.prompt_tokens += tokens
+        await asyncio.sleep(tokens / 1000 * self.ms_per_1k_tokens / 1000)
+        return await super().generate_content_async(prompt, **kwargs)
+
+
+class Page:
+    def __init__(self, rng, index, paragraphs):
+        self.rng = rng
+        self.url = f"https://example.com/live/{index}"
+        self.paragraphs = [self.paragraph(f"{index}-{i}") for i in range(paragraphs)]
+        self.views = 1
+
+    def paragraph(self, tag):
+        words = " ".join(f"w{self.rng.randrange(5000)}" for _ in range(self.rng.randint(60, 120)))
+        return f"Entry {tag}. {words}."
+
+    def content(self):
+        return f"Viewed {self.views} times, updated {self.rng.randint(1, 59)} minutes ago\n\n" + "\n\n".join(self.paragraphs)
+
+    def edit(self, share):
+        """Rewrite, insert and remove paragraphs; share None edits exactly one paragraph"""
+        self.views += self.rng.randint(1, 1000)
+        count = 1 if share is None else int(len(self.paragraphs) * share)
+        for n in range(count):
+            position = self.rng.randrange(len(self.paragraphs))
+            kind = n % 3
+            if kind == 0:
+                self.paragraphs[position] = self.paragraph(f"rewritten-{self.views}-{n}")
+            elif kind == 1:
+                self.paragraphs.insert(position, self.paragraph(f"inserted-{self.views}-{n}"))
+            else:
+                del self.paragraphs[position]
+
+
+async def summarize(client, page):
+    response = await client.post("/api/summarize", json={
+        "url": page.url, "title": "Live page", "content": page.content(), "length": "medium",
+    })
+    response.raise_for_status()
+    return response.headers.get("x-revision") or response.headers.get("x-cache")
+
+
+async def run(client, share, incremental, args, seed):
+    main.INCREMENTAL_UPDATES = incremental
+    rng = random.Random(seed)
+    pages = [Page(rng, f"{seed}-{i}", args.paragraphs) for i in range(args.pages)]
+    for page in pages:
+        await summarize(client, page)
+    # Revisits must see the first visits in history
+    await main.history_writer.flush()
+
+    CountingModel.calls = CountingModel.prompt_tokens = 0
+    outcomes, latencies = Counter(), []
+    for page in pages:
+        page.edit(share)
+        start = time.perf_counter()
+        outcomes[await summarize(client, page)] += 1
+        latencies.append(time.perf_counter() - start)
+    return {
+        "served": ", ".join(f"{name} {count}" for name, count in sorted(outcomes.items())),
+        "calls": CountingModel.calls / args.pages,
+        "tokens": CountingModel.prompt_tokens / args.pages,
+        "latency_ms": statistics.median(latencies) * 1000,
+    }
+
+
+async def main_async(args):
+    CountingModel.configure(latency=args.latency)
+    CountingModel.ms_per_1k_tokens = args.ms_per_1k_tokens
+    main.gemini_client.use_factory(CountingModel)
+    logging.disable(logging.WARNING)
+
+    transport = httpx.ASGITransport(app=main.app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench", timeout=None) as client:
+        print(f"{args.pages} pages of {args.paragraphs} paragraphs, each revisited once after an edit; "
+              f"fake Gemini latency {args.latency * 1000:.0f} ms + {args.ms_per_1k_tokens:.0f} ms per 1k prompt tokens; "
+              f"REVISION_MAX_CHANGED_RATIO {main.REVISION_MAX_CHANGED_RATIO}")
+        print(f"{'edit':<14} {'incremental':<12} {'calls':>6} {'prompt tokens':>14} {'latency ms':>11}  served as")
+        for seed, (label, share) in enumerate(EDITS):
+            for incremental in (False, True):
+                result = await run(client, share, incremental, args, seed * 2 + incremental)
+                print(f"{label:<14} {'on' if incremental else 'off':<12} {result['calls']:>6.1f} "
+                      f"{result['tokens']:>14,.0f} {result['latency_ms']:>11.0f}  {result['served']}")
+        await main.history_writer.close()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Incremental re-summarization benchmark")
+    parser.add_argument("--pages", type=int, default=10)
+    parser.add_argument("--paragraphs", type=int, default=60, help="Paragraphs per page (about 550 characters each)")
+    parser.add_argument("--latency", type=float, default=0.5, help="Fake Gemini base latency per call in seconds")
+    parser.add_argument("--ms-per-1k-tokens", type=float, default=40.0,
+                        help="Extra fake latency per 1000 estimated prompt tokens")
+    asyncio.run(main_async(parser.parse_args()))
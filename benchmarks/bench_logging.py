@@ -0,0 +1,166 @@
+"""
+Request-path logging overhead benchmark
+
+Replays the log calls one request makes, the way the API used to (about 15
+synchronous logger.info and print lines per summarize request written
+straight to stdout, plus a line per /api/status check) and the way it does
+now (queue-backed JSON logging via api/logconfig.py, per-step lines at debug
+level, one access line per request and sampled /api/status lines). Output
+goes to a real file so every write costs a system call, as stdout to a pipe
+or log collector does. Requests run on one thread, like the event loop, with
+--request-ms of other (GIL-releasing) work between them. Reports the time a
+request spends in log calls (p50/p99/mean), the lines written and any
+records dropped because the queue was full.
+
+Usage:
+    python benchmarks/bench_logging.py [--requests 20000] [--request-ms 0.2]
+"""
+import sys
+import time
+import logging
+import argparse
+import tempfile
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent / "api"))
+
+from logconfig import configure_logging, Sampler  # noqa: E402
+
+URL = "https://blog.example.com/articles/2024/05/a-fairly-long-article-slug-about-intellectual-property?utm_source=x"
+RESPONSE = '{"title": "Summary", "main": "' + "The article explains the law in detail. " * 150 + '", "keyPoints": ['
+
+
+def old_summarize(logger, out, request_id):
+    """Log calls of a summarize request before the logging rework (one Gemini call, history saved)"""
+    logger.info("Request: POST http://localhost:8000/api/summarize")
+    logger.info(f"[{request_id}] Summarize endpoint accessed - URL: {URL}, Length: medium")
+    logger.info(f"[{request_id}] Content length: 18234 characters")
+    logger.info(f"[{request_id}] save_history parameter: True")
+    print(f"[API] [{request_id}] Summarize request for: {URL}", file=out)
+    print(f"[API] [{request_id}] Content length: 18234 chars, Save history: True", file=out)
+    logger.info(f"[{request_id}] Preprocessing saved 1200 bytes, ~300 tokens (4 boilerplate lines, "
+                f"1 duplicate paragraphs, truncated=False)")
+    logger.info("Generated prompt for medium summary")
+    logger.info("Calling Gemini API with prompt")
+    logger.info("Received response from Gemini API")
+    logger.info("Successfully parsed JSON response")
+    logger.info(f"[{request_id}] Saving summary to history with ID: 569b5167-0dba-4d0a-b68b-6f1e45f39b93")
+    logger.info("Saved 1 summaries")
+    logger.info(f"[{request_id}] Serving summary from cache")
+
+
+def old_parse_failure(logger, out, request_id):
+    logger.error("Failed to parse JSON response: Expecting ',' delimiter")
+    logger.error(f"Problematic response (first 200 chars): {RESPONSE[:200]}")
+    logger.warning("Using fallback summary format")
+
+
+def old_status(logger, out, request_id):
+    logger.info("Request: GET http://localhost:8000/api/status")
+    logger.info("Status endpoint accessed - API is running")
+
+
+def new_summarize(logger, access, sampler, request_id):
+    """Log calls of the same summarize request now"""
+    logger.info(f"[{request_id}] Summarize request",
+                extra={"request_id": request_id, "url": URL, "length": "medium", "content_chars": 18234})
+    logger.debug(f"[{request_id}] Preprocessing saved 1200 bytes, ~300 tokens")
+    logger.debug("Generated prompt for medium summary")
+    logger.debug("Calling Gemini API with prompt")
+    logger.debug("Received response from Gemini API")
+    logger.debug("Successfully parsed JSON response")
+    logger.debug(f"[{request_id}] Saving summary to history with ID: 569b5167-0dba-4d0a-b68b-6f1e45f39b93")
+    if sampler.should_log("/api/summarize", 200):
+        access.info("POST /api/summarize 200",
+                    extra={"method": "POST", "path": "/api/summarize", "status": 200, "duration_ms": 812.4})
+
+
+def new_parse_failure(logger, access, sampler, request_id):
+    logger.error("Failed to parse JSON response, using fallback summary format: Expecting ',' delimiter",
+                 extra={"response_chars": len(RESPONSE), "response_head": RESPONSE[:200]})
+
+
+def new_status(logger, access, sampler, request_id):
+    if sampler.should_log("/api/status", 200):
+        access.info("GET /api/status 200",
+                    extra={"method": "GET", "path": "/api/status", "status": 200, "duration_ms": 0.4})
+
+
+def run(call, count, request_seconds):
+    """Call call(i) count times with request_seconds of other work in between; returns sorted latencies"""
+    latencies = []
+    for i in range(count):
+        start = time.perf_counter()
+        call(i)
+        latencies.append(time.perf_counter() - start)
+        time.sleep(request_seconds)
+    return sorted(latencies)
+
+
+def configure_old(out):
+    root = logging.getLogger()
+    for handler in list(root.handlers):
+        root.removeHandler(handler)
+    handler = logging.StreamHandler(out)
+    handler.setFormatter(logging.Formatter("%(asctime)s - %(name)s - %(levelname)s - %(message)s"))
+    root.addHandler(handler)
+    root.setLevel(logging.INFO)
+
+
+def report(name, latencies, path, dropped=0):
+    p50 = latencies[len(latencies) // 2] * 1e6
+    p99 = latencies[int(len(latencies) * 0.99)] * 1e6
+    mean = sum(latencies) / len(latencies) * 1e6
+    with open(path) as f:
+        lines = sum(1 for _ in f)
+    print(f"{name:<36} {p50:>8.1f} {p99:>8.1f} {mean:>8.1f} {lines:>8} {dropped:>8}")
+
+
+def main(args):
+    work_dir = Path(tempfile.mkdtemp(prefix="summarizer-logging-"))
+    logger = logging.getLogger("main")
+    print(f"{args.requests} requests, {args.request_ms} ms apart; parse failure on every "
+          f"{args.failure_every}th summarize, {args.status_per_request} status checks per summarize")
+    print(f"{'setup / request':<36} {'p50 us':>8} {'p99 us':>8} {'mean us':>8} {'lines':>8} {'dropped':>8}")
+    request_seconds = args.request_ms / 1000
+
+    for name, status_per_request in (("summarize", 0), ("summarize + status checks", args.status_per_request)):
+        path = work_dir / f"old-{status_per_request}.log"
+        with open(path, "w") as out:
+            configure_old(out)
+
+            def old_request(i):
+                old_summarize(logger, out, i)
+                if i % args.failure_every == 0:
+                    old_parse_failure(logger, out, i)
+                for _ in range(status_per_request):
+                    old_status(logger, out, i)
+
+            latencies = run(old_request, args.requests, request_seconds)
+        report(f"before: {name}", latencies, path)
+
+        path = work_dir / f"new-{status_per_request}.log"
+        with open(path, "w") as out:
+            pipeline = configure_logging("INFO", "json", 300, 10000, stream=out)
+            access = logging.getLogger("summarizer.access")
+            sampler = Sampler(["/", "/api/status", "/metrics"], 0.01, seed=0)
+
+            def new_request(i):
+                new_summarize(logger, access, sampler, i)
+                if i % args.failure_every == 0:
+                    new_parse_failure(logger, access, sampler, i)
+                for _ in range(status_per_request):
+                    new_status(logger, access, sampler, i)
+
+            latencies = run(new_request, args.requests, request_seconds)
+            pipeline.stop()
+        report(f"after: {name}", latencies, path, pipeline.dropped)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Logging overhead benchmark")
+    parser.add_argument("--requests", type=int, default=20000)
+    parser.add_argument("--request-ms", type=float, default=0.2, help="Other work between requests")
+    parser.add_argument("--failure-every", type=int, default=20, help="Every Nth summarize fails to parse")
+    parser.add_argument("--status-per-request", type=int, default=5, help="Status checks per summarize request")
+    main(parser.parse_args())
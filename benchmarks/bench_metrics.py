@@ -0,0 +1,71 @@
+"""
+Overhead benchmark for request-path instrumentation (api/metrics.py)
+
+Times an empty block with and without a StageTimer, counter increments and
+histogram observations, and rendering a registry populated like a busy
+server. Each stage timer should cost no more than a few microseconds.
+
+Usage:
+    python benchmarks/bench_metrics.py [--runs 200000]
+"""
+import sys
+import time
+import argparse
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent / "api"))
+
+from metrics import Registry, StageTimer, format_server_timing  # noqa: E402
+
+STAGES = ("preprocess", "cache_lookup", "gemini", "parse", "model", "history_save", "history_load")
+
+
+def per_call(fn, runs):
+    start = time.perf_counter()
+    for _ in range(runs):
+        fn()
+    return (time.perf_counter() - start) / runs
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Metrics overhead benchmark")
+    parser.add_argument("--runs", type=int, default=200_000)
+    args = parser.parse_args()
+
+    registry = Registry()
+    stages = registry.histogram("bench_stage_seconds", "Stage durations", ["stage"])
+    lookups = registry.counter("bench_lookups_total", "Lookups", ["result"])
+    calls = registry.counter("bench_calls_total", "Calls")
+    timings = {}
+
+    def baseline():
+        pass
+
+    def stage_timer():
+        with StageTimer(stages, "parse"):
+            pass
+
+    def stage_timer_with_timings():
+        with StageTimer(stages, "parse", timings):
+            pass
+
+    results = [
+        ("empty call (baseline)", per_call(baseline, args.runs)),
+        ("StageTimer", per_call(stage_timer, args.runs)),
+        ("StageTimer + per-request timings", per_call(stage_timer_with_timings, args.runs)),
+        ("Counter.inc()", per_call(calls.inc, args.runs)),
+        ("Counter.inc(label)", per_call(lambda: lookups.inc("hit"), args.runs)),
+        ("Histogram.observe", per_call(lambda: stages.observe(0.012, "gemini"), args.runs)),
+    ]
+
+    print(f"{'operation':<34} {'ns/op':>8}")
+    for name, seconds in results:
+        print(f"{name:<34} {seconds * 1e9:>8.0f}")
+
+    for stage in STAGES:
+        for i in range(1000):
+            stages.observe(i / 1000, stage)
+    render = per_call(registry.render, 1000)
+    header = per_call(lambda: format_server_timing({stage: 0.01 for stage in STAGES}), 10_000)
+    print(f"\n/metrics render ({len(registry.render().splitlines())} lines): {render * 1e6:.1f} us")
+    print(f"Server-Timing header ({len(STAGES)} stages): {header * 1e6:.2f} us")
@@ -0,0 +1,104 @@
+"""
+Multi-length generation benchmark
+
+Simulates users who summarize a page at one length and then switch to the
+other two, for each MULTI_LENGTH_MODE, against the fake Gemini backend.
+Reports model calls, prompt characters sent to the model (a proxy for input
+tokens, which dominate cost for long pages), and latency of the first
+request and of the length switches.
+
+Usage:
+    python benchmarks/bench_multi_length.py [--pages 20] [--content-chars 60000] [--latency 0.5]
+"""
+import os
+import sys
+import time
+import asyncio
+import logging
+import argparse
+import statistics
+import tempfile
+from pathlib import Path
+
+BENCH_DIR = Path(__file__).resolve().parent
+sys.path.insert(0, str(BENCH_DIR.parent / "api"))
+sys.path.insert(0, str(BENCH_DIR))
+
+os.environ.setdefault("GEMINI_API_KEY", "benchmark")
+os.environ["SUMMARIZER_DATA_DIR"] = tempfile.mkdtemp(prefix="summarizer-multi-")
+os.environ["RATE_LIMIT_PER_MINUTE"] = "0"
+# Each page is distinct, so near-duplicate reuse would only add noise
+os.environ["NEAR_DUPLICATE_THRESHOLD"] = "0"
+
+import httpx  # noqa: E402
+import main  # noqa: E402
+import fake_gemini  # noqa: E402
+
+MODES = ("off", "combined", "derive")
+
+
+class CountingModel(fake_gemini.FakeModel):
+    calls = 0
+    prompt_chars = 0
+
+    async def generate_content_async(self, prompt, **kwargs):
+        CountingModel.calls += 1
+        CountingModel.prompt_chars += len(prompt)
+        return await super().generate_content_async(prompt, **kwargs)
+
+
+def page_content(mode, page, chars):
+    sentence = f"Page {page} for the {mode} run covers topic {page * 7 % 13} in some depth. "
+    paragraphs, size = [], 0
+    while size < chars:
+        paragraph = f"Paragraph {len(paragraphs)} of page {page}. " + sentence * 8
+        paragraphs.append(paragraph)
+        size += len(paragraph) + 2
+    return "\n\n".join(paragraphs)
+
+
+async def run_mode(client, mode, args):
+    main.MULTI_LENGTH_MODE = mode
+    main.summary_cache.clear()
+    CountingModel.calls = CountingModel.prompt_chars = 0
+    first, switches = [], []
+    for page in range(args.pages):
+        content = page_content(mode, page, args.content_chars)
+        for i, length in enumerate(("short", "medium", "long")):
+            start = time.perf_counter()
+            response = await client.post("/api/summarize", json={
+                "url": f"https://example.com/{mode}/{page}", "title": "Benchmark page",
+                "content": content, "length": length,
+            })
+            response.raise_for_status()
+            (switches if i else first).append(time.perf_counter() - start)
+    return {
+        "calls": CountingModel.calls / args.pages,
+        "prompt_chars": CountingModel.prompt_chars / args.pages,
+        "first_ms": statistics.median(first) * 1000,
+        "switch_ms": statistics.median(switches) * 1000,
+    }
+
+
+async def main_async(args):
+    CountingModel.configure(latency=args.latency)
+    main.gemini_client.use_factory(CountingModel)
+    logging.disable(logging.WARNING)
+
+    transport = httpx.ASGITransport(app=main.app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench", timeout=None) as client:
+        print(f"{args.pages} pages of {args.content_chars} characters, each viewed short, then medium, then long; "
+              f"fake Gemini latency {args.latency * 1000:.0f} ms")
+        print(f"{'mode':<10} {'calls/page':>11} {'prompt chars/page':>18} {'first ms':>9} {'switch ms':>10}")
+        for mode in MODES:
+            result = await run_mode(client, mode, args)
+            print(f"{mode:<10} {result['calls']:>11.1f} {result['prompt_chars']:>18,.0f} "
+                  f"{result['first_ms']:>9.0f} {result['switch_ms']:>10.1f}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Multi-length generation benchmark")
+    parser.add_argument("--pages", type=int, default=20)
+    parser.add_argument("--content-chars", type=int, default=60_000)
+    parser.add_argument("--latency", type=float, default=0.5, help="Fake Gemini latency per call in seconds")
+    asyncio.run(main_async(parser.parse_args()))
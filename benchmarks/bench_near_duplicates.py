@@ -0,0 +1,164 @@
+"""
+Near-duplicate detection benchmark
+
+Fills a SQLite history store with fingerprinted synthetic articles (Zipf
+vocabulary, so unrelated articles still share common phrases), then submits
+altered copies of stored articles and unrelated new ones through
+HistoryStore.find_similar, and reports for each kind of change:
+
+- the median estimated similarity to the original
+- how often the stored summary would be reused at the threshold
+- lookup latency (the fingerprint is timed separately, by content size)
+
+Unrelated articles give the false reuse rate. Also reports fingerprint cost
+by content size.
+
+Usage:
+    python benchmarks/bench_near_duplicates.py [--records 20000] [--threshold 0.8] [--samples 200]
+"""
+import sys
+import time
+import random
+import logging
+import argparse
+import itertools
+import statistics
+import tempfile
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent / "api"))
+
+from storage import SQLiteHistoryStore  # noqa: E402
+from similarity import content_fingerprint  # noqa: E402
+
+VOCABULARY_SIZE = 20000
+ARTICLE_WORDS = 800
+
+
+class Corpus:
+    def __init__(self, seed):
+        self.rng = random.Random(seed)
+        letters = "abcdefghijklmnopqrstuvwxyz"
+        words = set()
+        while len(words) < VOCABULARY_SIZE:
+            words.add("".join(self.rng.choice(letters) for _ in range(self.rng.randint(2, 9))))
+        self.vocabulary = sorted(words)
+        self.cum_weights = list(itertools.accumulate(1 / (rank + 1) for rank in range(VOCABULARY_SIZE)))
+
+    def words(self, count):
+        return self.rng.choices(self.vocabulary, cum_weights=self.cum_weights, k=count)
+
+    def article(self):
+        return " ".join(self.words(ARTICLE_WORDS))
+
+
+def with_ads(corpus, text):
+    words = text.split()
+    for _ in range(3):
+        position = corpus.rng.randrange(len(words))
+        words[position:position] = ["Advertisement"] + corpus.words(8)
+    return " ".join(words)
+
+
+def with_timestamps(corpus, text):
+    return (f"Updated {corpus.rng.randint(1, 59)} minutes ago, {corpus.rng.randint(0, 999)} comments. "
+            f"{text} Last edited 2025-{corpus.rng.randint(1, 12):02d}-{corpus.rng.randint(1, 28):02d}")
+
+
+def with_comments(corpus, text):
+    return text + " Comments: " + " ".join(corpus.words(ARTICLE_WORDS // 10))
+
+
+def with_edits(fraction):
+    def edit(corpus, text):
+        words = text.split()
+        for position in corpus.rng.sample(range(len(words)), int(len(words) * fraction)):
+            words[position] = corpus.words(1)[0]
+        return " ".join(words)
+    return edit
+
+
+def with_truncation(corpus, text):
+    words = text.split()
+    return " ".join(words[:int(len(words) * 0.8)])
+
+
+VARIANTS = {
+    "ad slots": with_ads,
+    "timestamps/counts": with_timestamps,
+    "comment section": with_comments,
+    "5% words edited": with_edits(0.05),
+    "truncated to 80%": with_truncation,
+    "15% words edited": with_edits(0.15),
+    "30% words edited": with_edits(0.30),
+}
+
+
+def make_record(i, text):
+    return {
+        "id": f"near-{i:07d}",
+        "url": f"https://example.com/{i}",
+        "title": f"Article {i}",
+        "summary": {"title": f"Article {i}", "main": "Stored summary.", "keyPoints": ["one"]},
+        "created_at": f"2025-01-01T00:00:00.{i:06d}",
+        "length": "medium",
+        "content_preview": text[:200],
+        "fingerprint": content_fingerprint(text).hex(),
+    }
+
+
+def lookup(store, text, threshold):
+    """find_similar for text; returns (match, seconds spent in the lookup, excluding fingerprinting)"""
+    fingerprint = content_fingerprint(text).hex()
+    start = time.perf_counter()
+    match = store.find_similar(fingerprint, "medium", threshold)
+    return match, time.perf_counter() - start
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Near-duplicate detection benchmark")
+    parser.add_argument("--records", type=int, default=20_000)
+    parser.add_argument("--threshold", type=float, default=0.8)
+    parser.add_argument("--samples", type=int, default=200, help="Lookups per variant")
+    args = parser.parse_args()
+    logging.disable(logging.INFO)
+
+    corpus = Corpus(0)
+    store = SQLiteHistoryStore(Path(tempfile.mkdtemp(prefix="summarizer-near-")) / "summaries.db", "never")
+    # The first --samples articles are kept to make altered copies from
+    originals = []
+    start = time.perf_counter()
+    for batch_start in range(0, args.records, 1000):
+        batch = []
+        for i in range(batch_start, min(args.records, batch_start + 1000)):
+            text = corpus.article()
+            if len(originals) < args.samples:
+                originals.append((f"near-{i:07d}", text))
+            batch.append(make_record(i, text))
+        store.add_many(batch)
+    elapsed = time.perf_counter() - start
+    print(f"Stored {args.records} fingerprinted articles in {elapsed:.1f} s; threshold {args.threshold}")
+
+    print(f"\n{'change':<20} {'similarity p50':>15} {'reused':>8} {'right summary':>14} {'lookup p50 ms':>14}")
+    for name, variant in list(VARIANTS.items()) + [("unrelated article", None)]:
+        scores, latencies = [], []
+        reused = correct = 0
+        for original_id, text in originals:
+            altered = variant(corpus, text) if variant else corpus.article()
+            match, seconds = lookup(store, altered, 0.0)
+            latencies.append(seconds)
+            score = match[1] if match else 0.0
+            scores.append(score)
+            if score >= args.threshold:
+                reused += 1
+                correct += variant is not None and match[0]["id"] == original_id
+        print(f"{name:<20} {statistics.median(scores):>15.3f} {reused / len(originals):>8.1%} "
+              f"{(correct / reused if reused else 0):>14.1%} {statistics.median(latencies) * 1000:>14.2f}")
+
+    print(f"\n{'content words':>13} {'fingerprint ms':>15}")
+    for words in (100, 1000, 5000, 20000):
+        text = " ".join(corpus.words(words))
+        start = time.perf_counter()
+        for _ in range(20):
+            content_fingerprint(text)
+        print(f"{words:>13} {(time.perf_counter() - start) / 20 * 1000:>15.2f}")
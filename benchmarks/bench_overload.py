@@ -0,0 +1,87 @@
+"""
+Overload benchmark for summarize admission control
+
+Sends bursts of unique summarize requests at many times the admission cap,
+once with an effectively unbounded wait queue and once with the configured
+bounded queue. With a bounded queue the excess is shed quickly with 429s and
+the latency of admitted requests stays flat instead of growing with the
+size of the burst.
+
+Usage:
+    python benchmarks/bench_overload.py [--latency 0.1] [--clients 256] [--max-active 8] [--max-queue 16]
+"""
+import os
+import sys
+import time
+import asyncio
+import logging
+import argparse
+import tempfile
+from pathlib import Path
+
+BENCH_DIR = Path(__file__).resolve().parent
+sys.path.insert(0, str(BENCH_DIR.parent / "api"))
+sys.path.insert(0, str(BENCH_DIR))
+
+os.environ.setdefault("GEMINI_API_KEY", "benchmark")
+os.environ["SUMMARIZER_DATA_DIR"] = tempfile.mkdtemp(prefix="summarizer-overload-")
+# Measure admission control on its own
+os.environ["RATE_LIMIT_PER_MINUTE"] = "0"
+
+import httpx  # noqa: E402
+import main  # noqa: E402
+import fake_gemini  # noqa: E402
+from admission import AdmissionController  # noqa: E402
+
+
+def percentile(sorted_values, fraction):
+    if not sorted_values:
+        return 0.0
+    return sorted_values[min(len(sorted_values) - 1, int(round(fraction * (len(sorted_values) - 1))))]
+
+
+async def burst(client, clients, run_id):
+    """Fire `clients` unique summarize requests at once; returns (admitted latencies, rejected, seconds)"""
+    async def one(i):
+        start = time.perf_counter()
+        response = await client.post("/api/summarize", json={
+            "url": f"https://example.com/{run_id}/{i}",
+            "content": f"Overload run {run_id} request {i}. " + "Lorem ipsum dolor sit amet. " * 20,
+            "length": "short",
+        })
+        return response.status_code, time.perf_counter() - start
+
+    start = time.perf_counter()
+    results = await asyncio.gather(*[one(i) for i in range(clients)])
+    elapsed = time.perf_counter() - start
+    latencies = sorted(seconds for status, seconds in results if status == 200)
+    rejected = sum(1 for status, _ in results if status == 429)
+    return latencies, rejected, elapsed
+
+
+async def main_async(args):
+    fake_gemini.FakeModel.configure(latency=args.latency)
+    fake_gemini.install(main)
+    logging.disable(logging.WARNING)
+
+    transport = httpx.ASGITransport(app=main.app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench", timeout=None) as client:
+        print(f"Fake Gemini latency {args.latency * 1000:.0f} ms, {args.max_active} active slots")
+        print(f"{'queue':>9} {'clients':>8} {'admitted':>9} {'429s':>6} {'p50 ms':>8} {'p99 ms':>8} {'max ms':>8}")
+        for label, max_queue in (("unbounded", 1_000_000), ("bounded", args.max_queue)):
+            main.summarize_admission = AdmissionController(args.max_active, max_queue, args.queue_timeout)
+            for clients in args.clients:
+                latencies, rejected, _ = await burst(client, clients, f"{label}-{clients}")
+                print(f"{label:>9} {clients:>8} {len(latencies):>9} {rejected:>6} "
+                      f"{percentile(latencies, 0.5) * 1000:>8.0f} {percentile(latencies, 0.99) * 1000:>8.0f} "
+                      f"{(latencies[-1] if latencies else 0) * 1000:>8.0f}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Admission control overload benchmark")
+    parser.add_argument("--latency", type=float, default=0.1, help="Fake Gemini latency in seconds")
+    parser.add_argument("--clients", type=int, nargs="+", default=[32, 128, 512])
+    parser.add_argument("--max-active", type=int, default=8)
+    parser.add_argument("--max-queue", type=int, default=16)
+    parser.add_argument("--queue-timeout", type=float, default=30.0)
+    asyncio.run(main_async(parser.parse_args()))
@@ -0,0 +1,97 @@
+"""
+Parse-rate and speed benchmark for model response parsing
+
+Runs every recorded response in benchmarks/data/malformed_responses.jsonl
+through the previous regex-based extraction and through
+api/response_parser.py, reporting how many produce a usable summary (a JSON
+object with "title" and "main") and the time per parse. A large synthetic
+response is also timed to show the repair pass stays linear.
+
+Usage:
+    python benchmarks/bench_parser.py [--runs 2000] [--verbose]
+"""
+import re
+import sys
+import json
+import time
+import argparse
+from pathlib import Path
+
+BENCH_DIR = Path(__file__).resolve().parent
+sys.path.insert(0, str(BENCH_DIR.parent / "api"))
+
+from response_parser import parse_summary_json, ResponseParseError  # noqa: E402
+
+CORPUS = BENCH_DIR / "data" / "malformed_responses.jsonl"
+
+
+def legacy_parse(text):
+    """The extraction call_gemini_api used before response_parser existed"""
+    if '{' in text and '}' in text:
+        match = re.search(r'({.*})', text, re.DOTALL)
+        if match:
+            json_str = match.group(1)
+            try:
+                return json.loads(json_str)
+            except json.JSONDecodeError:
+                try:
+                    return json.loads(json_str.replace("'", '"'))
+                except json.JSONDecodeError:
+                    pass
+    return None
+
+
+def new_parse(text):
+    try:
+        return parse_summary_json(text)[0]
+    except ResponseParseError:
+        return None
+
+
+def usable(result):
+    return isinstance(result, dict) and "title" in result and "main" in result
+
+
+def time_parser(parser, texts, runs):
+    start = time.perf_counter()
+    for _ in range(runs):
+        for text in texts:
+            parser(text)
+    return (time.perf_counter() - start) / (runs * len(texts))
+
+
+if __name__ == "__main__":
+    arg_parser = argparse.ArgumentParser(description="Response parser benchmark")
+    arg_parser.add_argument("--runs", type=int, default=2000)
+    arg_parser.add_argument("--verbose", action="store_true", help="Show the result for every case")
+    args = arg_parser.parse_args()
+
+    cases = [json.loads(line) for line in CORPUS.read_text().splitlines() if line.strip()]
+    texts = [case["text"] for case in cases]
+
+    legacy_ok = new_ok = 0
+    for case in cases:
+        old = usable(legacy_parse(case["text"]))
+        new = usable(new_parse(case["text"]))
+        legacy_ok += old
+        new_ok += new
+        if args.verbose:
+            print(f"  {case['name']:<32} legacy={'ok' if old else 'FAIL':<5} new={'ok' if new else 'FAIL'}")
+
+    print(f"Corpus: {len(cases)} recorded responses")
+    print(f"{'parser':<8} {'usable':>8} {'rate':>7} {'us/parse':>9}")
+    for name, parser, ok in (("legacy", legacy_parse, legacy_ok), ("new", new_parse, new_ok)):
+        per_parse = time_parser(parser, texts, args.runs)
+        print(f"{name:<8} {ok:>8} {ok / len(cases):>7.1%} {per_parse * 1e6:>9.1f}")
+
+    # Worst case for the repair pass: a long response with an embedded quote and truncation
+    print("\nRepair pass on large truncated responses:")
+    for size in (10_000, 100_000, 1_000_000):
+        body = ("The report says \"growth\" slowed, and prices rose. " * (size // 50))[:size]
+        text = '```json\n{"title": "Large", "main": "' + body
+        runs = max(1, 2_000_000 // size)
+        start = time.perf_counter()
+        for _ in range(runs):
+            parse_summary_json(text)
+        elapsed = (time.perf_counter() - start) / runs
+        print(f"  {size:>9} chars: {elapsed * 1000:8.2f} ms ({elapsed * 1e9 / size:.0f} ns/char)")
@@ -0,0 +1,73 @@
+"""
+Benchmark for the content preprocessing stage (api/preprocess.py)
+
+Builds synthetic pages mixing article paragraphs with navigation, cookie
+banners, share buttons, repeated paragraphs and whitespace runs, then reports
+time per call and savings at several input sizes. Time per character should
+stay flat as the input grows (linear time).
+
+Usage:
+    python benchmarks/bench_preprocess.py [--runs 50]
+"""
+import sys
+import time
+import random
+import argparse
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent / "api"))
+
+from preprocess import preprocess_content  # noqa: E402
+
+BOILERPLATE = [
+    "Skip to content", "Home", "Menu", "Search", "Sign in",
+    "We use cookies to improve your experience. Accept all cookies",
+    "Share on Facebook", "Share on Twitter", "Advertisement",
+    "Subscribe to our newsletter", "© 2025 Example Media. All rights reserved.",
+]
+WORDS = ("the market policy court research data model users growth report network energy "
+         "government analysis language system article results impact study health").split()
+
+
+def make_page(target_chars: int, seed: int = 0) -> str:
+    rng = random.Random(seed)
+    parts = []
+    size = 0
+    paragraphs = []
+    while size < target_chars:
+        roll = rng.random()
+        if roll < 0.25:
+            part = rng.choice(BOILERPLATE)
+        elif roll < 0.35 and paragraphs:
+            part = rng.choice(paragraphs)
+        else:
+            part = " ".join(rng.choice(WORDS) for _ in range(rng.randint(40, 120))) + "."
+            part = part.replace(" the ", "   the  ")
+            paragraphs.append(part)
+        parts.append(part)
+        size += len(part) + 3
+    return "\n\n \n".join(parts)[:target_chars]
+
+
+def bench(size: int, runs: int, budget: int):
+    page = make_page(size)
+    preprocess_content(page, budget)  # warm up
+    start = time.perf_counter()
+    for _ in range(runs):
+        _, stats = preprocess_content(page, budget)
+    elapsed = (time.perf_counter() - start) / runs
+    return elapsed, stats
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Preprocessing benchmark")
+    parser.add_argument("--runs", type=int, default=50)
+    parser.add_argument("--budget", type=int, default=1_000_000, help="Token budget (large = no trimming)")
+    args = parser.parse_args()
+
+    print(f"{'chars':>9} {'ms/call':>8} {'ns/char':>8} {'bytes saved':>12} {'tokens saved':>13}")
+    for size in (10_000, 50_000, 100_000, 500_000, 1_000_000):
+        runs = max(1, args.runs * 100_000 // size)
+        elapsed, stats = bench(size, runs, args.budget)
+        print(f"{size:>9} {elapsed * 1000:>8.2f} {elapsed * 1e9 / size:>8.1f} "
+              f"{stats['bytes_saved']:>12} {stats['tokens_saved']:>13}")
@@ -0,0 +1,108 @@
+"""
+History retention and compaction benchmark
+
+Fills a history store with summaries spread over the past months, with many
+pages summarized more than once, then runs one compaction under each
+retention setting. Reports entries, disk usage and process RSS before and
+after, how long compaction took, and the time to load every remaining
+summary (what a full GET /api/history used to cost), for uncompressed and
+compressed summary bodies. Disk usage only shrinks with --vacuum
+(HISTORY_VACUUM=true).
+
+Usage:
+    python benchmarks/bench_retention.py [--records 50000] [--pages 10000] [--days 180] [--vacuum]
+"""
+import sys
+import time
+import uuid
+import random
+import logging
+import argparse
+import tempfile
+from datetime import datetime, timedelta
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent / "api"))
+
+from storage import SQLiteHistoryStore  # noqa: E402
+from retention import RetentionPolicy, compact_history  # noqa: E402
+
+POLICIES = {
+    "none": RetentionPolicy(),
+    "latest-per-url": RetentionPolicy(latest_per_url=True),
+    "max-age-30d": RetentionPolicy(max_age_days=30),
+    "max-10k": RetentionPolicy(max_entries=10000),
+    "all": RetentionPolicy(max_entries=10000, max_age_days=30, latest_per_url=True),
+}
+
+
+def make_records(count, pages, days, seed=0):
+    rng = random.Random(seed)
+    now = datetime.now()
+    words = ["copyright", "patent", "trademark", "court", "license", "section", "act", "rights", "owner", "work"]
+    for i in range(count):
+        page = rng.randrange(pages)
+        main = " ".join(rng.choice(words) for _ in range(250))
+        yield {
+            "id": str(uuid.uuid4()),
+            "url": f"https://example.com/article/{page}",
+            "title": f"Article {page}",
+            "summary": {"title": f"Article {page}", "main": main,
+                        "keyPoints": [" ".join(rng.choice(words) for _ in range(15)) for _ in range(4)]},
+            "created_at": (now - timedelta(seconds=rng.uniform(0, days * 86400))).isoformat(),
+            "length": rng.choice(("short", "medium", "long")),
+            "content_preview": " ".join(rng.choice(words) for _ in range(30)),
+        }
+
+
+def fill(store, args):
+    batch = []
+    for record in make_records(args.records, args.pages, args.days):
+        batch.append(record)
+        if len(batch) >= 1000:
+            store.add_many(batch)
+            batch = []
+    store.add_many(batch)
+
+
+def time_load_all(store):
+    start = time.perf_counter()
+    store.list_all()
+    return time.perf_counter() - start
+
+
+def mb(value):
+    return f"{value / 1e6:.1f}" if value is not None else "n/a"
+
+
+def main(args):
+    logging.disable(logging.WARNING)
+    print(f"{args.records} summaries of {args.pages} pages over {args.days} days")
+    print(f"{'compress':<9} {'policy':<15} {'entries':>15} {'disk MB':>15} {'RSS MB':>15} "
+          f"{'compact s':>10} {'load all s':>11}")
+    for compress in (False, True):
+        for name, policy in POLICIES.items():
+            db_file = Path(tempfile.mkdtemp(prefix="summarizer-retention-")) / "summaries.db"
+            # History written before compression was enabled, so compaction has old bodies to compress
+            store = SQLiteHistoryStore(db_file)
+            fill(store, args)
+            store.close()
+
+            store = SQLiteHistoryStore(db_file, compress=compress)
+            report = compact_history(store, policy, vacuum=args.vacuum)
+            load_s = time_load_all(store)
+            before, after = report["before"], report["after"]
+            print(f"{str(compress):<9} {name:<15} {before['entries']:>7}->{after['entries']:<7} "
+                  f"{mb(before['disk_bytes']):>7}->{mb(after['disk_bytes']):<7} "
+                  f"{mb(before['rss_bytes']):>7}->{mb(after['rss_bytes']):<7} "
+                  f"{report['duration_seconds']:>10.2f} {load_s:>11.2f}")
+            store.close()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="History retention and compaction benchmark")
+    parser.add_argument("--records", type=int, default=50000)
+    parser.add_argument("--pages", type=int, default=10000, help="Distinct pages the summaries are spread over")
+    parser.add_argument("--days", type=int, default=180, help="Age of the oldest summary")
+    parser.add_argument("--vacuum", action="store_true", help="Let compaction rebuild the database file")
+    main(parser.parse_args())
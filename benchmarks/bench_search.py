@@ -0,0 +1,116 @@
+"""
+History search benchmark
+
+Fills a SQLite history store with synthetic summaries (Zipf-distributed
+vocabulary, so some words are common and most are rare), then times
+GET /api/history/search style queries through HistoryStore.search: rare and
+common words, multi-word queries and short prefixes. Also times inserts and
+deletes with the index maintained, and reopening the store (no rebuild).
+
+Usage:
+    python benchmarks/bench_search.py [--records 100000] [--runs 200]
+"""
+import sys
+import time
+import random
+import itertools
+import logging
+import argparse
+import tempfile
+from datetime import datetime, timedelta
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent / "api"))
+
+from storage import SQLiteHistoryStore  # noqa: E402
+
+VOCABULARY_SIZE = 20000
+
+
+def make_vocabulary(rng):
+    letters = "abcdefghijklmnopqrstuvwxyz"
+    words = set()
+    while len(words) < VOCABULARY_SIZE:
+        words.add("".join(rng.choice(letters) for _ in range(rng.randint(3, 10))))
+    return sorted(words)
+
+
+def make_text(rng, vocabulary, cum_weights, count):
+    return " ".join(rng.choices(vocabulary, cum_weights=cum_weights, k=count))
+
+
+def make_records(count, rng, vocabulary, weights):
+    now = datetime.now()
+    for i in range(count):
+        yield {
+            "id": f"search-{i:07d}",
+            "url": f"https://example.com/{i}",
+            "title": make_text(rng, vocabulary, weights, 6).title(),
+            "summary": {"title": "t", "main": make_text(rng, vocabulary, weights, 120),
+                        "keyPoints": [make_text(rng, vocabulary, weights, 10) for _ in range(3)]},
+            "created_at": (now - timedelta(minutes=i)).isoformat(),
+            "length": "medium",
+            "content_preview": make_text(rng, vocabulary, weights, 30),
+        }
+
+
+def time_queries(store, queries, runs):
+    latencies = []
+    hits = 0
+    for i in range(runs):
+        query = queries[i % len(queries)]
+        start = time.perf_counter()
+        hits += len(store.search(query, 21, 0, ("id", "url", "title", "created_at")))
+        latencies.append(time.perf_counter() - start)
+    latencies.sort()
+    return latencies[len(latencies) // 2], latencies[int(len(latencies) * 0.99)], hits / runs
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="History search benchmark")
+    parser.add_argument("--records", type=int, default=100_000)
+    parser.add_argument("--runs", type=int, default=200)
+    args = parser.parse_args()
+    logging.disable(logging.INFO)
+
+    rng = random.Random(0)
+    vocabulary = make_vocabulary(rng)
+    weights = list(itertools.accumulate(1 / (rank + 1) for rank in range(len(vocabulary))))
+    db_file = Path(tempfile.mkdtemp(prefix="summarizer-search-")) / "summaries.db"
+    store = SQLiteHistoryStore(db_file, "never")
+
+    start = time.perf_counter()
+    batch = []
+    for record in make_records(args.records, rng, vocabulary, weights):
+        batch.append(record)
+        if len(batch) == 5000:
+            store.add_many(batch)
+            batch = []
+    store.add_many(batch)
+    elapsed = time.perf_counter() - start
+    print(f"Inserted {args.records} summaries with indexing in {elapsed:.1f} s "
+          f"({elapsed / args.records * 1e6:.0f} us/summary), db size {db_file.stat().st_size / 1e6:.0f} MB")
+
+    common, mid, rare = vocabulary[:20], vocabulary[200:400], vocabulary[5000:10000]
+    cases = {
+        "rare word": [rng.choice(rare) for _ in range(50)],
+        "mid-frequency word": [rng.choice(mid) for _ in range(50)],
+        "common word": list(common),
+        "two words": [f"{rng.choice(mid)} {rng.choice(rare)}" for _ in range(50)],
+        "three-letter prefix": [rng.choice(rare)[:3] for _ in range(50)],
+        "no match": ["qqqqqqqqqq"],
+    }
+    print(f"\n{'query':<20} {'p50 ms':>8} {'p99 ms':>8} {'hits':>6}")
+    for name, queries in cases.items():
+        p50, p99, hits = time_queries(store, queries, args.runs)
+        print(f"{name:<20} {p50 * 1000:>8.2f} {p99 * 1000:>8.2f} {hits:>6.1f}")
+
+    start = time.perf_counter()
+    for i in range(200):
+        store.delete(f"search-{i:07d}")
+    print(f"\nDelete with index update: {(time.perf_counter() - start) / 200 * 1000:.2f} ms")
+    store.close()
+
+    start = time.perf_counter()
+    SQLiteHistoryStore(db_file, "never").close()
+    print(f"Reopen store (index persisted): {(time.perf_counter() - start) * 1000:.1f} ms")
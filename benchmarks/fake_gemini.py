@@ -0,0 +1,91 @@
+"""
+Local stand-in for the Gemini backend used by the benchmark scripts
+
+FakeModel replaces the Gemini model, so the whole request path (prompt
+building, the concurrency cap, response parsing and validation) still runs;
+only the network call is simulated. Latency and failures are drawn from
+configurable distributions with a fixed seed so runs are comparable.
+"""
+import json
+import random
+import asyncio
+from typing import Optional
+
+VALID_RESPONSE = '{"title": "Benchmark page", "main": "Summary text for the benchmark.", "keyPoints": ["one", "two"]}'
+# Answer to prompts asking for every summary length at once
+MULTI_LENGTH_RESPONSE = json.dumps({
+    length: {"title": "Benchmark page", "main": f"{length.capitalize()} summary text for the benchmark.",
+             "keyPoints": ["one", "two"]}
+    for length in ("short", "medium", "long")
+})
+# Near-JSON output the response parser has to repair
+MALFORMED_RESPONSE = "```json\n{'title': 'Benchmark page', 'main': 'Summary text', 'keyPoints': ['one', 'two',],}\n```"
+
+
+class FakeGeminiError(Exception):
+    """Simulated Gemini API failure"""
+
+
+class FakeResponse:
+    def __init__(self, text: str):
+        self.text = text
+
+    def __aiter__(self):
+        return self._chunks()
+
+    async def _chunks(self):
+        for start in range(0, len(self.text), 16):
+            yield FakeResponse(self.text[start:start + 16])
+
+
+class FakeModel:
+    """Stands in for genai.GenerativeModel with configurable latency and error rates
+
+    Latency distributions: "fixed" (always `latency`), "uniform" (0 to
+    2 x `latency`) and "lognormal" (median `latency` with a long tail, closest
+    to real model calls).
+    """
+    latency = 0.2
+    distribution = "fixed"
+    sigma = 0.5
+    error_rate = 0.0
+    malformed_rate = 0.0
+    rng = random.Random(0)
+
+    def __init__(self, *args, **kwargs):
+        pass
+
+    @classmethod
+    def configure(cls, latency: float = 0.2, distribution: str = "fixed", error_rate: float = 0.0,
+                  malformed_rate: float = 0.0, sigma: float = 0.5, seed: Optional[int] = 0) -> None:
+        if distribution not in ("fixed", "uniform", "lognormal"):
+            raise ValueError(f"Unknown latency distribution: {distribution}")
+        cls.latency = latency
+        cls.distribution = distribution
+        cls.error_rate = error_rate
+        cls.malformed_rate = malformed_rate
+        cls.sigma = sigma
+        cls.rng = random.Random(seed)
+
+    @classmethod
+    def sample_latency(cls) -> float:
+        if cls.distribution == "uniform":
+            return cls.rng.uniform(0, 2 * cls.latency)
+        if cls.distribution == "lognormal":
+            return cls.latency * cls.rng.lognormvariate(0, cls.sigma)
+        return cls.latency
+
+    async def generate_content_async(self, prompt, **kwargs):
+        await asyncio.sleep(self.sample_latency())
+        if self.rng.random() < self.error_rate:
+            raise FakeGeminiError("Simulated Gemini API error")
+        if self.rng.random() < self.malformed_rate:
+            return FakeResponse(MALFORMED_RESPONSE)
+        if '"short": {' in prompt:
+            return FakeResponse(MULTI_LENGTH_RESPONSE)
+        return FakeResponse(VALID_RESPONSE)
+
+
+def install(main_module) -> None:
+    """Route the API module's Gemini calls to FakeModel"""
+    main_module.gemini_client.use_factory(FakeModel)
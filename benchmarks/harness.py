@@ -0,0 +1,226 @@
+"""
+Offline benchmark harness for the summarizer API
+
+Runs the API in-process against the fake Gemini backend in fake_gemini.py
+and drives three scenarios at a controlled client concurrency:
+
+- summarize: POST /api/summarize with unique content (cache misses)
+- history: GET /api/history (first page, then following the cursor)
+- history_item: GET /api/history/{id} for random stored ids
+
+For each scenario it reports requests/second and p50/p95/p99 latency. It then
+sweeps the history size (10 to 100k stored summaries by default) and repeats
+the history scenarios at each size, so regressions in the storage path show
+up as numbers. --json writes every result to a file for CI to compare.
+
+Usage:
+    python benchmarks/harness.py [--concurrency 16] [--requests 400]
+        [--latency 0.05 --distribution lognormal --error-rate 0.01]
+        [--sizes 10 1000 100000] [--backend sqlite] [--json results.json]
+"""
+import os
+import sys
+import json
+import time
+import random
+import asyncio
+import logging
+import argparse
+import tempfile
+from datetime import datetime, timedelta
+from pathlib import Path
+
+BENCH_DIR = Path(__file__).resolve().parent
+sys.path.insert(0, str(BENCH_DIR.parent / "api"))
+sys.path.insert(0, str(BENCH_DIR))
+
+os.environ.setdefault("GEMINI_API_KEY", "benchmark")
+os.environ["SUMMARIZER_DATA_DIR"] = tempfile.mkdtemp(prefix="summarizer-bench-")
+# Every simulated client shares one address, so per-client rate limiting would skew the numbers
+os.environ["RATE_LIMIT_PER_MINUTE"] = "0"
+
+import httpx  # noqa: E402
+import main  # noqa: E402
+import fake_gemini  # noqa: E402
+from storage import open_history_store  # noqa: E402
+
+SCENARIOS = ("summarize", "history", "history_item")
+
+
+def percentile(sorted_values, fraction):
+    if not sorted_values:
+        return 0.0
+    index = min(len(sorted_values) - 1, int(round(fraction * (len(sorted_values) - 1))))
+    return sorted_values[index]
+
+
+def make_records(count, seed=0):
+    """Synthetic history records, newest last, spread over the past year"""
+    rng = random.Random(seed)
+    now = datetime.now()
+    records = []
+    for i in range(count):
+        created = now - timedelta(seconds=(count - i) * 300)
+        records.append({
+            "id": f"bench-{seed}-{i:07d}",
+            "url": f"https://example.com/{rng.randrange(max(1, count // 10))}",
+            "title": f"Benchmark page {i}",
+            "summary": {"title": f"Benchmark page {i}", "main": "Stored summary text. " * 20,
+                        "keyPoints": ["first point", "second point", "third point"]},
+            "created_at": created.isoformat(),
+            "length": rng.choice(["short", "medium", "long"]),
+            "content_preview": "Preview of the stored page content. " * 5,
+        })
+    return records
+
+
+def use_history(backend, size, seed):
+    """Point the API at a fresh history store holding `size` records; returns the stored ids"""
+    data_dir = Path(tempfile.mkdtemp(prefix=f"summarizer-bench-{size}-"))
+    store = open_history_store(backend, data_dir)
+    records = make_records(size, seed)
+    for start in range(0, len(records), 5000):
+        store.add_many(records[start:start + 5000])
+    old_store, main.history_store = main.history_store, store
+    main.history_writer.store = store
+    old_store.close()
+    return [record["id"] for record in records]
+
+
+async def run_scenario(client, scenario, concurrency, total, ids, run_id):
+    """Issue `total` requests for one scenario with `concurrency` clients"""
+    rng = random.Random(run_id)
+    latencies = []
+    errors = 0
+    counter = iter(range(total))
+    cursors = [None]
+
+    async def one_request(i):
+        if scenario == "summarize":
+            return await client.post("/api/summarize", json={
+                "url": f"https://example.com/{run_id}/{i}",
+                "title": "Benchmark page",
+                # Unique content per request so the cache and single-flight don't kick in
+                "content": f"Benchmark run {run_id} request {i}. " + "Lorem ipsum dolor sit amet. " * 20,
+                "length": "short",
+            })
+        if scenario == "history":
+            cursor = rng.choice(cursors)
+            params = {"limit": 50}
+            if cursor:
+                params["cursor"] = cursor
+            response = await client.get("/api/history", params=params)
+            next_cursor = response.headers.get("x-next-cursor")
+            if next_cursor and len(cursors) < 20:
+                cursors.append(next_cursor)
+            return response
+        if not ids:
+            raise RuntimeError("history_item needs stored summaries")
+        return await client.get(f"/api/history/{rng.choice(ids)}")
+
+    async def worker():
+        nonlocal errors
+        for i in counter:
+            start = time.perf_counter()
+            try:
+                response = await one_request(i)
+                ok = response.status_code == 200
+            except Exception:
+                ok = False
+            latencies.append(time.perf_counter() - start)
+            errors += not ok
+
+    start = time.perf_counter()
+    await asyncio.gather(*[worker() for _ in range(concurrency)])
+    elapsed = time.perf_counter() - start
+
+    latencies.sort()
+    return {
+        "scenario": scenario,
+        "requests": total,
+        "concurrency": concurrency,
+        "errors": errors,
+        "seconds": round(elapsed, 4),
+        "rps": round(total / elapsed, 1),
+        "p50_ms": round(percentile(latencies, 0.50) * 1000, 2),
+        "p95_ms": round(percentile(latencies, 0.95) * 1000, 2),
+        "p99_ms": round(percentile(latencies, 0.99) * 1000, 2),
+    }
+
+
+def print_header():
+    print(f"{'scenario':<13} {'history':>8} {'reqs':>6} {'req/s':>8} {'p50 ms':>8} "
+          f"{'p95 ms':>8} {'p99 ms':>8} {'errors':>7}")
+
+
+def print_row(result):
+    print(f"{result['scenario']:<13} {result['history_size']:>8} {result['requests']:>6} {result['rps']:>8.1f} "
+          f"{result['p50_ms']:>8.2f} {result['p95_ms']:>8.2f} {result['p99_ms']:>8.2f} {result['errors']:>7}")
+
+
+async def main_async(args):
+    fake_gemini.FakeModel.configure(
+        latency=args.latency,
+        distribution=args.distribution,
+        error_rate=args.error_rate,
+        malformed_rate=args.malformed_rate,
+        seed=args.seed,
+    )
+    fake_gemini.install(main)
+    # Keep per-request logging (including simulated Gemini errors, which are counted) from dominating
+    # the measurements
+    logging.disable(logging.ERROR)
+
+    results = []
+    transport = httpx.ASGITransport(app=main.app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench", timeout=None) as client:
+        print(f"Fake Gemini: {args.distribution} latency {args.latency * 1000:.0f} ms, "
+              f"error rate {args.error_rate:.1%}, malformed rate {args.malformed_rate:.1%}; "
+              f"{args.concurrency} clients, {args.backend} history")
+        print_header()
+
+        # All three scenarios against a small history
+        ids = use_history(args.backend, args.base_size, args.seed)
+        for scenario in args.scenarios:
+            result = await run_scenario(client, scenario, args.concurrency, args.requests, ids, args.seed)
+            result["history_size"] = args.base_size
+            results.append(result)
+            print_row(result)
+
+        # Storage path only, at growing history sizes
+        if args.sizes:
+            print("\nHistory size sweep")
+            print_header()
+        for size in args.sizes:
+            ids = use_history(args.backend, size, args.seed)
+            for scenario in ("history", "history_item"):
+                result = await run_scenario(client, scenario, args.concurrency, args.requests, ids, args.seed)
+                result["history_size"] = size
+                results.append(result)
+                print_row(result)
+
+    if args.json:
+        Path(args.json).write_text(json.dumps({
+            "config": {key: value for key, value in vars(args).items() if key != "json"},
+            "results": results,
+        }, indent=2))
+        print(f"\nWrote {len(results)} results to {args.json}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Offline API benchmark harness")
+    parser.add_argument("--concurrency", type=int, default=16, help="Concurrent clients")
+    parser.add_argument("--requests", type=int, default=400, help="Requests per scenario")
+    parser.add_argument("--scenarios", nargs="+", choices=SCENARIOS, default=list(SCENARIOS))
+    parser.add_argument("--latency", type=float, default=0.05, help="Median fake Gemini latency in seconds")
+    parser.add_argument("--distribution", choices=["fixed", "uniform", "lognormal"], default="lognormal")
+    parser.add_argument("--error-rate", type=float, default=0.0, help="Fraction of fake Gemini calls that fail")
+    parser.add_argument("--malformed-rate", type=float, default=0.0,
+                        help="Fraction of fake Gemini responses that need JSON repair")
+    parser.add_argument("--base-size", type=int, default=100, help="History size for the scenario run")
+    parser.add_argument("--sizes", type=int, nargs="*", default=[10, 100, 1000, 10_000, 100_000],
+                        help="History sizes to sweep (none to skip)")
+    parser.add_argument("--backend", choices=["sqlite", "json"], default="sqlite")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--json", help="Write results to this file")
+    asyncio.run(main_async(parser.parse_args()))
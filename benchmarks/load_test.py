@@ -0,0 +1,84 @@
+"""
+Concurrency load test for POST /api/summarize
+
+Runs the API in-process against a fake Gemini model that takes a fixed amount
+of time per call, then measures throughput at increasing client concurrency.
+With a non-blocking request path, requests/second should grow roughly
+linearly with the number of concurrent clients (up to GEMINI_MAX_CONCURRENCY)
+instead of staying flat.
+
+Usage:
+    python benchmarks/load_test.py [--latency 0.2] [--requests 64]
+"""
+import os
+import sys
+import time
+import asyncio
+import argparse
+import tempfile
+from pathlib import Path
+
+BENCH_DIR = Path(__file__).resolve().parent
+sys.path.insert(0, str(BENCH_DIR.parent / "api"))
+sys.path.insert(0, str(BENCH_DIR))
+
+os.environ.setdefault("GEMINI_API_KEY", "load-test")
+os.environ["SUMMARIZER_DATA_DIR"] = tempfile.mkdtemp(prefix="summarizer-load-")
+# Every simulated client shares one address, so per-client rate limiting would skew the numbers
+os.environ["RATE_LIMIT_PER_MINUTE"] = "0"
+
+import httpx  # noqa: E402
+import main  # noqa: E402
+import fake_gemini  # noqa: E402
+
+
+async def run_level(client, concurrency, total, run_id):
+    """Send `total` unique summarize requests with `concurrency` clients"""
+    queue = asyncio.Queue()
+    for i in range(total):
+        queue.put_nowait(i)
+    statuses = []
+
+    async def worker():
+        while True:
+            try:
+                i = queue.get_nowait()
+            except asyncio.QueueEmpty:
+                return
+            response = await client.post("/api/summarize", json={
+                "url": f"https://example.com/{run_id}/{i}",
+                "title": "Load test page",
+                # Unique content per request so the cache and single-flight don't kick in
+                "content": f"Load test run {run_id} request {i}. " + "Lorem ipsum dolor sit amet. " * 20,
+                "length": "short",
+            })
+            statuses.append(response.status_code)
+
+    start = time.perf_counter()
+    await asyncio.gather(*[worker() for _ in range(concurrency)])
+    elapsed = time.perf_counter() - start
+    errors = sum(1 for status in statuses if status != 200)
+    return total / elapsed, elapsed, errors
+
+
+async def main_async(args):
+    fake_gemini.FakeModel.configure(latency=args.latency)
+    fake_gemini.install(main)
+
+    transport = httpx.ASGITransport(app=main.app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://load-test", timeout=None) as client:
+        print(f"Fake Gemini latency: {args.latency * 1000:.0f} ms, "
+              f"GEMINI_MAX_CONCURRENCY={main.GEMINI_MAX_CONCURRENCY}")
+        print(f"{'clients':>8} {'requests':>9} {'seconds':>8} {'req/s':>8} {'errors':>7}")
+        for concurrency in args.levels:
+            total = max(args.requests, concurrency)
+            rps, elapsed, errors = await run_level(client, concurrency, total, concurrency)
+            print(f"{concurrency:>8} {total:>9} {elapsed:>8.2f} {rps:>8.1f} {errors:>7}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Summarize endpoint load test")
+    parser.add_argument("--latency", type=float, default=0.2, help="Fake Gemini latency in seconds")
+    parser.add_argument("--requests", type=int, default=32, help="Requests per concurrency level")
+    parser.add_argument("--levels", type=int, nargs="+", default=[1, 2, 4, 8, 16])
+    asyncio.run(main_async(parser.parse_args()))
@@ -0,0 +1,186 @@
+"""
+Multi-process history stress test
+
+Starts N worker processes that save history records into one shared data
+directory at the same time, as `uvicorn --workers N` or several replicas on
+a shared volume would, while a reader process keeps listing the newest page.
+Afterwards it checks that every record written is stored exactly once, and
+reports write throughput and the reader's latency while writes were going on.
+
+Each worker simulates handling a request (--request-ms of waiting, standing
+in for the model call) before saving it with its own add_many call, so
+throughput should grow with the worker count until the store's write lock
+is the bottleneck. --request-ms 0 measures that write ceiling on its own.
+
+A worker that fails, or a run that takes longer than --timeout seconds,
+ends the test with the worker's error and a non-zero exit status.
+
+Usage:
+    python benchmarks/stress_history_workers.py [--workers 1 2 4 8] [--records 200]
+        [--request-ms 5] [--backend sqlite json] [--timeout 300]
+"""
+import sys
+import time
+import queue
+import logging
+import argparse
+import tempfile
+import statistics
+import threading
+import traceback
+import multiprocessing
+from datetime import datetime
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent / "api"))
+
+from storage import open_history_store  # noqa: E402
+
+
+def make_record(worker, i):
+    return {
+        "id": f"worker-{worker}-{i:06d}",
+        "url": f"https://example.com/{worker}/{i}",
+        "title": f"Worker {worker} page {i}",
+        "summary": {"title": "Stress", "main": "Stored summary text. " * 20, "keyPoints": ["one", "two"]},
+        "created_at": datetime.now().isoformat(),
+        "length": "medium",
+        "content_preview": "Preview of the stored page content. " * 5,
+    }
+
+
+class WorkerFailed(Exception):
+    pass
+
+
+def write_worker(backend, data_dir, worker, records, request_seconds, barrier, results):
+    logging.disable(logging.INFO)
+    try:
+        store = open_history_store(backend, Path(data_dir))
+        barrier.wait()
+        start = time.perf_counter()
+        for i in range(records):
+            if request_seconds:
+                time.sleep(request_seconds)
+            store.add_many([make_record(worker, i)])
+        results.put(("ok", time.perf_counter() - start))
+        store.close()
+    except Exception:
+        # Break the barrier so nobody else waits for this worker
+        barrier.abort()
+        results.put(("error", f"writer {worker}:\n{traceback.format_exc()}"))
+
+
+def read_worker(backend, data_dir, barrier, stop, results):
+    logging.disable(logging.INFO)
+    try:
+        store = open_history_store(backend, Path(data_dir))
+        barrier.wait()
+        latencies = []
+        while not stop.is_set():
+            start = time.perf_counter()
+            store.list_page(50, fields=("id", "url", "title", "created_at"))
+            latencies.append(time.perf_counter() - start)
+            time.sleep(0.002)
+        results.put(("ok", latencies))
+        store.close()
+    except Exception:
+        barrier.abort()
+        results.put(("error", f"reader:\n{traceback.format_exc()}"))
+
+
+def collect(results, processes, deadline):
+    """Next result from a worker; raises WorkerFailed on a worker error, crash or the deadline"""
+    while True:
+        try:
+            status, value = results.get(timeout=0.5)
+        except queue.Empty:
+            crashed = [p for p in processes if p.exitcode not in (None, 0)]
+            if crashed:
+                raise WorkerFailed(f"{crashed[0].name} exited with code {crashed[0].exitcode}")
+            if time.monotonic() > deadline:
+                raise WorkerFailed("timed out waiting for workers")
+            continue
+        if status == "error":
+            raise WorkerFailed(value)
+        return value
+
+
+def run(backend, workers, records, request_seconds, timeout):
+    data_dir = tempfile.mkdtemp(prefix=f"summarizer-stress-{backend}-")
+    # Create the store (and schema) once up front, as the first worker to start would
+    open_history_store(backend, Path(data_dir)).close()
+
+    barrier = multiprocessing.Barrier(workers + 2)
+    stop = multiprocessing.Event()
+    write_results = multiprocessing.Queue()
+    read_results = multiprocessing.Queue()
+    writers = [
+        multiprocessing.Process(target=write_worker,
+                                args=(backend, data_dir, w, records, request_seconds, barrier, write_results))
+        for w in range(workers)
+    ]
+    reader = multiprocessing.Process(target=read_worker, args=(backend, data_dir, barrier, stop, read_results))
+    for process in writers + [reader]:
+        process.start()
+
+    deadline = time.monotonic() + timeout
+    try:
+        try:
+            barrier.wait(timeout=timeout)
+        except threading.BrokenBarrierError:
+            # A worker failed before writing; its error is on one of the queues
+            collect(write_results, writers, deadline)
+            collect(read_results, [reader], deadline)
+            raise WorkerFailed("a worker failed to start")
+        start = time.perf_counter()
+        for _ in writers:
+            collect(write_results, writers, deadline)
+        elapsed = time.perf_counter() - start
+        stop.set()
+        read_latencies = sorted(collect(read_results, [reader], deadline))
+    finally:
+        stop.set()
+        for process in writers + [reader]:
+            process.join(timeout=5)
+            if process.is_alive():
+                process.terminate()
+
+    store = open_history_store(backend, Path(data_dir))
+    stored_ids = [record["id"] for record in store.list_all()]
+    store.close()
+    expected = {f"worker-{w}-{i:06d}" for w in range(workers) for i in range(records)}
+    return {
+        "elapsed": elapsed,
+        "written": workers * records,
+        "lost": len(expected - set(stored_ids)),
+        "duplicated": len(stored_ids) - len(set(stored_ids)),
+        "read_p50": statistics.median(read_latencies) if read_latencies else 0.0,
+        "read_p99": read_latencies[int(len(read_latencies) * 0.99)] if read_latencies else 0.0,
+    }
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Multi-process history stress test")
+    parser.add_argument("--workers", type=int, nargs="+", default=[1, 2, 4, 8])
+    parser.add_argument("--records", type=int, default=200, help="Records saved by each worker")
+    parser.add_argument("--request-ms", type=float, default=5.0, help="Simulated request time before each save")
+    parser.add_argument("--backend", nargs="+", choices=["sqlite", "json"], default=["sqlite", "json"])
+    parser.add_argument("--timeout", type=float, default=300, help="Seconds a run may take before it fails")
+    args = parser.parse_args()
+
+    print(f"{args.records} records per worker, {args.request_ms:.0f} ms simulated request time per record")
+    print(f"{'backend':<8} {'workers':>8} {'records/s':>10} {'lost':>6} {'dupes':>6} "
+          f"{'read p50 ms':>12} {'read p99 ms':>12}")
+    failed = False
+    for backend in args.backend:
+        for workers in args.workers:
+            try:
+                result = run(backend, workers, args.records, args.request_ms / 1000, args.timeout)
+            except WorkerFailed as e:
+                print(f"{backend:<8} {workers:>8} FAILED: {str(e)}", file=sys.stderr)
+                sys.exit(1)
+            failed |= bool(result["lost"] or result["duplicated"])
+            print(f"{backend:<8} {workers:>8} {result['written'] / result['elapsed']:>10.0f} {result['lost']:>6} "
+                  f"{result['duplicated']:>6} {result['read_p50'] * 1000:>12.2f} {result['read_p99'] * 1000:>12.2f}")
+    sys.exit(1 if failed else 0)
@@ -172,12 +172,19 @@ async function getSummaryFromAPI(data, length) {
     const cacheKey = `${data.url}:${length}`;
     summaryCache.set(cacheKey, result);
     
+    // The server may return every length at once; cache them so switching length needs no request
+    if (result.variants) {
+      for (const [variantLength, variant] of Object.entries(result.variants)) {
+        summaryCache.set(`${data.url}:${variantLength}`, variant);
+      }
+    }
+    
     // Verify the summary is in history immediately and after a short delay
     console.log('[Background] Verifying summary is in history...');
-    checkHistorySummaries();
+    checkHistorySummaries(data.url);
     
     // Also check again after a delay
-    setTimeout(checkHistorySummaries, 3000);
+    setTimeout(() => checkHistorySummaries(data.url), 3000);
     
     return result;
   } catch (error) {
@@ -188,13 +195,15 @@ async function getSummaryFromAPI(data, length) {
 }
 
 // Helper function to check history summaries
-async function checkHistorySummaries() {
+async function checkHistorySummaries(url) {
   try {
     console.log('[Background] Checking summaries in history...');
-    const historyResponse = await fetch(`${API_ENDPOINT.split('/api')[0]}/api/history`);
+    // Only fetch the latest entry for this URL, without summary bodies
+    const params = new URLSearchParams({ url, limit: '1', fields: 'id,url,created_at' });
+    const historyResponse = await fetch(`${API_ENDPOINT.split('/api')[0]}/api/history?${params}`);
     if (historyResponse.ok) {
       const histories = await historyResponse.json();
-      console.log('[Background] Found', histories.length, 'summaries in history');
+      console.log('[Background] Found', histories.length, 'summaries in history for', url);
       if (histories.length > 0) {
         console.log('[Background] Latest summary:', histories[0].url, 'ID:', histories[0].id);
       }
@@ -380,10 +389,22 @@ chrome.runtime.onMessage.addListener((request, sender, sendResponse) => {
     console.log('[Background] Received feedback:', request.rating, 'for URL:', request.url);
     (async () => {
       try {
-        // Here you would typically send feedback to your server
-        // For this example, we'll just log it
         console.log('[Background] Processing feedback:', request.rating, 'for URL:', request.url);
         
+        const feedbackResponse = await fetch(`${API_ENDPOINT.split('/api')[0]}/api/feedback`, {
+          method: 'POST',
+          headers: { 'Content-Type': 'application/json' },
+          body: JSON.stringify({
+            url: request.url,
+            rating: request.rating,
+            length: request.length
+          })
+        });
+        
+        if (!feedbackResponse.ok) {
+          throw new Error(`Feedback request failed with status ${feedbackResponse.status}`);
+        }
+        
         // Send acknowledgment back to popup
         sendResponse({ success: true });
       } catch (error) {
@@ -199,7 +199,8 @@ document.addEventListener('DOMContentLoaded', () => {
         { 
           action: 'feedback', 
           rating: rating,
-          url: tab.url
+          url: tab.url,
+          length: getSummaryLength()
         },
         (response) => {
           console.log('[Popup] Feedback response:', response);
@@ -294,21 +295,31 @@ document.addEventListener('DOMContentLoaded', () => {
   );
 
   // History Management
-  async function loadHistory() {
+  // History is paginated: summaries loaded so far and the cursor of the next page (null when none)
+  let loadedSummaries = [];
+  let nextHistoryCursor = null;
+
+  async function loadHistory(loadMore = false) {
     try {
       console.log('[Popup] Loading history from API');
       
       // Show loading indicator in history section
       const historyList = document.getElementById('history-list');
-      historyList.innerHTML = '<p class="loading-text">Loading summaries...</p>';
+      if (!loadMore) {
+        historyList.innerHTML = '<p class="loading-text">Loading summaries...</p>';
+      }
       
       // Force cache to be bypassed with timestamp in URL
-      const timestamp = new Date().getTime();
-      const response = await fetch(`http://localhost:8000/api/history?t=${timestamp}`);
+      const params = new URLSearchParams({ t: new Date().getTime() });
+      if (loadMore && nextHistoryCursor) {
+        params.set('cursor', nextHistoryCursor);
+      }
+      const response = await fetch(`http://localhost:8000/api/history?${params}`);
       
       if (!response.ok) {
         throw new Error(`HTTP error! status: ${response.status}`);
       }
+      const cursor = response.headers.get('X-Next-Cursor');
       
       const responseText = await response.text();
       console.log('[Popup] Raw history response:', responseText.substring(0, 100) + '...');
@@ -325,13 +336,15 @@ document.addEventListener('DOMContentLoaded', () => {
       
       if (summaries && Array.isArray(summaries)) {
         console.log(`[Popup] Found ${summaries.length} summaries in history`);
-        displayHistory(summaries);
+        loadedSummaries = loadMore ? loadedSummaries.concat(summaries) : summaries;
+        nextHistoryCursor = cursor;
+        displayHistory(loadedSummaries);
         
-        // Update the section header to show count
+        // Update the section header to show count ("+" when more pages remain)
         const historyHeader = document.querySelector('.section-header h2');
         if (historyHeader) {
-          historyHeader.textContent = summaries.length > 0 
-            ? `Recent Summaries (${summaries.length})` 
+          historyHeader.textContent = loadedSummaries.length > 0 
+            ? `Recent Summaries (${loadedSummaries.length}${nextHistoryCursor ? '+' : ''})` 
             : 'Recent Summaries';
         }
       } else {
@@ -342,6 +355,11 @@ document.addEventListener('DOMContentLoaded', () => {
       return true; // Success
     } catch (error) {
       console.error('[Popup] Error loading history:', error);
+      if (loadMore) {
+        // Keep the summaries already shown; the Load more button stays for another try
+        alert('Failed to load more summaries. Please try again.');
+        return false;
+      }
       const historyList = document.getElementById('history-list');
       historyList.innerHTML = '<p class="error-message">Failed to load history</p>';
       
@@ -351,7 +369,7 @@ document.addEventListener('DOMContentLoaded', () => {
       retryButton.className = 'secondary-btn';
       retryButton.style.margin = '10px auto';
       retryButton.style.display = 'block';
-      retryButton.addEventListener('click', loadHistory);
+      retryButton.addEventListener('click', () => loadHistory());
       historyList.appendChild(retryButton);
       
       throw error; // Re-throw for the retry function
@@ -367,9 +385,7 @@ document.addEventListener('DOMContentLoaded', () => {
       return;
     }
 
-    // Sort summaries by date, newest first
-    summaries.sort((a, b) => new Date(b.created_at) - new Date(a.created_at));
-
+    // Pages arrive newest first, so the list is already in order
     summaries.forEach(summary => {
       const item = document.createElement('div');
       item.className = 'history-item';
@@ -399,6 +415,23 @@ document.addEventListener('DOMContentLoaded', () => {
       historyList.appendChild(item);
     });
 
+    if (nextHistoryCursor) {
+      const loadMoreButton = document.createElement('button');
+      loadMoreButton.textContent = 'Load more';
+      loadMoreButton.className = 'secondary-btn';
+      loadMoreButton.style.margin = '10px auto';
+      loadMoreButton.style.display = 'block';
+      loadMoreButton.addEventListener('click', () => {
+        loadMoreButton.disabled = true;
+        loadMoreButton.textContent = 'Loading...';
+        loadHistory(true).then(() => {
+          loadMoreButton.disabled = false;
+          loadMoreButton.textContent = 'Load more';
+        });
+      });
+      historyList.appendChild(loadMoreButton);
+    }
+
     // Add event listeners
     document.querySelectorAll('.view-btn').forEach(btn => {
       btn.addEventListener('click', (e) => {
@@ -458,11 +491,29 @@ document.addEventListener('DOMContentLoaded', () => {
     if (confirm('Are you sure you want to clear all history?')) {
       try {
         console.log('[Popup] Clearing all history');
-        const summaries = await fetch('http://localhost:8000/api/history').then(r => r.json());
-        for (const summary of summaries) {
-          await fetch(`http://localhost:8000/api/history/${summary.id}`, {
-            method: 'DELETE'
-          });
+        // History is paginated; keep deleting the first page of ids until it is empty
+        let previousIds = null;
+        while (true) {
+          const response = await fetch(`http://localhost:8000/api/history?fields=id&limit=500&t=${new Date().getTime()}`);
+          if (!response.ok) {
+            throw new Error(`HTTP error! status: ${response.status}`);
+          }
+          const summaries = await response.json();
+          if (summaries.length === 0) break;
+          const ids = summaries.map(summary => summary.id).join(',');
+          if (ids === previousIds) {
+            // Nothing from the last page was deleted; stop rather than loop forever
+            throw new Error('History entries could not be deleted');
+          }
+          previousIds = ids;
+          for (const summary of summaries) {
+            const deleted = await fetch(`http://localhost:8000/api/history/${summary.id}`, {
+              method: 'DELETE'
+            });
+            if (!deleted.ok) {
+              throw new Error(`HTTP error! status: ${deleted.status}`);
+            }
+          }
         }
         console.log('[Popup] All history cleared');
         loadHistory();
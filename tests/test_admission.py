@@ -0,0 +1,25 @@
+from admission import ClientRateLimiter
+
+
+def test_wait_time_does_not_charge():
+    limiter = ClientRateLimiter(rate_per_minute=60, burst=2)
+    for _ in range(5):
+        assert limiter.wait_time("client") == 0
+    assert limiter.check("client") == 0
+    assert limiter.check("client") == 0
+    assert limiter.check("client") > 0
+    assert limiter.rejected == 1
+
+
+def test_rejected_request_leaves_the_bucket_untouched():
+    limiter = ClientRateLimiter(rate_per_minute=60, burst=3)
+    limiter.check("client", 2)
+    assert limiter.check("client", 2) > 0
+    # The rejected request took nothing, so a request the remaining token covers still fits
+    assert limiter.check("client", 1) == 0
+
+
+def test_oversized_cost_runs_once_the_bucket_is_full():
+    limiter = ClientRateLimiter(rate_per_minute=60, burst=2)
+    assert limiter.check("client", 5) == 0
+    assert limiter.wait_time("client") > 2
@@ -0,0 +1,55 @@
+from feedback import FeedbackStore
+
+
+def entry(url, rating, length="medium"):
+    return {"url": url, "rating": rating, "length": length}
+
+
+def test_workers_sharing_a_log_report_the_same_stats(tmp_path):
+    log = tmp_path / "feedback.jsonl"
+    first, second = FeedbackStore(log), FeedbackStore(log)
+    first.record(entry("https://a.example", 5))
+    first.record(entry("https://b.example", 2, "short"))
+    second.record(entry("https://a.example", 3))
+    first.flush()
+    second.flush()
+
+    assert first.stats() == second.stats()
+    assert first.stats()["overall"]["count"] == 3
+    assert first.url_stats("https://a.example") == second.url_stats("https://a.example")
+    assert first.url_stats("https://a.example")["count"] == 2
+
+
+def test_buffered_entries_are_counted_once(tmp_path):
+    store = FeedbackStore(tmp_path / "feedback.jsonl")
+    store.record(entry("https://a.example", 4))
+    assert store.url_stats("https://a.example")["count"] == 1
+    store.flush()
+    assert store.url_stats("https://a.example")["count"] == 1
+    assert store.stats()["overall"]["count"] == 1
+
+
+def test_per_url_aggregates_are_capped(tmp_path):
+    log = tmp_path / "feedback.jsonl"
+    store = FeedbackStore(log, max_urls=2)
+    for n in range(5):
+        store.record(entry(f"https://{n}.example", 1 + n))
+    store.flush()
+    store.stats()
+    assert len(store.by_url) == 2
+
+    # An evicted page is recounted from the log
+    assert store.url_stats("https://0.example")["count"] == 1
+    assert store.url_scans == 1
+    assert len(store.by_url) == 2
+    assert store.url_stats("https://unrated.example") is None
+
+
+def test_torn_line_is_skipped(tmp_path):
+    log = tmp_path / "feedback.jsonl"
+    log.write_text('{"url": "https://a.example", "rating": 5}\n{"url": "https://a.exa')
+    store = FeedbackStore(log)
+    store.record(entry("https://a.example", 1))
+    store.flush()
+    assert store.url_stats("https://a.example")["count"] == 2
+    assert FeedbackStore(log).stats()["overall"]["count"] == 2
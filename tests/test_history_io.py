@@ -0,0 +1,54 @@
+import asyncio
+import json
+
+from history_io import NDJSONReader, export_ndjson, import_ndjson
+from similarity import content_fingerprint
+from storage import SQLiteHistoryStore
+
+PAGE = "The council approved the new cycle lanes after a long debate about parking. " * 20
+
+
+def make_record(record_id, **extra):
+    return {
+        "id": record_id,
+        "url": f"https://example.com/{record_id}",
+        "title": "Page",
+        "summary": {"title": "Page", "main": "Stored summary text.", "keyPoints": ["one"]},
+        "created_at": "2026-01-01T00:00:00",
+        "length": "medium",
+        "content_preview": "Preview",
+        **extra,
+    }
+
+
+async def chunks(data):
+    yield data
+
+
+def test_imported_fingerprints_are_not_trusted(tmp_path):
+    store = SQLiteHistoryStore(tmp_path / "summaries.db")
+    forged = make_record("forged", fingerprint=content_fingerprint(PAGE).hex(), paragraphs="00" * 8)
+    stats = asyncio.run(import_ndjson(chunks(json.dumps(forged).encode() + b"\n"), store))
+
+    assert stats["imported"] == 1
+    assert store.find_similar(content_fingerprint(PAGE).hex(), "medium", 0.5) is None
+    assert store.find_revision(forged["url"], "medium") is None
+    store.close()
+
+
+def test_export_leaves_out_lookup_fields(tmp_path):
+    store = SQLiteHistoryStore(tmp_path / "summaries.db")
+    store.add_many([make_record("saved", fingerprint=content_fingerprint(PAGE).hex())])
+    lines = b"".join(export_ndjson(store)).splitlines()
+    store.close()
+
+    assert [json.loads(line)["id"] for line in lines] == ["saved"]
+    assert "fingerprint" not in json.loads(lines[0])
+
+
+def test_reader_drops_malformed_lookup_fields():
+    reader = NDJSONReader()
+    results = reader.feed(json.dumps(make_record("r", fingerprint="not hex")).encode() + b"\n")
+    [(line_number, record, error)] = results
+    assert error is None
+    assert "fingerprint" not in record
@@ -0,0 +1,44 @@
+import pytest
+
+from preprocess import preprocess_content
+
+KEPT = [
+    "Facebook changed its privacy policy in 2021 after regulators complained.",
+    "The court said the terms of service were unenforceable.",
+    "We use cookies to measure how long readers stay, the publisher admitted in a filing last week, "
+    "and the regulator said that was not enough.",
+    "Follow us on this journey as we cross the Alps on foot. Each day brings a new challenge.",
+    "Many sites say all rights reserved in their footers.",
+]
+
+REMOVED = [
+    "Privacy Policy | Terms of Use | Cookie Settings",
+    "© 2024 Acme Corp. All rights reserved.",
+    "We use cookies to improve your experience.",
+    "Sign up for our newsletter",
+    "Follow us on Twitter, Facebook and Instagram",
+    "Skip to main content",
+]
+
+
+@pytest.mark.parametrize("line", KEPT)
+def test_sentences_mentioning_boilerplate_are_kept(line):
+    text, stats = preprocess_content(f"Intro paragraph.\n\n{line}", 10000)
+    assert line in text
+    assert stats["boilerplate_lines_removed"] == 0
+
+
+@pytest.mark.parametrize("line", REMOVED)
+def test_boilerplate_lines_are_removed(line):
+    text, stats = preprocess_content(f"Intro paragraph.\n\n{line}", 10000)
+    assert text == "Intro paragraph."
+    assert stats["boilerplate_lines_removed"] == 1
+
+
+def test_content_summarized_in_chunks_is_not_trimmed():
+    content = "\n\n".join(f"Paragraph {i} of a long article. " * 5 for i in range(200))
+    trimmed, stats = preprocess_content(content, 100)
+    assert stats["truncated"]
+    whole, stats = preprocess_content(content, 100, chunked_above_chars=1000)
+    assert not stats["truncated"]
+    assert whole.endswith("Paragraph 199 of a long article.")
@@ -0,0 +1,73 @@
+import sqlite3
+
+import pytest
+
+from storage import JSONHistoryStore, SQLiteHistoryStore
+
+
+def make_record(record_id, created_at):
+    return {
+        "id": record_id,
+        "url": f"https://example.com/{record_id}",
+        "title": "Page",
+        "summary": {"title": "Page", "main": "Stored summary text.", "keyPoints": ["one"]},
+        "created_at": created_at,
+        "length": "medium",
+        "content_preview": "Preview",
+    }
+
+
+@pytest.fixture(params=["sqlite", "json"])
+def store(request, tmp_path):
+    if request.param == "sqlite":
+        store = SQLiteHistoryStore(tmp_path / "summaries.db")
+    else:
+        store = JSONHistoryStore(tmp_path / "summaries.json")
+    yield store
+    store.close()
+
+
+def test_retention_compares_timestamps_not_text(store):
+    # As text, both kept records sort before the cutoff
+    store.add_many([
+        make_record("space", "2026-02-01 12:00:00"),
+        make_record("old", "2026-01-15T00:00:00"),
+    ])
+    assert store.apply_retention(created_before="2026-02-01T00:00:00") == 1
+    assert store.get("old") is None
+    assert store.get("space")["created_at"] == "2026-02-01T12:00:00.000000"
+
+
+def test_retention_compares_offsets_as_instants(store):
+    store.add_many([
+        make_record("offset", "2026-01-31T23:00:00-05:00"),
+        make_record("old", "2026-01-31T23:00:00+00:00"),
+    ])
+    assert store.apply_retention(created_before="2026-02-01T00:00:00+00:00") == 1
+    assert store.get("old") is None
+    assert store.get("offset") is not None
+
+
+def test_stored_timestamps_in_other_forms_are_normalized(tmp_path):
+    store = SQLiteHistoryStore(tmp_path / "summaries.db")
+    store.add_many([make_record("a", "2026-03-01T12:00:00"), make_record("b", "2025-06-01T00:00:00")])
+    # As written by a version that stored created_at unchanged
+    conn = sqlite3.connect(tmp_path / "summaries.db")
+    conn.execute("UPDATE summaries SET created_at = '2026-03-01 12:00:00' WHERE id = 'a'")
+    conn.commit()
+    conn.close()
+
+    assert store.apply_retention(max_entries=1) == 1
+    assert store.get("a")["created_at"] == "2026-03-01T12:00:00.000000"
+    store.close()
+
+
+def test_compact_only_vacuums_when_asked(tmp_path):
+    store = SQLiteHistoryStore(tmp_path / "summaries.db")
+    store.add_many([make_record(f"r{i}", "2025-06-01T00:00:00") for i in range(500)])
+    store.apply_retention(max_entries=1)
+    store.compact()
+    size = (tmp_path / "summaries.db").stat().st_size
+    store.compact(vacuum=True)
+    assert (tmp_path / "summaries.db").stat().st_size < size
+    store.close()
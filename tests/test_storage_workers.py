@@ -0,0 +1,48 @@
+import multiprocessing
+from datetime import datetime
+from pathlib import Path
+
+from storage import SQLiteHistoryStore
+
+WORKERS = 4
+RECORDS = 20
+
+
+def make_record(worker, i):
+    return {
+        "id": f"worker-{worker}-{i}",
+        "url": f"https://example.com/{worker}/{i}",
+        "title": f"Page {i}",
+        "summary": {"title": "Page", "main": "Stored summary text.", "keyPoints": ["one"]},
+        "created_at": datetime.now().isoformat(),
+        "length": "medium",
+        "content_preview": "Preview",
+    }
+
+
+def open_then_write(db_file, worker, barrier):
+    store = SQLiteHistoryStore(Path(db_file))
+    # Every worker has opened the database before any of them writes
+    barrier.wait(timeout=30)
+    for i in range(RECORDS):
+        store.add_many([make_record(worker, i)])
+    store.close()
+
+
+def test_workers_open_existing_database_then_write(tmp_path):
+    db_file = tmp_path / "summaries.db"
+    SQLiteHistoryStore(db_file).close()
+
+    context = multiprocessing.get_context("spawn")
+    barrier = context.Barrier(WORKERS)
+    processes = [context.Process(target=open_then_write, args=(str(db_file), w, barrier)) for w in range(WORKERS)]
+    for process in processes:
+        process.start()
+    for process in processes:
+        process.join(timeout=60)
+    assert [process.exitcode for process in processes] == [0] * WORKERS
+
+    store = SQLiteHistoryStore(db_file)
+    assert store.count() == WORKERS * RECORDS
+    assert len(store.search("stored summary", 100)) == WORKERS * RECORDS
+    store.close()